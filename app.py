@@ -1,10 +1,25 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
-import pandas as pd
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, make_response, send_file
+import io
 import os
 import json
+import hashlib
 import tempfile
 import traceback
 
+# Only stdlib/Flask modules here: searches are served from the mapped
+# snapshot, so pandas, numpy and openpyxl are imported inside the upload
+# and admin functions that need them (worker boot time and memory - see
+# the worker_startup targets in benchmark_suite.py)
+from clash_detection import detect_clashes
+from exports import FORMATS, ExportCache, safe_filename
+from faculty_grid import DAYS, PERIOD_TIMES
+from free_slots import parse_day, parse_period
+from live_slots import LiveFeed, filter_slot, local_now, local_time, locate, next_class
+from metrics import Gauge, init_app, register, render as render_metrics, timed
+from storage import open_storage
+from timetable_store import TimetableStore
+from upload_jobs import UploadJob, content_hash, incoming_path, load_job, submit
+
 app = Flask(__name__)
 app.secret_key = "test123"  # Change this in production!
 
@@ -27,289 +42,114 @@ else:
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
-# ============= YOUR EXISTING CODE (PRESERVED) =============
-ADMIN_PASSWORD = "gnit123"
+# Published versions live in the storage backend (SQLite unless
+# TIMETABLE_STORAGE=files); each worker caches the parsed live version
+storage = open_storage(UPLOAD_FOLDER)
+timetable_store = TimetableStore(storage)
 
-def convert_college_excel(filepath):
-    """
-    Automatically convert college Excel format to app format
-    Supports both formats:
-    1. College matrix format (with separate faculty sheet)
-    2. Already converted app format
-    """
-    try:
-        # Try to read as app format first (columns: Faculty, Day, Period, Class, Subject)
-        df = pd.read_excel(filepath)
-        
-        # Check if already in app format
-        required_columns = ['Faculty', 'Day', 'Period', 'Class', 'Subject']
-        if all(col in df.columns for col in required_columns):
-            print("✅ File already in app format")
-            return df
-        
-        # If not, try to convert from college format
-        print("🔄 Converting from college format...")
-        
-        # Try to detect college format
-        xl = pd.ExcelFile(filepath)
-        
-        # Check for multiple sheets
-        if len(xl.sheet_names) >= 2:
-            # College format with Timetable and Faculty sheets
-            return convert_from_college_format(filepath)
-        else:
-            # Single sheet - try to detect matrix format
-            return convert_from_matrix_format(filepath)
-            
-    except Exception as e:
-        print(f"❌ Conversion error: {e}")
-        return None
+# Rendered xlsx/PDF/ics downloads, keyed by version + entity (see exports.py)
+export_cache = ExportCache(UPLOAD_FOLDER)
 
-def convert_from_college_format(filepath):
-    """Convert from GNITC college format (multiple sheets)"""
-    try:
-        # Read both sheets
-        xl = pd.ExcelFile(filepath)
-        timetable_df = pd.read_excel(filepath, sheet_name=0)  # Timetable sheet
-        
-        # ===== 1. CREATE FACULTY MAPPING =====
-        # Map subject codes to faculty (simplified mapping)
-        mapping = {
-            'DM': 'Mrs. Y.Sindhura',
-            'BEFA': 'Mr. N. Srikanth', 
-            'OS': 'Mr. MD. Saleem',
-            'CN': 'Mr. K. Mathivanan',
-            'SE': 'Mr. V. Saravanakumar',
-            'COI': 'Mr. P.Prasanna',
-            'RTRP': 'Mr. G. Vijay Kumar',
-            'FSD': 'Mr. V. Saravanakumar'
-        }
-        
-        # ===== 2. PARSE TIMETABLE MATRIX =====
-        rows = []
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-        day_codes = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']
-        
-        # Find the timetable data (skip headers)
-        for idx, row in timetable_df.iterrows():
-            if len(row) > 0:
-                first_cell = str(row.iloc[0]).strip().upper() if pd.notna(row.iloc[0]) else ""
-                
-                if first_cell in day_codes:
-                    day_index = day_codes.index(first_cell)
-                    day_name = days[day_index]
-                    
-                    # Get subjects for periods 1-6
-                    for period in range(1, 7):  # Periods 1-6
-                        if period < len(row):
-                            cell_value = row.iloc[period]
-                            if pd.notna(cell_value):
-                                subject_code = str(cell_value).strip()
-                                
-                                if subject_code and subject_code != 'nan':
-                                    # Map subject code to faculty
-                                    faculty = None
-                                    for code, fac in mapping.items():
-                                        if code in subject_code:
-                                            faculty = fac
-                                            break
-                                    
-                                    if faculty:
-                                        rows.append({
-                                            'Faculty': faculty,
-                                            'Day': day_name,
-                                            'Period': period,
-                                            'Class': 'CSE-CYBER-II-B',
-                                            'Subject': get_subject_name(subject_code)
-                                        })
-        
-        if rows:
-            return pd.DataFrame(rows)
-        else:
-            return None
-        
-    except Exception as e:
-        print(f"Error converting college format: {e}")
-        return None
+# Wakes this worker's /api/now/stream clients at period boundaries and on publish
+live_feed = LiveFeed(timetable_store)
 
-def convert_from_matrix_format(filepath):
-    """Convert from simple matrix format (days × periods)"""
-    try:
-        df = pd.read_excel(filepath)
-        rows = []
-        
-        # Find day column (contains MON, TUE, etc.)
-        day_column = None
-        for col in df.columns:
-            first_val = df[col].iloc[0] if len(df) > 0 else ""
-            if pd.notna(first_val):
-                if any(day in str(first_val).upper() for day in ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT']):
-                    day_column = col
-                    break
-        
-        if not day_column:
-            return None
-        
-        days_map = {
-            'MON': 'Monday', 'TUE': 'Tuesday', 'WED': 'Wednesday',
-            'THU': 'Thursday', 'FRI': 'Friday', 'SAT': 'Saturday'
-        }
-        
-        # Faculty mapping
-        faculty_mapping = {
-            'DM': 'Mrs. Y.Sindhura',
-            'BEFA': 'Mr. N. Srikanth',
-            'OS': 'Mr. MD. Saleem',
-            'CN': 'Mr. K. Mathivanan',
-            'SE': 'Mr. V. Saravanakumar',
-            'COI': 'Mr. P.Prasanna',
-            'RTRP': 'Mr. G. Vijay Kumar',
-            'FSD': 'Mr. V. Saravanakumar'
-        }
-        
-        # Process each row
-        for idx, row in df.iterrows():
-            day_code = str(row[day_column]).strip().upper() if pd.notna(row[day_column]) else ""
-            if day_code in days_map:
-                day_name = days_map[day_code]
-                
-                # Check each column for subject codes
-                for col in df.columns:
-                    if col != day_column:
-                        cell_value = row[col]
-                        if pd.notna(cell_value):
-                            subject_code = str(cell_value).strip()
-                            if subject_code and subject_code != 'nan':
-                                # Get period from column name or position
-                                period = 1  # Default
-                                col_str = str(col)
-                                if '1' in col_str:
-                                    period = 1
-                                elif '2' in col_str:
-                                    period = 2
-                                elif '3' in col_str:
-                                    period = 3
-                                elif '4' in col_str:
-                                    period = 4
-                                elif '5' in col_str:
-                                    period = 5
-                                elif '6' in col_str:
-                                    period = 6
-                                
-                                # Map to faculty
-                                for code, faculty in faculty_mapping.items():
-                                    if code in subject_code:
-                                        rows.append({
-                                            'Faculty': faculty,
-                                            'Day': day_name,
-                                            'Period': period,
-                                            'Class': 'CSE-CYBER-II-B',
-                                            'Subject': get_subject_name(subject_code)
-                                        })
-                                        break
-        
-        if rows:
-            return pd.DataFrame(rows)
-        else:
-            return None
-        
-    except Exception as e:
-        print(f"Error converting matrix format: {e}")
-        return None
+# Latency per route + /metrics (slow-request profiles land in profiles/)
+init_app(app, profile_dir=os.path.join(UPLOAD_FOLDER, "profiles"))
 
-def get_subject_name(code):
-    """Convert subject code to full name"""
-    subject_names = {
-        'DM': 'Discrete Mathematics',
-        'BEFA': 'Business Economics & Financial Analysis',
-        'OS': 'Operating Systems',
-        'CN': 'Computer Networks',
-        'SE': 'Software Engineering',
-        'COI': 'Constitution of India',
-        'RTRP': 'Real-Time Research Project',
-        'FSD': 'Full Stack Development'
-    }
-    
-    for short, full in subject_names.items():
-        if short in code:
-            return full
-    
-    return code  # Return as-is if not found
+def _timetable_samples():
+    timetable = timetable_store.loaded
+    if timetable is None:
+        return []
+    return [((timetable.version,), len(timetable))]
+
+def _cache_samples(field):
+    timetable = timetable_store.loaded
+    caches = {'pages': timetable.pages if timetable is not None else None, 'exports': export_cache}
+    samples = []
+    for name, cache in caches.items():
+        if cache is None:
+            continue
+        lookups = cache.hits + cache.misses
+        value = {'hits': cache.hits, 'misses': cache.misses,
+                 'ratio': cache.hits / lookups if lookups else None}[field]
+        samples.append(((name,), value))
+    return samples
+
+register(Gauge("timetable_rows", "Rows in the loaded timetable version", _timetable_samples, ("version",)))
+register(Gauge("cache_hits", "Cache hits (pages: this version's result pages)",
+               lambda: _cache_samples('hits'), ("cache",)))
+register(Gauge("cache_misses", "Cache misses", lambda: _cache_samples('misses'), ("cache",)))
+register(Gauge("cache_hit_ratio", "Hits / lookups", lambda: _cache_samples('ratio'), ("cache",)))
+
+# ============= YOUR EXISTING CODE (PRESERVED) =============
+ADMIN_PASSWORD = "gnit123"
 
 @app.route("/")
 def home():
     return render_template("home.html")
 
-@app.route("/search", methods=["POST"])
+@app.route("/search", methods=["GET", "POST"])
 def search():
-    name = request.form["faculty"].strip()
-    
-    filepath = os.path.join(app.config["UPLOAD_FOLDER"], "timetable.xlsx")
-    
-    if not os.path.exists(filepath):
-        return render_template("result.html", 
-                             error="📭 No timetable uploaded yet. Contact HOD.",
-                             name=name,
-                             has_timetable=False)
+    name = request.values["faculty"].strip()
     
     try:
-        df = pd.read_excel(filepath)
+        timetable = timetable_store.get()
+        
+        if timetable is None:
+            return render_template("result.html", 
+                                 error="📭 No timetable uploaded yet. Contact HOD.",
+                                 name=name,
+                                 has_timetable=False)
         
         # Check if Faculty column exists
-        if 'Faculty' not in df.columns:
+        if not timetable.has_faculty:
             return render_template("result.html",
                                  error="❌ Invalid timetable format. Please upload a valid timetable.",
                                  name=name,
                                  has_timetable=True)
         
-        df["Faculty"] = df["Faculty"].astype(str).str.strip()
-        
         # GNITC specific: Handle different name formats
-        # Search for partial matches (e.g., "Saleem" finds "Mr. MD. Saleem")
-        search_name_lower = name.lower()
-        
-        # Try different search patterns
-        mask = df["Faculty"].str.lower().str.contains(search_name_lower, na=False)
-        
-        filtered = df[mask]
-        
-        if len(filtered) == 0:
-            # Get suggestions
-            all_faculty = df["Faculty"].unique()
-            suggestions = []
-            for faculty in all_faculty:
-                if pd.notna(faculty):
-                    faculty_lower = faculty.lower()
-                    if (search_name_lower in faculty_lower or 
-                        search_name_lower in faculty_lower.replace(".", "").replace(" ", "")):
-                        suggestions.append(faculty)
-            
-            return render_template("result.html",
-                                 error=f"❌ No timetable found for '{name}'",
-                                 suggestions=suggestions[:5],
-                                 name=name,
-                                 has_timetable=True)
+        # The index matches full names, tokens and prefixes, e.g. "Saleem",
+        # "md saleem" and "mdsaleem" all find "Mr. MD. Saleem"
+        index = timetable.search_index
+        with timed("search", "filter"):
+            name_ids = tuple(index.match(name))
         
-        data = filtered.to_dict(orient="records")
+        # Same names + same query = same page (kept across versions that
+        # didn't change those names' rows - see Timetable._reuse)
+        key = (tuple(index.names[name_id] for name_id in name_ids), name)
+        etag = timetable_etag(timetable, *key)
+        html = timetable.pages.get(key)
         
-        # Add period times for GNITC
-        period_times = {
-            1: "9:10-10:10",
-            2: "10:10-11:10", 
-            3: "11:10-12:10",
-            4: "12:10-1:10",
-            5: "2:00-3:00",
-            6: "3:00-4:00"
-        }
-        
-        for row in data:
-            row['Time'] = period_times.get(row['Period'], 'N/A')
+        if html is None:
+            if not name_ids:
+                # Closest names first (trigram + difflib ranking)
+                with timed("search", "suggest"):
+                    suggestions = index.suggest(name, limit=5)
+                with timed("search", "render"):
+                    html = render_template("result.html",
+                                         error=f"❌ No timetable found for '{name}'",
+                                         suggestions=suggestions,
+                                         name=name,
+                                         has_timetable=True)
+            else:
+                # Rows, times, weekly grid and counts were built when the
+                # timetable loaded - see faculty_grid.py
+                schedule = timetable.schedule(name_ids)
+                with timed("search", "render"):
+                    html = render_template("result.html",
+                                         data=schedule.records,
+                                         schedule=schedule,
+                                         period_times=PERIOD_TIMES,
+                                         name=name,
+                                         count=schedule.count,
+                                         has_timetable=True)
+            timetable.pages.put(key, html)
         
-        return render_template("result.html",
-                             data=data,
-                             name=name,
-                             count=len(data),
-                             has_timetable=True)
+        response = make_response(html)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True  # revalidate: a new upload changes the page
+        return response.make_conditional(request)
         
     except Exception as e:
         print(f"Search error: {traceback.format_exc()}")
@@ -330,11 +170,129 @@ def admin_login():
         return redirect("/dashboard")
     return "Wrong password. <a href='/admin'>Try again</a>"
 
+# Rows per workload / section table on the dashboard (all of them are in /api/analytics)
+DASHBOARD_TABLE_ROWS = 200
+
 @app.route("/dashboard")
 def dashboard():
     if not session.get("admin"):
         return redirect("/admin")
-    return render_template("dashboard.html")
+    
+    # Clash report and workload aggregates of the live version (cached per
+    # version by the store)
+    timetable = timetable_store.get()
+    clashes = timetable.clashes if timetable is not None else None
+    with timed("dashboard", "analytics"):
+        analytics = timetable.analytics if timetable is not None else None
+    
+    # "Who can cover X on Tuesday period 3?" / "When are X and Y both free?"
+    finder = None
+    if timetable is not None and timetable.has_faculty:
+        finder = {'faculty': request.args.get("faculty", ""),
+                  'day': parse_day(request.args.get("day")),
+                  'period': parse_period(request.args.get("period")),
+                  'common': request.args.get("common", "")}
+        occupancy = timetable.occupancy
+        name_ids = find_faculty(timetable, finder['faculty'])
+        if name_ids and finder['day'] and finder['period']:
+            finder['covering'], finder['substitutes'] = occupancy.substitutes(
+                name_ids, finder['day'], finder['period'])
+        elif finder['day'] and finder['period']:
+            finder['free'] = occupancy.free_faculty(finder['day'], finder['period'])
+        if finder['common']:
+            common_ids = [name_id for query in finder['common'].split(",")
+                          for name_id in find_faculty(timetable, query)]
+            finder['common_names'] = [occupancy.names[name_id] for name_id in sorted(set(common_ids))]
+            finder['common_slots'] = occupancy.common_free_slots(common_ids) if common_ids else []
+        finder['periods'] = occupancy.periods
+    
+    # Admin page: the registry (and pandas) is loaded here, not at import
+    from subject_registry import DEFAULT_REGISTRY, get_registry, registry_path
+    
+    registry = get_registry(app.config["UPLOAD_FOLDER"])
+    registry_info = {'version': registry.version, 'subjects': len(registry),
+                     'custom': registry_path(app.config["UPLOAD_FOLDER"]) != DEFAULT_REGISTRY}
+    
+    return render_template("dashboard.html",
+                         versions=storage.list_versions(),
+                         registry=registry_info,
+                         clashes=clashes,
+                         analytics=analytics,
+                         table_rows=DASHBOARD_TABLE_ROWS,
+                         finder=finder,
+                         days=DAYS,
+                         period_times=PERIOD_TIMES)
+
+@app.route("/admin/rollback", methods=["POST"])
+def rollback_version():
+    """Make an older published timetable live again"""
+    if not session.get("admin"):
+        return redirect("/admin")
+    
+    version = request.form.get("version", "")
+    try:
+        storage.rollback(version)
+        print(f"⏪ Rolled back to timetable version {version}")
+    except ValueError as e:
+        return f"{e}. <a href='/dashboard'>Back to dashboard</a>"
+    
+    return redirect("/dashboard")
+
+@app.route("/admin/registry", methods=["POST"])
+def upload_registry():
+    """Replace the subject/faculty mapping used by every converter"""
+    if not session.get("admin"):
+        return redirect("/admin")
+    
+    file = request.files.get('registry')
+    if file is None or not file.filename.endswith(('.csv', '.xlsx', '.xls')):
+        return "Please choose a mapping sheet (.csv, .xlsx or .xls). <a href='/dashboard'>Back to dashboard</a>"
+    
+    from subject_registry import save_registry
+    
+    folder = app.config["UPLOAD_FOLDER"]
+    staged = incoming_path(folder, "registry", os.path.splitext(file.filename)[1])
+    file.save(staged)
+    try:
+        registry = save_registry(folder, staged)
+        print(f"📚 New subject registry {registry.version} ({len(registry)} subjects)")
+    except Exception as e:
+        return f"Invalid mapping sheet: {e}. <a href='/dashboard'>Back to dashboard</a>"
+    finally:
+        if os.path.exists(staged):
+            os.remove(staged)
+    
+    return redirect("/dashboard")
+
+@app.route("/admin/registry.csv")
+def download_registry():
+    """Current mapping sheet, to edit and upload again"""
+    if not session.get("admin"):
+        return redirect("/admin")
+    from subject_registry import registry_path
+    
+    with open(registry_path(app.config["UPLOAD_FOLDER"]), "rb") as f:
+        data = f.read()
+    response = make_response(data)
+    response.headers["Content-Type"] = "text/csv"
+    response.headers["Content-Disposition"] = "attachment; filename=subjects.csv"
+    return response
+
+@app.route("/admin/timetable.xlsx")
+def download_timetable():
+    """Live timetable as an Excel file (storage itself isn't Excel any more)"""
+    if not session.get("admin"):
+        return redirect("/admin")
+    timetable = timetable_store.get()
+    if timetable is None:
+        return "No timetable uploaded yet. <a href='/upload_page'>Upload one</a>"
+    
+    buffer = io.BytesIO()
+    timetable.df.to_excel(buffer, index=False)
+    response = make_response(buffer.getvalue())
+    response.headers["Content-Type"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    response.headers["Content-Disposition"] = f"attachment; filename=timetable-{timetable.version}.xlsx"
+    return response
 
 @app.route("/upload_page")
 def upload_page():
@@ -356,110 +314,771 @@ def upload():
         return "Please choose a file"
     
     # Check file extension
-    if not (file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
-        return "Please upload Excel file only (.xlsx or .xls)"
+    is_zip = file.filename.lower().endswith('.zip')
+    if not (file.filename.endswith('.xlsx') or file.filename.endswith('.xls') or is_zip):
+        return "Please upload Excel file only (.xlsx or .xls), or a .zip of Excel files"
+    
+    try:
+        # Stage the raw file - the live timetable isn't touched until
+        # the background job publishes the converted version
+        job = UploadJob(app.config["UPLOAD_FOLDER"])
+        extension = '.zip' if is_zip else os.path.splitext(file.filename)[1]
+        source_path = incoming_path(app.config["UPLOAD_FOLDER"], job.id, extension)
+        file.save(source_path)
+        
+        submit(app.config["UPLOAD_FOLDER"], process_upload, source_path, is_zip, file.filename, job=job)
+        
+        # upload_success.html polls /api/upload_status/<id> until the job is done
+        return render_template("upload_success.html", job=job.status)
+        
+    except Exception as e:
+        error_details = traceback.format_exc()
+        print(f"Error in upload: {error_details}")
+        return f"Error processing file: {str(e)}"
+
+def timetable_stats(df):
+    """Upload summary numbers and the first 10 faculty names"""
+    import pandas as pd
+    
+    stats = {
+        'faculty_count': int(df['Faculty'].nunique()),
+        'total_classes': len(df),
+        'classes': int(df['Class'].nunique()),
+        'subjects': int(df['Subject'].nunique())
+    }
+    faculty_list = df['Faculty'].dropna().unique()[:10]
+    faculty_list = [str(name) for name in faculty_list if pd.notna(name) and str(name).strip()]
+    return stats, faculty_list
+
+def diff_against_live(df):
+    """Row-level diff of df against the live version (None if nothing is live)"""
+    from timetable_diff import diff_timetables
+    
+    live = timetable_store.get()
+    if live is None:
+        return None
+    with timed("upload", "diff"):
+        diff = diff_timetables(live.df, df, live.version)
+    counts = diff['counts']
+    print(f"🔀 Changes since {live.version}: +{counts['added']} -{counts['removed']} ~{counts['moved']}")
+    return diff
+
+def find_duplicate(fingerprint=None, version=None):
+    """Meta of a kept version made from the same upload (or with that id)"""
+    for meta in storage.list_versions():
+        if (fingerprint and meta.get('content_hash') == fingerprint) or meta['version'] == version:
+            return meta
+    return None
+
+def duplicate_result(meta):
+    """Job result for an upload that didn't change the live timetable"""
+    restored = not meta['current']
+    if restored:
+        storage.rollback(meta['version'])
+    print(f"♻️ Upload identical to version {meta['version']}" + (" - made it live again" if restored else ""))
+    return {
+        'stats': meta.get('stats'),
+        'version': meta['version'],
+        'duplicate': {'version': meta['version'], 'filename': meta.get('filename'), 'restored': restored},
+    }
+
+def process_upload(job, source_path, is_zip, filename):
+    """Background job: convert the staged upload, compute stats, publish it"""
+    from bulk_import import import_timetables
+    from subject_registry import get_registry
+    
+    folder = app.config["UPLOAD_FOLDER"]
     
     try:
-        # Save the file
-        filepath = os.path.join(app.config["UPLOAD_FOLDER"], "timetable.xlsx")
-        file.save(filepath)
+        job.progress('Checking for changes', 2)
+        registry = get_registry(folder)  # subject/faculty mapping (compiled once per file version)
         
-        # Read the file to get stats
-        df = pd.read_excel(filepath)
+        # Same bytes + same registry = same timetable: nothing to convert
+        fingerprint = content_hash(source_path, registry.version)
+        duplicate = find_duplicate(fingerprint)
+        if duplicate is not None:
+            return duplicate_result(duplicate)
         
-        # Check if it's already in app format
-        required_columns = ['Faculty', 'Day', 'Period', 'Class', 'Subject']
+        # One streaming pass over the workbook: detects the format of every
+        # sheet and converts it (app-format sheets pass through as-is)
+        job.progress('Reading sheets', 5)
+        # Sheets are parsed and converted in one streaming pass, so this
+        # stage covers both
+        with timed("upload", "parse_convert"):
+            import_report = import_timetables(
+                source_path, registry=registry,
+                progress=lambda done, total: job.progress(f'Converted {done}/{total} sheets', 5 + 75 * done / total))
+        df = import_report.df
+        converted = df is not None and len(df) > 0
         
-        # Check if columns exist - FIXED VERSION
-        columns_exist = []
-        for col in required_columns:
-            columns_exist.append(col in df.columns)
+        if is_zip and not converted:
+            raise ValueError("No timetable sheets found in the zip file")
+        if not converted and import_report.errors:
+            # Unreadable file - keep serving the previous timetable
+            raise ValueError(import_report.errors[0]['error'])
         
-        if all(columns_exist):  # This works because it's a list of booleans
-            # Already in correct format
+        staged_path = source_path
+        if converted:
+            # A single app-format sheet is already in the right shape on disk,
+            # anything else is saved from df by the storage backend
+            imported = import_report.imported
+            if is_zip or len(import_report.sheets) != 1 or imported[0]['format'] != 'app':
+                staged_path = None
+            
+            stats, faculty_list = timetable_stats(df)
+            
+            # Double-bookings / collisions in the new data (shown on the dashboard)
+            job.progress('Checking for clashes', 90)
+            with timed("upload", "clashes"):
+                clashes = detect_clashes(df).summary()
+            print(f"⚔️ {clashes['total']} clashes in {clashes['rows_checked']} rows")
+            
+            # What changed since the live version (shown to the HOD)
+            job.progress('Comparing with the live timetable', 92)
+            diff = diff_against_live(df)
+            if diff is not None and diff['identical']:
+                # Different file (re-saved, other format...), same timetable
+                live = find_duplicate(version=diff['base_version'])
+                if live is not None:
+                    return duplicate_result(live)
+        else:
+            clashes = None
+            diff = None
             stats = {
-                'faculty_count': int(df['Faculty'].nunique()),
-                'total_classes': len(df),
-                'classes': int(df['Class'].nunique()),
-                'subjects': int(df['Subject'].nunique())
+                'faculty_count': 0,
+                'total_classes': import_report.sheets[0]['source_rows'] if import_report.sheets else 0,
+                'classes': 0,
+                'subjects': 0
             }
-            faculty_list = df['Faculty'].dropna().unique()[:10]
-            faculty_list = [str(name) for name in faculty_list if pd.notna(name) and str(name).strip()]
-        else:
-            # Try to auto-convert
-            converted_df = convert_college_excel(filepath)
-            if converted_df is not None and len(converted_df) > 0:
-                # Save the converted version
-                converted_df.to_excel(filepath, index=False)
-                stats = {
-                    'faculty_count': int(converted_df['Faculty'].nunique()),
-                    'total_classes': len(converted_df),
-                    'classes': int(converted_df['Class'].nunique()),
-                    'subjects': int(converted_df['Subject'].nunique())
-                }
-                faculty_list = converted_df['Faculty'].dropna().unique()[:10]
-                faculty_list = [str(name) for name in faculty_list if pd.notna(name) and str(name).strip()]
-            else:
-                stats = {
-                    'faculty_count': 0,
-                    'total_classes': len(df),
-                    'classes': 0,
-                    'subjects': 0
-                }
-                faculty_list = ['Format not recognized - using basic upload']
+            faculty_list = ['Format not recognized - using basic upload']
         
-        return render_template("upload_success.html", 
-                             stats=stats,
-                             faculty_list=faculty_list)
+        # New version + atomic switch of the live one: searches switch over here
+        job.progress('Publishing', 95)
+        with timed("upload", "publish"):
+            version = storage.publish(df if converted else None, staged_path,
+                                      meta={'filename': filename, 'stats': stats,
+                                            'clash_counts': clashes and clashes['counts'],
+                                            'registry': registry.version,
+                                            'content_hash': fingerprint,
+                                            'diff_counts': diff and diff['counts']})
         
-    except Exception as e:
-        error_details = traceback.format_exc()
-        print(f"Error in upload: {error_details}")
-        return f"Error processing file: {str(e)}"
+        return {
+            'stats': stats,
+            'faculty_list': faculty_list,
+            'sheets': import_report.sheets if len(import_report.sheets) > 1 else [],
+            'import_seconds': import_report.seconds,
+            'version': version,
+            'clashes': clashes,
+            'diff': diff,
+        }
+    finally:
+        if os.path.exists(source_path):
+            os.remove(source_path)
+
+@app.route("/generate", methods=["POST"])
+def generate_timetable():
+    """Build a timetable from a requirements workbook (background job)"""
+    if not session.get("admin"):
+        return redirect("/admin")
+    
+    file = request.files.get('requirements')
+    if file is None or not file.filename.endswith(('.xlsx', '.xls')):
+        return "Please choose a requirements Excel file (.xlsx or .xls)"
+    
+    from timetable_generator import DEFAULT_SECONDS
+    
+    seconds = min(max(request.form.get("seconds", DEFAULT_SECONDS, type=float), 1), 120)
+    workers = min(max(request.form.get("workers", 1, type=int), 1), os.cpu_count() or 1)
+    
+    job = UploadJob(app.config["UPLOAD_FOLDER"])
+    source_path = incoming_path(app.config["UPLOAD_FOLDER"], job.id, os.path.splitext(file.filename)[1])
+    file.save(source_path)
+    
+    submit(app.config["UPLOAD_FOLDER"], process_generate, source_path, seconds, workers, file.filename, job=job)
+    return render_template("upload_success.html", job=job.status)
+
+def process_generate(job, source_path, seconds, workers, filename):
+    """Background job: solve the requirements, then publish like an upload"""
+    from subject_registry import get_registry
+    from timetable_generator import generate, load_requirements
+    
+    folder = app.config["UPLOAD_FOLDER"]
+    try:
+        job.progress('Reading requirements', 5)
+        registry = get_registry(folder)
+        requirements, rooms = load_requirements(source_path, registry)
+        if not requirements:
+            raise ValueError("No requirements found (need Class, Subject, Faculty and Hours columns)")
+        
+        with timed("generate", "solve"):
+            result = generate(
+                requirements, rooms, seconds=seconds, workers=workers,
+                progress=lambda done, total: job.progress(f'Solving ({done}/{total})', 10 + 75 * done / total))
+        if not result.complete:
+            missing = ", ".join(sorted({f"{req.section} {req.subject}" for req in result.unplaced})[:5])
+            raise ValueError(f"Could not place {len(result.unplaced)} sessions in {seconds:g}s "
+                             f"(e.g. {missing}). Try a longer time limit or check the requirements.")
+        
+        df = result.df
+        stats, faculty_list = timetable_stats(df)
+        clashes = detect_clashes(df).summary()
+        diff = diff_against_live(df)
+        
+        job.progress('Publishing', 95)
+        with timed("generate", "publish"):
+            version = storage.publish(df, None,
+                                      meta={'filename': f"Generated from {filename}", 'stats': stats,
+                                            'clash_counts': clashes['counts'], 'registry': registry.version,
+                                            'diff_counts': diff and diff['counts']})
+        
+        return {
+            'stats': stats,
+            'faculty_list': faculty_list,
+            'version': version,
+            'clashes': clashes,
+            'diff': diff,
+            'generated': {'entries': len(result.df), 'seconds': result.seconds,
+                          'seed': result.seed, 'steps': result.iterations},
+        }
+    finally:
+        if os.path.exists(source_path):
+            os.remove(source_path)
+
+@app.route("/upload/<job_id>")
+def upload_result(job_id):
+    """Upload page for a job (the success page once the job is done)"""
+    if not session.get("admin"):
+        return redirect("/admin")
+    
+    job = load_job(app.config["UPLOAD_FOLDER"], job_id)
+    if job is None:
+        return "Upload not found (it may have expired). <a href='/upload_page'>Upload again</a>"
+    
+    return render_template("upload_success.html", job=job)
+
+@app.route("/api/upload_status/<job_id>")
+def upload_status(job_id):
+    """Progress, stats and errors of a background upload"""
+    if not session.get("admin"):
+        return jsonify({"error": "Admin login required"}), 403
+    
+    job = load_job(app.config["UPLOAD_FOLDER"], job_id)
+    if job is None:
+        return jsonify({"error": "Unknown upload id"}), 404
+    
+    return jsonify(job)
 
 @app.route("/logout")
 def logout():
     session.pop("admin", None)
     return redirect("/")
 
+def timetable_etag(timetable, *parts):
+    """ETag for anything derived from one timetable version"""
+    return hashlib.sha1(repr((timetable.version,) + parts).encode()).hexdigest()[:20]
+
+def conditional_json(etag, build):
+    """jsonify(build()) with an ETag - a matching If-None-Match gets a 304 without building it"""
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # always revalidate, it's cheap
+    return response
+
+def json_value(value):
+    """NaN -> null (NaN isn't valid JSON)"""
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+def schedule_json(timetable, schedule, **fields):
+    """API payload for one WeeklySchedule"""
+    grid = {}
+    for day, slots in schedule.grid.items():
+        grid[str(json_value(day))] = {
+            str(json_value(period)): [{'Class': json_value(row.get('Class')),
+                                       'Subject': json_value(row.get('Subject')),
+                                       'Faculty': json_value(row.get('Faculty'))} for row in rows]
+            for period, rows in slots.items()
+        }
+    payload = {
+        'version': timetable.version,
+        'count': schedule.count,
+        'subjects': schedule.subject_count,
+        'days': schedule.day_count,
+        'entries': [{str(key): json_value(value) for key, value in row.items()} for row in schedule.records],
+        'grid': grid,
+    }
+    payload.update(fields)
+    return payload
+
 @app.route("/api/faculty_list")
 def get_faculty_list():
     """API endpoint to get all faculty names for autocomplete"""
-    filepath = os.path.join(app.config["UPLOAD_FOLDER"], "timetable.xlsx")
-    
-    if not os.path.exists(filepath):
-        return json.dumps([])
-    
     try:
-        df = pd.read_excel(filepath)
+        timetable = timetable_store.get()
         
-        # Check if Faculty column exists
-        if 'Faculty' not in df.columns:
-            return json.dumps([])
+        # Nothing uploaded yet, or no Faculty column
+        if timetable is None or not timetable.has_faculty:
+            return jsonify([])
         
-        # Get unique faculty names, remove NaN, sort alphabetically
-        faculty_series = df['Faculty'].dropna()
-        faculty_list = []
-        
-        for name in faculty_series:
-            if pd.notna(name):
-                faculty_list.append(str(name).strip())
-        
-        # Remove duplicates by converting to set then back to list
-        faculty_list = list(set(faculty_list))
-        faculty_list.sort()
-        
-        return json.dumps(faculty_list[:50])  # Limit to 50 names
+        # Names are deduplicated and sorted once when the timetable loads
+        return conditional_json(timetable_etag(timetable, "faculty_list"),
+                                lambda: timetable.faculty_names[:50])  # Limit to 50 names
         
     except Exception as e:
         print(f"Error in faculty_list API: {e}")
-        return json.dumps([])
+        return jsonify([])
+
+@app.route("/api/faculty")
+def api_faculty():
+    """Paginated faculty names: ?prefix=sal&page=1&per_page=50"""
+    timetable = timetable_store.get()
+    if timetable is None or not timetable.has_faculty:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    prefix = request.args.get("prefix", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", 50, type=int), 1), 200)
+    
+    def build():
+        index = timetable.search_index
+        names = sorted(index.names[name_id] for name_id in index.prefix_match(prefix))
+        start = (page - 1) * per_page
+        return {
+            'version': timetable.version,
+            'prefix': prefix,
+            'page': page,
+            'per_page': per_page,
+            'total': len(names),
+            'pages': -(-len(names) // per_page),
+            'faculty': names[start:start + per_page],
+        }
+    
+    return conditional_json(timetable_etag(timetable, "faculty", prefix, page, per_page), build)
+
+@app.route("/api/faculty/<name>/timetable")
+def api_faculty_timetable(name):
+    """Weekly timetable of a faculty (same name matching as /search)"""
+    timetable = timetable_store.get()
+    if timetable is None or not timetable.has_faculty:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    index = timetable.search_index
+    # An exact name wins over other names it is a prefix of
+    name_ids = tuple(index.best_match(name))
+    
+    if not name_ids:
+        return jsonify({"error": f"No timetable found for '{name}'",
+                        "suggestions": index.suggest(name, limit=5)}), 404
+    
+    schedule = timetable.schedule(name_ids)
+    return conditional_json(timetable_etag(timetable, "faculty_timetable", name_ids),
+                            lambda: schedule_json(timetable, schedule, faculty=list(schedule.names)))
+
+@app.route("/api/class/<name>/timetable")
+def api_class_timetable(name):
+    """Weekly timetable of a class/section, e.g. /api/class/CSE-CYBER-II-B/timetable"""
+    timetable = timetable_store.get()
+    if timetable is None:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    schedule = timetable.class_schedule(name)
+    if schedule is None:
+        return jsonify({"error": f"No timetable found for class '{name}'"}), 404
+    
+    return conditional_json(timetable_etag(timetable, "class_timetable", schedule.names),
+                            lambda: schedule_json(timetable, schedule, **{'class': schedule.names[0]}))
+
+@app.route("/api/analytics")
+def api_analytics():
+    """Workload aggregates of the live version (what the dashboard shows, in full)"""
+    if not session.get("admin"):
+        return jsonify({"error": "Admin login required"}), 403
+    
+    timetable = timetable_store.get()
+    if timetable is None:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    return conditional_json(timetable_etag(timetable, "analytics"), lambda: timetable.analytics)
+
+def find_faculty(timetable, name):
+    """Name ids for a faculty query (exact name preferred), () if unknown"""
+    if timetable is None or not timetable.has_faculty or not name.strip():
+        return ()
+    return tuple(timetable.search_index.best_match(name))
+
+# Schedules prepared per chunk of a batch: each chunk's rows are read in
+# one pass and fit the schedule cache (SCHEDULE_CACHE_SIZE) while streamed
+BATCH_CHUNK = 128
+
+def batch_names(key, *aliases):
+    """Names from ?key=a&key=b,c or a JSON body {"key": [...]}"""
+    body = request.get_json(silent=True) if request.is_json else None
+    values = []
+    for name in (key,) + aliases:
+        values.extend(request.args.getlist(name))
+        values.extend(request.form.getlist(name))
+        if isinstance(body, dict):
+            value = body.get(name) or []
+            values.extend([value] if isinstance(value, str) else value)
+    names = []
+    for value in values:
+        names.extend(part.strip() for part in str(value).split(",") if part.strip())
+    return list(dict.fromkeys(names))
+
+def batch_entities(timetable, faculty, classes):
+    """[('faculty'|'class', query, name ids | class id | None)] - '*' means all of them"""
+    entities = []
+    for query in faculty:
+        if query == "*":
+            entities.extend(('faculty', name, (i,)) for i, name in enumerate(timetable.faculty_names))
+        else:
+            entities.append(('faculty', query, find_faculty(timetable, query) or None))
+    for query in classes:
+        if query == "*":
+            entities.extend(('class', name, i) for i, name in enumerate(getattr(timetable.class_schedules, 'names', [])))
+        else:
+            entities.append(('class', query, timetable.class_id(query)))
+    return entities
+
+def batch_items(timetable, entities):
+    """One JSON-ready dict per entity, built a chunk at a time"""
+    for start in range(0, len(entities), BATCH_CHUNK):
+        chunk = entities[start:start + BATCH_CHUNK]
+        timetable.prepare([i for kind, _, ids in chunk if kind == 'faculty' and ids for i in ids],
+                          [i for kind, _, i in chunk if kind == 'class' and i is not None])
+        for kind, query, ids in chunk:
+            if ids is None:
+                item = {'type': kind, 'query': query, 'error': f"No timetable found for '{query}'"}
+                if kind == 'faculty' and timetable.search_index is not None:
+                    item['suggestions'] = timetable.search_index.suggest(query, limit=5)
+            elif kind == 'faculty':
+                schedule = timetable.schedule(ids)
+                item = schedule_json(timetable, schedule, type=kind, query=query, faculty=list(schedule.names))
+            else:
+                schedule = timetable.class_schedules[ids]
+                item = schedule_json(timetable, schedule, type=kind, query=query, **{'class': schedule.names[0]})
+            yield item
+
+@app.route("/api/timetables", methods=["GET", "POST"])
+def api_timetables():
+    """
+    Many timetables in one streamed response:
+    ?faculty=Saleem&faculty=Reddy&class=CSE-A,CSE-B (or POST {"faculty": [...], "class": [...]}),
+    '*' for every faculty/class. ?format=ndjson (or Accept: application/x-ndjson) sends one
+    JSON object per line instead of one document.
+    """
+    timetable = timetable_store.get()
+    if timetable is None:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    faculty = batch_names("faculty")
+    classes = batch_names("class", "classes")
+    if not faculty and not classes:
+        return jsonify({"error": "Give at least one ?faculty= or ?class= name ('*' for all)"}), 400
+    
+    body = request.get_json(silent=True) if request.is_json else None
+    fmt = request.args.get("format") or (body.get("format") if isinstance(body, dict) else None)
+    if fmt is None and request.accept_mimetypes.best == "application/x-ndjson":
+        fmt = "ndjson"
+    if fmt not in (None, "json", "ndjson"):
+        return jsonify({"error": "format must be json or ndjson"}), 400
+    
+    entities = batch_entities(timetable, faculty, classes)
+    etag = timetable_etag(timetable, "timetables", fmt == "ndjson",
+                          tuple((kind, query, ids) for kind, query, ids in entities))
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    elif fmt == "ndjson":
+        response = app.response_class((json.dumps(item) + "\n" for item in batch_items(timetable, entities)),
+                                      mimetype="application/x-ndjson")
+    else:
+        def document():
+            yield '{"version": %s, "count": %d, "timetables": [' % (json.dumps(timetable.version), len(entities))
+            for i, item in enumerate(batch_items(timetable, entities)):
+                yield ("," if i else "") + json.dumps(item)
+            yield ']}'
+        response = app.response_class(document(), mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+def slot_args():
+    """(day, period) from ?day=&period=, or an error message"""
+    day = parse_day(request.args.get("day"))
+    period = parse_period(request.args.get("period"))
+    if day is None or period is None:
+        return None, None, "Give a day (e.g. Tuesday or TUE) and a period number"
+    return day, period, None
+
+@app.route("/api/free_faculty")
+def api_free_faculty():
+    """Faculty with no class in a slot: ?day=Tuesday&period=3"""
+    timetable = timetable_store.get()
+    if timetable is None or not timetable.has_faculty:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    day, period, error = slot_args()
+    if error:
+        return jsonify({"error": error}), 400
+    
+    occupancy = timetable.occupancy
+    return conditional_json(timetable_etag(timetable, "free_faculty", day, period),
+                            lambda: {'version': timetable.version, 'day': day, 'period': period,
+                                     'time': PERIOD_TIMES.get(period, 'N/A'),
+                                     'free': occupancy.free_faculty(day, period),
+                                     'busy': occupancy.busy_faculty(day, period)})
+
+@app.route("/api/common_free")
+def api_common_free():
+    """Slots where every given faculty is free: ?faculty=Saleem&faculty=Sindhura"""
+    timetable = timetable_store.get()
+    if timetable is None or not timetable.has_faculty:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    queries = [name for name in request.args.getlist("faculty") if name.strip()]
+    if not queries:
+        return jsonify({"error": "Give at least one ?faculty= name"}), 400
+    
+    name_ids = []
+    for query in queries:
+        ids = find_faculty(timetable, query)
+        if not ids:
+            return jsonify({"error": f"No timetable found for '{query}'"}), 404
+        name_ids.extend(ids)
+    
+    occupancy = timetable.occupancy
+    return conditional_json(timetable_etag(timetable, "common_free", tuple(sorted(set(name_ids)))),
+                            lambda: {'version': timetable.version,
+                                     'faculty': [occupancy.names[name_id] for name_id in sorted(set(name_ids))],
+                                     'slots': [{'day': day, 'period': period, 'time': PERIOD_TIMES.get(period, 'N/A')}
+                                               for day, period in occupancy.common_free_slots(name_ids)]})
+
+@app.route("/api/substitutes")
+def api_substitutes():
+    """Ranked cover for a faculty's class: ?faculty=Saleem&day=Tuesday&period=3"""
+    timetable = timetable_store.get()
+    if timetable is None or not timetable.has_faculty:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    day, period, error = slot_args()
+    if error:
+        return jsonify({"error": error}), 400
+    name = request.args.get("faculty", "")
+    name_ids = find_faculty(timetable, name)
+    if not name_ids:
+        return jsonify({"error": f"No timetable found for '{name}'"}), 404
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 100)
+    
+    def build():
+        covering, ranked = timetable.occupancy.substitutes(name_ids, day, period, limit=limit)
+        return {'version': timetable.version, 'day': day, 'period': period,
+                'faculty': [timetable.occupancy.names[name_id] for name_id in name_ids],
+                'covering': [{str(key): json_value(value) for key, value in row.items()} for row in covering],
+                'substitutes': ranked}
+    
+    return conditional_json(timetable_etag(timetable, "substitutes", name_ids, day, period, limit), build)
+
+# ============= NOW / NEXT (corridor displays) =============
+def now_filters(timetable, faculty, classes, rooms):
+    """
+    (filters, schedules) for /api/now: lower-cased name sets to narrow the
+    slots to (None = everyone) and the WeeklySchedules of the faculty and
+    classes asked about - or (None, error message)
+    """
+    names = None
+    schedules = []
+    if faculty:
+        names = set()
+        for query in faculty:
+            name_ids = find_faculty(timetable, query)
+            if not name_ids:
+                return None, f"No timetable found for '{query}'"
+            names.update(timetable.faculty_names[name_id].lower() for name_id in name_ids)
+            schedules.extend(timetable.schedules[name_id] for name_id in name_ids)
+    for query in classes:
+        schedule = timetable.class_schedule(query)
+        if schedule is None:
+            return None, f"No timetable found for class '{query}'"
+        schedules.append(schedule)
+    return ({'faculty': names,
+             'classes': {name.lower() for name in classes} or None,
+             'rooms': {name.lower() for name in rooms} or None}, schedules), None
+
+def slot_summary(day, period, occupied):
+    return {'day': day, 'period': period, 'time': PERIOD_TIMES.get(period, 'N/A'), **occupied}
+
+def now_payload(timetable, when, filters, schedules=()):
+    """What /api/now answers for one moment: the slot now, the next one, and when that changes"""
+    (day, period), upcoming, changes_at = locate(when)
+    slots = timetable.slots
+    payload = {
+        'version': timetable.version,
+        'day': day,
+        'period': period,
+        'time': PERIOD_TIMES.get(period) if period is not None else None,
+        'now': slot_summary(day, period, filter_slot(slots.slot(day, period), **filters)) if period is not None else None,
+        'next': None,
+        'changes_at': changes_at.isoformat(timespec='minutes') if changes_at else None,
+    }
+    if upcoming is not None:
+        next_day, next_period, starts_at = upcoming
+        payload['next'] = slot_summary(next_day, next_period, filter_slot(slots.slot(next_day, next_period), **filters))
+        payload['next']['starts_at'] = starts_at.isoformat(timespec='minutes')
+        
+        # Asked about particular faculty/classes: their next class, however far off
+        payload['next_classes'] = []
+        for schedule in schedules:
+            row = next_class(schedule, next_day, next_period)
+            payload['next_classes'].append({
+                'name': schedule.names[0],
+                'next': None if row is None else {
+                    'day': json_value(row.get('Day')), 'period': json_value(row.get('Period')),
+                    'time': row.get('Time'), 'class': json_value(row.get('Class')),
+                    'subject': json_value(row.get('Subject')), 'room': json_value(row.get('Room')),
+                    'faculty': json_value(row.get('Faculty'))},
+            })
+    return payload
+
+def now_request():
+    """(faculty, classes, rooms, when) of an /api/now request, or an error message"""
+    when = local_now()
+    at = request.args.get("at")
+    if at:
+        try:
+            from datetime import datetime
+            when = local_time(datetime.fromisoformat(at))
+        except ValueError:
+            return None, "at must be an ISO date-time, e.g. 2024-07-15T10:30"
+    return (batch_names("faculty"), batch_names("class", "classes"), batch_names("room", "rooms"), when), None
+
+@app.route("/api/now")
+def api_now():
+    """Who is where right now, and what's next: ?faculty=&class=&room= narrow it, ?at= previews another time"""
+    timetable = timetable_store.get()
+    if timetable is None:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    args, error = now_request()
+    if error:
+        return jsonify({"error": error}), 400
+    faculty, classes, rooms, when = args
+    narrowed, error = now_filters(timetable, faculty, classes, rooms)
+    if error:
+        return jsonify({"error": error}), 404
+    
+    (day, period), upcoming, _ = locate(when)
+    return conditional_json(timetable_etag(timetable, "now", day, period, upcoming, faculty, classes, rooms),
+                            lambda: now_payload(timetable, when, *narrowed))
+
+@app.route("/api/now/stream")
+def api_now_stream():
+    """/api/now as Server-Sent Events: pushed at every period boundary and when a new version goes live"""
+    args, error = now_request()
+    if error:
+        return jsonify({"error": error}), 400
+    faculty, classes, rooms, _ = args
+    if not live_feed.open():
+        response = jsonify({"error": "Too many live displays on this server, retrying shortly"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "30"
+        return response
+    
+    def events():
+        yield "retry: 5000\n\n"
+        generation = None
+        while True:
+            current = live_feed.wait(generation)
+            if current == generation:
+                yield ": keep-alive\n\n"
+                continue
+            generation = current
+            timetable = timetable_store.get()
+            if timetable is None:
+                payload = {"error": "No timetable uploaded yet"}
+            else:
+                narrowed, error = now_filters(timetable, faculty, classes, rooms)
+                payload = {"error": error} if error else now_payload(timetable, local_now(), *narrowed)
+            yield f"event: now\nid: {current}\ndata: {json.dumps(payload)}\n\n"
+    
+    response = app.response_class(events(), mimetype="text/event-stream")
+    response.call_on_close(live_feed.close)  # runs on disconnect, even if never iterated
+    response.cache_control.no_cache = True
+    response.headers["X-Accel-Buffering"] = "no"  # nginx would hold events back otherwise
+    return response
+
+# ============= DOWNLOADS (xlsx / PDF / iCalendar) =============
+def send_export(path, fmt, filename):
+    """Cached export file as a download (conditional, so repeats can 304)"""
+    return send_file(path, mimetype=FORMATS[fmt], as_attachment=True,
+                     download_name=f"{safe_filename(filename)}.{fmt}", max_age=0)
+
+@app.route("/export/faculty/<name>.<any(xlsx, pdf, ics):fmt>")
+def export_faculty(name, fmt):
+    """What /search shows for a faculty, as a file"""
+    timetable = timetable_store.get()
+    if timetable is None or not timetable.has_faculty:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    name_ids = tuple(timetable.search_index.match(name.strip()))
+    if not name_ids:
+        return jsonify({"error": f"No timetable found for '{name}'"}), 404
+    
+    schedule = timetable.schedule(name_ids)
+    title = " / ".join(schedule.names)
+    path = export_cache.get(timetable.version, 'faculty', title, fmt, schedule.records,
+                            content=timetable.content_key('faculty', schedule.names))
+    return send_export(path, fmt, title)
+
+@app.route("/export/class/<name>.<any(xlsx, pdf, ics):fmt>")
+def export_class(name, fmt):
+    timetable = timetable_store.get()
+    schedule = timetable.class_schedule(name) if timetable is not None else None
+    if schedule is None:
+        return jsonify({"error": f"No timetable found for class '{name}'"}), 404
+    
+    title = schedule.names[0]
+    path = export_cache.get(timetable.version, 'class', title, fmt, schedule.records,
+                            content=timetable.content_key('class', schedule.names))
+    return send_export(path, fmt, title)
+
+@app.route("/export/department.<any(xlsx, pdf, ics, zip):fmt>")
+def export_department(fmt):
+    """Whole timetable; department.zip?format=pdf has one file per faculty and class"""
+    timetable = timetable_store.get()
+    if timetable is None or not timetable.has_faculty:
+        return jsonify({"error": "No timetable uploaded yet"}), 404
+    
+    if fmt == 'zip':
+        inner = request.args.get("format", "pdf")
+        if inner not in ('xlsx', 'pdf', 'ics'):
+            return jsonify({"error": "format must be xlsx, pdf or ics"}), 400
+        path = export_cache.department_zip(timetable, inner)
+        return send_export(path, 'zip', f"timetable-{timetable.version}-{inner}")
+    
+    path = export_cache.get(timetable.version, 'department', "", fmt, timetable.department.records)
+    return send_export(path, fmt, f"timetable-{timetable.version}")
 
 # ============= RAILWAY COMPATIBILITY =============
 @app.route('/health')
 def health():
-    """Health check endpoint for Railway"""
-    return jsonify({"status": "healthy"}), 200
+    """Health check endpoint for Railway (unhealthy if storage can't be read)"""
+    try:
+        timetable = timetable_store.get()
+    except Exception as e:
+        return jsonify({"status": "unhealthy", "error": str(e)}), 503
+    return jsonify({"status": "healthy",
+                    "version": timetable.version if timetable is not None else None,
+                    "rows": len(timetable) if timetable is not None else 0}), 200
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint (this worker's numbers)"""
+    response = make_response(render_metrics())
+    response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    return response
 
 if __name__ == "__main__":
     print(f"🚀 Starting Faculty Scheduler on port {port}")
@@ -0,0 +1,255 @@
+"""
+Benchmark suite: upload conversion, cold load, /search and /api/faculty_list
+on synthetic timetables from one section up to a whole university, plus
+the startup cost of a serving worker.
+
+    python benchmark_suite.py                          # section, department, college
+    python benchmark_suite.py --scales all -o bench.json
+    python benchmark_suite.py --compare bench.json     # this tree vs a saved run
+    python benchmark_suite.py --check                  # exit 1 if a worker target is missed
+
+Every benchmark runs `--rounds` times after a warm-up and reports the best
+and median round; inputs come from synthetic_timetables.py with a fixed
+seed, so two runs on the same machine measure the same work. The JSON
+output records the commit, Python version and CPU count next to the
+numbers, and --compare prints the change per benchmark.
+
+Endpoints are driven through the Flask test client (no network), in a
+scratch folder so the real uploads/ is never touched.
+
+worker_startup runs a fresh Python process per round that imports the app
+and answers /, /search, /api/faculty_list and /health from the largest
+timetable benchmarked, then reports its import time and peak RSS against
+WORKER_IMPORT_TARGET_SECONDS / WORKER_RSS_TARGET_MB and which of pandas,
+numpy and openpyxl it loaded (none, if the read path stays stdlib-only).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCALES = ['section', 'department', 'college']
+
+# Requests per round for the endpoint benchmarks
+REQUESTS_PER_ROUND = 300
+
+# Budget of one gunicorn worker on a small instance: importing app.py, and
+# peak memory after serving the read endpoints
+WORKER_IMPORT_TARGET_SECONDS = 0.5
+WORKER_RSS_TARGET_MB = 50
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl')
+
+_WORKER_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+client = app.app.test_client()
+for path in ('/', '/api/faculty_list', '/health'):
+    assert client.get(path).status_code == 200, path
+assert client.post('/search', data={'faculty': sys.argv[1]}).status_code == 200
+try:
+    # VmHWM starts over at exec; ru_maxrss can include the forking parent
+    with open('/proc/self/status') as f:
+        peak = next(int(line.split()[1]) for line in f if line.startswith('VmHWM'))
+except OSError:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == 'darwin' else 1)
+print(json.dumps({'import_seconds': imported,
+                  'rss_mb': peak / 1024,
+                  'heavy_modules': [name for name in sys.argv[2:] if name in sys.modules]}))
+"""
+
+
+def measure(func, rounds, per_round=1):
+    """Best / median seconds per operation over `rounds` (after one warm-up)"""
+    func()
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) / per_round)
+    return {'best': min(times), 'median': statistics.median(times), 'rounds': rounds,
+            'ops_per_second': 1 / min(times) if min(times) else None}
+
+
+def worker_startup(query, rounds):
+    """Import time / peak RSS of fresh worker processes serving the read endpoints"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])))
+    runs = []
+    for _ in range(rounds):
+        out = subprocess.run([sys.executable, "-c", _WORKER_PROBE, query, *HEAVY_MODULES], env=env,
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+
+    times = [run['import_seconds'] for run in runs]
+    rss = max(run['rss_mb'] for run in runs)
+    heavy = sorted({name for run in runs for name in run['heavy_modules']})
+    result = {'best': min(times), 'median': statistics.median(times), 'rounds': rounds,
+              'ops_per_second': None, 'rss_mb': round(rss, 1), 'heavy_modules': heavy,
+              'import_target_seconds': WORKER_IMPORT_TARGET_SECONDS, 'rss_target_mb': WORKER_RSS_TARGET_MB}
+    result['meets_targets'] = (result['median'] <= WORKER_IMPORT_TARGET_SECONDS
+                               and rss <= WORKER_RSS_TARGET_MB and not heavy)
+    return result
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                             capture_output=True, text=True, timeout=10)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True, timeout=10).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "") or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(scales, formats, rounds, seed):
+    from bulk_import import import_timetables
+    from storage import FileStorage, SQLiteStorage
+    from subject_registry import read_registry
+    from synthetic_timetables import SCALES, SyntheticTimetable
+    from timetable_store import TimetableStore
+
+    # The app picks its upload folder from the working directory at import
+    import app as webapp
+    client = webapp.app.test_client()
+
+    results = {}
+
+    def record(name, result, extra=None):
+        result.update(extra or {})
+        results[name] = result
+        print(f"  • {name:<36} best {result['best'] * 1000:10.3f} ms   median {result['median'] * 1000:10.3f} ms")
+
+    for scale in scales:
+        synthetic = SyntheticTimetable(SCALES[scale], seed)
+        print(f"\n🏫 {scale}: {len(synthetic.sections)} sections")
+        data_dir = os.path.join("data", scale)
+
+        df = None
+        for fmt in formats:
+            fmt_dir = os.path.join(data_dir, fmt)
+            os.makedirs(fmt_dir, exist_ok=True)
+            path = synthetic.write(os.path.join(fmt_dir, f"{scale}.xlsx"), fmt)
+            registry = read_registry(os.path.join(fmt_dir, "subjects.csv"))
+            imported = []
+            record(f"upload_convert[{scale}-{fmt}]",
+                   measure(lambda: imported.append(import_timetables(path, registry=registry)), rounds),
+                   {'rows': len(imported[-1].df), 'bytes': os.path.getsize(path)})
+            df = imported[-1].df
+        if df is None:
+            df = synthetic.app_frame()
+
+        # Cold load: a fresh worker reading the published version
+        sqlite = SQLiteStorage(os.path.join(data_dir, "timetable.db"))
+        sqlite.publish(df, None, {'filename': scale})
+        record(f"cold_load_sqlite[{scale}]", measure(lambda: TimetableStore(sqlite).get(), rounds),
+               {'rows': len(df)})
+        files = FileStorage(os.path.join(data_dir, "files"))
+        os.makedirs(files.folder, exist_ok=True)
+        files.publish(df, None, {'filename': scale})
+        record(f"cold_load_files[{scale}]", measure(lambda: TimetableStore(files).get(), rounds),
+               {'rows': len(df)})
+
+        # Endpoints, against the app's own storage
+        webapp.storage.publish(df, None, {'filename': scale})
+        timetable = webapp.timetable_store.get()
+        names = timetable.faculty_names
+        queries = [names[i * len(names) // 50].split()[-2] for i in range(min(50, len(names)))]
+
+        def search_round():
+            for i in range(REQUESTS_PER_ROUND):
+                response = client.post('/search', data={'faculty': queries[i % len(queries)]})
+                assert response.status_code == 200
+
+        def faculty_list_round():
+            for _ in range(REQUESTS_PER_ROUND):
+                assert client.get('/api/faculty_list').status_code == 200
+
+        record(f"search[{scale}]", measure(search_round, rounds, REQUESTS_PER_ROUND))
+        record(f"faculty_list[{scale}]", measure(faculty_list_round, rounds, REQUESTS_PER_ROUND))
+
+    if scales:
+        # A new worker serving the last (largest) scale's live version
+        startup = worker_startup(queries[0], rounds)
+        record("worker_startup", startup)
+        print(f"  {'🎯' if startup['meets_targets'] else '❌'} worker import {startup['median']:.3f} s "
+              f"(target {WORKER_IMPORT_TARGET_SECONDS} s), peak RSS {startup['rss_mb']} MB "
+              f"(target {WORKER_RSS_TARGET_MB} MB), heavy modules: {', '.join(startup['heavy_modules']) or 'none'}")
+
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\n📊 Compared with {baseline_path} (commit {baseline.get('commit')}):")
+    for name, result in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not old:
+            print(f"  • {name:<36} (new)")
+            continue
+        change = (result['best'] - old['best']) / old['best'] * 100
+        marker = "🟢" if change < -5 else ("🔴" if change > 5 else "⚪")
+        print(f"  {marker} {name:<36} {old['best'] * 1000:10.3f} -> {result['best'] * 1000:10.3f} ms  ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    from synthetic_timetables import FORMATS, SCALES
+
+    parser = argparse.ArgumentParser(description="Timetable benchmark suite")
+    parser.add_argument("--scales", default=",".join(DEFAULT_SCALES),
+                        help=f"comma-separated, from {', '.join(SCALES)} (or 'all')")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="save results as JSON")
+    parser.add_argument("--compare", help="JSON from an earlier run")
+    parser.add_argument("--check", action="store_true", help="exit 1 if worker_startup misses its targets")
+    args = parser.parse_args()
+
+    scales = list(SCALES) if args.scales == 'all' else args.scales.split(",")
+    formats = args.formats.split(",")
+    for scale in scales:
+        if scale not in SCALES:
+            parser.error(f"unknown scale {scale}")
+    for fmt in formats:
+        if fmt not in FORMATS:
+            parser.error(f"unknown format {fmt}")
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    sys.path.insert(0, REPO_DIR)
+    workdir = tempfile.mkdtemp(prefix="timetable_bench_")
+    os.chdir(workdir)
+    try:
+        results = run(scales, formats, args.rounds, args.seed)
+    finally:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'seed': args.seed,
+        'rounds': args.rounds,
+        'results': results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Saved {output}")
+    if baseline:
+        compare(results, baseline)
+    if args.check and not results.get('worker_startup', {}).get('meets_targets', False):
+        sys.exit(1)
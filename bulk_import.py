@@ -0,0 +1,255 @@
+"""
+Bulk import of a whole college's timetables.
+
+Accepts one workbook (any number of sheets, one section per sheet or several
+sections stacked in one sheet) or a .zip of workbooks. Every sheet is parsed
+and converted independently - in a process pool when there are enough
+sheets to make it worthwhile - and the results are merged into one
+Faculty/Day/Period/Class/Subject table with a per-sheet report.
+
+Section detection, per sheet:
+  1. "Class: CSE-A" / "Section - CSE-A" label rows inside the sheet (each
+     label applies to the day rows below it, so stacked sections work),
+  2. a label in the header row,
+  3. the sheet name, unless it's a generic one like "Sheet1"/"Timetable",
+  4. the default class (CSE-CYBER-II-B).
+
+Each workbook is opened once and its sheets are streamed row by row (see
+excel_stream.py); with a pool, every worker opens the workbook once and
+streams its share of the sheets.
+
+A zip is refused before anything is extracted if it has more than
+MAX_ZIP_MEMBERS files or unpacks to more than MAX_ZIP_BYTES.
+"""
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from excel_stream import SheetStream, open_workbook
+from subject_registry import get_registry
+from timetable_converter import DEFAULT_CLASS
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+# Below this many sheets the pool start-up costs more than it saves
+PARALLEL_MIN_SHEETS = 4
+
+# Largest zip upload we unpack (file count, total uncompressed size)
+MAX_ZIP_MEMBERS = 500
+MAX_ZIP_BYTES = 256 * 1024 * 1024
+
+_SECTION_LABEL = re.compile(r"^\s*(?:class|section)\s*[:\-]\s*(\S.*?)\s*$", re.IGNORECASE)
+_GENERIC_SHEET = re.compile(r"^(?:sheet\s*\d*|timetable|time table|tt|faculty.*)$", re.IGNORECASE)
+
+
+class ImportResult:
+    """Merged table plus per-sheet report of one bulk import"""
+
+    def __init__(self, df, sheets, seconds):
+        self.df = df
+        self.sheets = sheets
+        self.seconds = seconds
+
+    @property
+    def errors(self):
+        return [sheet for sheet in self.sheets if sheet['error']]
+
+    @property
+    def imported(self):
+        return [sheet for sheet in self.sheets if sheet['rows']]
+
+
+def section_from_text(value):
+    """'Section: CSE-A' -> 'CSE-A' (None if the cell isn't a section label)"""
+    if isinstance(value, str):
+        match = _SECTION_LABEL.match(value)
+        if match:
+            return match.group(1)
+    return None
+
+
+def default_section(sheet_name):
+    """Sheet name as the section, unless it's a generic name like 'Sheet1'"""
+    if sheet_name and not _GENERIC_SHEET.match(str(sheet_name).strip()):
+        return str(sheet_name).strip()
+    return DEFAULT_CLASS
+
+
+def _new_report(workbook, sheet_name):
+    return {'workbook': workbook, 'sheet': sheet_name, 'section': None,
+            'format': None, 'rows': 0, 'source_rows': 0, 'dropped_slots': 0, 'seconds': 0.0,
+            'error': None}
+
+
+def _import_sheet(workbook, label, sheet_name, multi_sheet, registry):
+    """Stream one sheet of an open workbook -> (report, columns, rows)"""
+    report = _new_report(label, sheet_name)
+    start = time.perf_counter()
+    columns, rows = None, []
+    try:
+        stream = SheetStream(workbook.rows(sheet_name), sheet_name, multi_sheet,
+                             section_from_text, default_section(sheet_name), registry)
+        rows = list(stream.rows())
+        columns = tuple(stream.output_columns)
+        report['format'] = stream.format or 'skipped'
+        report['section'] = stream.section if stream.format else None
+        report['rows'] = len(rows)
+        report['source_rows'] = stream.source_rows
+        report['dropped_slots'] = stream.dropped_slots
+    except Exception as e:
+        report['error'] = f"{type(e).__name__}: {e}"
+        rows = []
+    report['seconds'] = round(time.perf_counter() - start, 4)
+    return report, columns, rows
+
+
+def _import_workbook(task):
+    """Pool worker: open the workbook once and stream the given sheets"""
+    path, label, sheet_names, multi_sheet, registry = task
+    try:
+        workbook = open_workbook(path)
+    except Exception as e:
+        report = _new_report(label, None)
+        report['error'] = f"{type(e).__name__}: {e}"
+        return [(report, None, [])]
+    try:
+        return [_import_sheet(workbook, label, name, multi_sheet, registry) for name in sheet_names]
+    finally:
+        workbook.close()
+
+
+def is_zip_archive(path):
+    """A .zip of workbooks (an .xlsx is itself a zip, so look inside)"""
+    if not zipfile.is_zipfile(path):
+        return False
+    with zipfile.ZipFile(path) as archive:
+        return "[Content_Types].xml" not in archive.namelist()
+
+
+def _check_zip_limits(archive):
+    """ValueError if the archive has too many files or unpacks too big (zip bombs)"""
+    members = archive.infolist()
+    if len(members) > MAX_ZIP_MEMBERS:
+        raise ValueError(f"Zip has {len(members)} files (at most {MAX_ZIP_MEMBERS})")
+    total = sum(info.file_size for info in members)
+    if total > MAX_ZIP_BYTES:
+        raise ValueError(f"Zip unpacks to {total // (1024 * 1024)}MB "
+                         f"(at most {MAX_ZIP_BYTES // (1024 * 1024)}MB)")
+
+
+def _merge(tables):
+    """One DataFrame from the sheets' row lists (built once, at the end)"""
+    frames = []
+    group_columns, group_rows = None, []
+    for columns, rows in tables:
+        if columns != group_columns and group_rows:
+            frames.append(pd.DataFrame(group_rows, columns=list(group_columns)))
+            group_rows = []
+        group_columns = columns
+        group_rows.extend(rows)
+    if group_rows:
+        frames.append(pd.DataFrame(group_rows, columns=list(group_columns)))
+
+    if not frames:
+        return None
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def import_timetables(path, max_workers=None, progress=None, registry=None):
+    """
+    Import a workbook or a .zip of workbooks into one normalized table.
+    progress(done_sheets, total_sheets) is called as sheets finish.
+    Cells are matched against `registry` (the default subject registry if None).
+    """
+    start = time.perf_counter()
+    if registry is None:
+        registry = get_registry()
+    tmp_dir = None
+    results = []
+    workbooks = []  # (path, label)
+
+    try:
+        if is_zip_archive(path):
+            tmp_dir = tempfile.mkdtemp(prefix="timetable_zip_")
+            with zipfile.ZipFile(path) as archive:
+                _check_zip_limits(archive)
+                for member in archive.namelist():
+                    base = os.path.basename(member)
+                    if member.startswith("__MACOSX") or not base.lower().endswith(EXCEL_EXTENSIONS):
+                        continue
+                    target = os.path.join(tmp_dir, f"{len(workbooks)}_{base}")
+                    with archive.open(member) as src, open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    workbooks.append((target, member))
+        else:
+            workbooks.append((path, os.path.basename(path)))
+
+        # Open every workbook once to list its sheets
+        tasks = []
+        opened = []
+        for wb_path, label in workbooks:
+            try:
+                workbook = open_workbook(wb_path)
+            except Exception as e:
+                report = _new_report(label, None)
+                report['error'] = f"{type(e).__name__}: {e}"
+                results.append((report, None, []))
+                continue
+            opened.append((workbook, wb_path, label))
+
+        total_sheets = sum(len(workbook.sheet_names) for workbook, _, _ in opened)
+
+        if total_sheets < PARALLEL_MIN_SHEETS:
+            # Small upload: stream with the handles we already have
+            for workbook, wb_path, label in opened:
+                try:
+                    multi_sheet = len(workbook.sheet_names) >= 2
+                    for name in workbook.sheet_names:
+                        results.append(_import_sheet(workbook, label, name, multi_sheet, registry))
+                        if progress:
+                            progress(len(results), total_sheets)
+                finally:
+                    workbook.close()
+        else:
+            workers = min(max_workers or os.cpu_count() or 1, total_sheets)
+            for workbook, wb_path, label in opened:
+                names = workbook.sheet_names
+                workbook.close()
+                multi_sheet = len(names) >= 2
+                # Contiguous chunks, so every worker opens a workbook once
+                chunk = max(1, -(-len(names) // workers))
+                for i in range(0, len(names), chunk):
+                    tasks.append((wb_path, label, names[i:i + chunk], multi_sheet, registry))
+            # spawn, not fork: uploads run on a background thread of a
+            # multi-threaded worker, and a forked child would inherit locks
+            # held by the other threads
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as pool:
+                for sheet_results in pool.map(_import_workbook, tasks):
+                    results.extend(sheet_results)
+                    if progress:
+                        progress(len(results), total_sheets)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    sheets = [report for report, _, _ in results]
+    merged = _merge((columns, rows) for _, columns, rows in results if rows)
+    seconds = round(time.perf_counter() - start, 4)
+
+    print(f"📦 Imported {sum(1 for s in sheets if s['rows'])}/{len(sheets)} sheets, "
+          f"{0 if merged is None else len(merged)} rows in {seconds}s")
+    for sheet in sheets:
+        if sheet['error']:
+            print(f"  ❌ {sheet['workbook']} / {sheet['sheet']}: {sheet['error']}")
+
+    return ImportResult(merged, sheets, seconds)
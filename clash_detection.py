@@ -0,0 +1,143 @@
+"""
+Clash detection over the normalized timetable.
+
+One pass over the rows fills three hash indexes keyed on
+(faculty, day, period), (class, day, period) and (room, day, period); any
+key holding rows that disagree is a conflict:
+
+  - faculty double-booking: one faculty in two different classes at once
+  - class collision: one class with two different subjects at once
+    (e.g. "RTRP/CN" split into two faculty in the same period) - lab
+    batches of one class in parallel ("(Batch-1)" / "(Batch-2)") are fine
+  - room clash: two classes in one room at once (only if there's a Room column)
+
+Rows that are exact repeats of each other (same class, subject, room) are
+not clashes. Everything is O(n) in the number of rows, so college-wide
+uploads with tens of thousands of rows are checked in milliseconds.
+"""
+from collections import defaultdict
+
+from faculty_grid import DAYS
+from slot_expressions import batch_of
+
+CLASH_TYPES = {
+    'faculty': 'Faculty double-booking',
+    'class': 'Class collision',
+    'room': 'Room clash',
+}
+
+# What has to differ inside one slot for it to count as a clash
+_CONFLICTING_FIELD = {'faculty': 'Class', 'class': 'Subject', 'room': 'Class'}
+
+# Conflicts kept in upload metadata (the dashboard recomputes the full list)
+META_CLASH_LIMIT = 200
+
+
+def _clean(value):
+    """Stripped text / int period, or None for blank and NaN cells"""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if value != value:
+            return None
+        if value.is_integer():
+            return int(value)
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _batches_collide(subjects):
+    """Different subjects in one slot, unless they're different batches"""
+    by_batch = {}
+    for subject in subjects:
+        by_batch.setdefault(batch_of(subject), set()).add(subject)
+    whole_class = by_batch.pop(None, set())
+    if len(whole_class) > 1 or (whole_class and by_batch):
+        return True
+    return any(len(batch) > 1 for batch in by_batch.values())
+
+
+def _column(df, name):
+    if name in df.columns:
+        return [_clean(value) for value in df[name].tolist()]
+    return [None] * len(df)
+
+
+class ClashReport:
+    """All conflicts of one timetable, plus per-type counts"""
+
+    def __init__(self, clashes, rows_checked, has_rooms):
+        self.clashes = clashes
+        self.rows_checked = rows_checked
+        self.has_rooms = has_rooms
+        self.counts = {kind: 0 for kind in CLASH_TYPES}
+        for clash in clashes:
+            self.counts[clash['type']] += 1
+
+    @property
+    def total(self):
+        return len(self.clashes)
+
+    def of_type(self, kind):
+        return [clash for clash in self.clashes if clash['type'] == kind]
+
+    def summary(self, limit=META_CLASH_LIMIT):
+        """JSON-friendly dict for meta.json / the upload job"""
+        return {
+            'total': self.total,
+            'counts': self.counts,
+            'rows_checked': self.rows_checked,
+            'clashes': self.clashes[:limit],
+        }
+
+
+def detect_clashes(df):
+    """Build the three slot indexes in one pass and return a ClashReport"""
+    faculty = _column(df, 'Faculty')
+    days = _column(df, 'Day')
+    periods = _column(df, 'Period')
+    classes = _column(df, 'Class')
+    subjects = _column(df, 'Subject')
+    has_rooms = 'Room' in df.columns
+    rooms = _column(df, 'Room')
+
+    indexes = {kind: defaultdict(list) for kind in CLASH_TYPES}
+    for pos, (who, day, period, section, room) in enumerate(zip(faculty, days, periods, classes, rooms)):
+        if day is None or period is None:
+            continue
+        if who is not None:
+            indexes['faculty'][(who, day, period)].append(pos)
+        if section is not None:
+            indexes['class'][(section, day, period)].append(pos)
+        if room is not None:
+            indexes['room'][(room, day, period)].append(pos)
+
+    fields = {'Faculty': faculty, 'Class': classes, 'Subject': subjects, 'Room': rooms}
+    clashes = []
+    for kind, index in indexes.items():
+        field = fields[_CONFLICTING_FIELD[kind]]
+        for (who, day, period), positions in index.items():
+            if len(positions) < 2:
+                continue
+            values = {field[pos] for pos in positions}
+            if len(values) < 2 or (kind == 'class' and not _batches_collide(values)):
+                continue
+            clashes.append({
+                'type': kind,
+                'label': CLASH_TYPES[kind],
+                'who': str(who),
+                'day': str(day),
+                'period': period,
+                'entries': [{'row': pos + 2,  # Excel row number (header is row 1)
+                             'Faculty': faculty[pos], 'Class': classes[pos],
+                             'Subject': subjects[pos], 'Room': rooms[pos]}
+                            for pos in positions],
+            })
+
+    order = {day: i for i, day in enumerate(DAYS)}
+    kinds = list(CLASH_TYPES)
+    clashes.sort(key=lambda clash: (kinds.index(clash['type']), order.get(clash['day'], len(DAYS)),
+                                    str(clash['period']), clash['who']))
+    return ClashReport(clashes, len(df), has_rooms)
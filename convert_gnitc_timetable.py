@@ -1,6 +1,9 @@
 import pandas as pd
 import json
 
+from slot_expressions import expand_cell
+from subject_registry import load_registry
+
 # Your timetable data from the image
 # Monday to Saturday, Periods 1-4
 timetable_matrix = {
@@ -12,98 +15,51 @@ timetable_matrix = {
     'Saturday': ['OS', 'CN', 'COI', 'DM']
 }
 
-# Faculty mapping from your table
-faculty_mapping = {
-    'DM': 'Mrs. Y.Sindhura',
-    'BEFA': 'Mr. N. Srikanth',
-    'OS': 'Mr. MD. Saleem',
-    'CN': 'Mr. K. Mathivanan',
-    'SE': 'Mr. V. Saravanakumar',
-    'COI': 'Mr. P.Prasanna',
-    'RTRP': 'Mr. G. Vijay Kumar',
-    'FSD': 'Mr. V. Saravanakumar'
-}
-
-# Full subject names
-subject_names = {
-    'DM': 'Discrete Mathematics',
-    'BEFA': 'Business Economics & Financial Analysis',
-    'OS': 'Operating Systems',
-    'CN': 'Computer Networks',
-    'SE': 'Software Engineering',
-    'COI': 'Constitution of India',
-    'RTRP': 'Real-Time Research Project',
-    'FSD': 'Full Stack Development'
-}
-
 # Class info
 class_name = "CSE-CYBER-II-B"
 room_no = "RD026"
 
-# Convert matrix to rows
-rows = []
 
-for day, subjects in timetable_matrix.items():
-    for period_idx, subject_code in enumerate(subjects, start=1):
-        # Handle combined subjects (like "RTRP/CN")
-        if '/' in subject_code:
-            # Split combined subjects
-            sub_codes = [s.strip() for s in subject_code.split('/')]
-            for sub_code in sub_codes:
-                if sub_code in faculty_mapping:
-                    rows.append({
-                        'Faculty': faculty_mapping[sub_code],
-                        'Day': day,
-                        'Period': period_idx,
-                        'Class': class_name,
-                        'Subject': subject_names.get(sub_code, sub_code),
-                        'Room': room_no
-                    })
-        # Handle lab sessions
-        elif 'Lab' in subject_code or 'Batch' in subject_code:
-            # Extract subject code (e.g., "FSD" from "FSD Lab(Batch-1)")
-            for code in faculty_mapping.keys():
-                if code in subject_code:
-                    rows.append({
-                        'Faculty': faculty_mapping[code],
-                        'Day': day,
-                        'Period': period_idx,
-                        'Class': f"{class_name} ({subject_code})",
-                        'Subject': subject_names.get(code, code),
-                        'Room': room_no
-                    })
-                    break
-        # Normal subject
-        else:
-            if subject_code in faculty_mapping:
+def convert_matrix(matrix, registry, class_name=class_name, room_no=room_no):
+    """Day -> cells (one per period) into app-format rows"""
+    rows = []
+    for day, cells in matrix.items():
+        for period_idx, text in enumerate(cells, start=1):
+            # Combined subjects ("RTRP/CN"), lab batches and lab blocks are
+            # expanded the same way as in the upload converters
+            for faculty, subject, offset in expand_cell(text, registry, class_name):
                 rows.append({
-                    'Faculty': faculty_mapping[subject_code],
+                    'Faculty': faculty,
                     'Day': day,
-                    'Period': period_idx,
+                    'Period': period_idx + offset,
                     'Class': class_name,
-                    'Subject': subject_names.get(subject_code, subject_code),
+                    'Subject': subject,
                     'Room': room_no
                 })
+    return pd.DataFrame(rows)
+
 
-# Create DataFrame
-df = pd.DataFrame(rows)
+if __name__ == "__main__":
+    # Subject codes, full names and faculty come from subjects.csv
+    # (the subject registry shared with the upload converters)
+    df = convert_matrix(timetable_matrix, load_registry())
 
-# Save to Excel
-output_file = 'GNITC_CSE_CYBER_II_B_Timetable.xlsx'
-df.to_excel(output_file, index=False)
+    # Save to Excel
+    output_file = 'GNITC_CSE_CYBER_II_B_Timetable.xlsx'
+    df.to_excel(output_file, index=False)
 
-print("✅ GNITC Timetable Converted Successfully!")
-print(f"📁 File: {output_file}")
-print(f"📊 Total entries: {len(df)}")
-print(f"👥 Faculty members: {df['Faculty'].nunique()}")
-print(f"📚 Subjects: {df['Subject'].nunique()}")
+    print("✅ GNITC Timetable Converted Successfully!")
+    print(f"📁 File: {output_file}")
+    print(f"📊 Total entries: {len(df)}")
+    print(f"👥 Faculty members: {df['Faculty'].nunique()}")
+    print(f"📚 Subjects: {df['Subject'].nunique()}")
 
-# Show sample
-print("\n📋 SAMPLE DATA:")
-print(df.head(10).to_string(index=False))
+    # Show sample
+    print("\n📋 SAMPLE DATA:")
+    print(df.head(10).to_string(index=False))
 
-# Show faculty list
-print("\n👥 FACULTY LIST:")
-for faculty in sorted(df['Faculty'].unique()):
-    count = len(df[df['Faculty'] == faculty])
-    print(f"  • {faculty} ({count} classes)")
\ No newline at end of file
+    # Show faculty list
+    print("\n👥 FACULTY LIST:")
+    for faculty in sorted(df['Faculty'].unique()):
+        count = len(df[df['Faculty'] == faculty])
+        print(f"  • {faculty} ({count} classes)")
\ No newline at end of file
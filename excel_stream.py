@@ -0,0 +1,242 @@
+"""
+Streaming ingestion of uploaded workbooks.
+
+The workbook is opened once in openpyxl read-only mode and every sheet is
+walked with iter_rows(): the format is detected from the header and the
+first rows, then normalized (Faculty, Day, Period, Class, Subject) tuples
+are yielded. Day rows are converted BLOCK_ROWS at a time by the vectorized
+engine in timetable_converter.py, so nothing bigger than one block is
+materialized until the final merged table and peak memory stays flat even
+for department workbooks close to the 16MB upload limit.
+
+Conversion rules are the same as the old DataFrame converters (header row =
+column names, blank rows skipped, cells matched against the subject
+registry).
+"""
+from itertools import chain, islice
+
+import numpy as np
+
+from subject_registry import get_registry
+from timetable_converter import DAYS_MAP, expand_block, period_from_column
+
+# Rows buffered to detect the sheet format before streaming the rest
+DETECT_ROWS = 20
+
+# Day rows handed to the converter engine at once
+BLOCK_ROWS = 256
+
+
+class XlsxWorkbook:
+    """openpyxl read-only workbook: each sheet's XML is parsed as it is iterated"""
+
+    def __init__(self, path):
+        from openpyxl import load_workbook
+        self._wb = load_workbook(path, read_only=True, data_only=True)
+        self.sheet_names = list(self._wb.sheetnames)
+
+    def rows(self, sheet_name):
+        return self._wb[sheet_name].iter_rows(values_only=True)
+
+    def close(self):
+        self._wb.close()
+
+
+class XlsWorkbook:
+    """Legacy .xls through xlrd (sheets loaded on demand)"""
+
+    def __init__(self, path):
+        import xlrd
+        self._book = xlrd.open_workbook(path, on_demand=True)
+        self.sheet_names = list(self._book.sheet_names())
+
+    def rows(self, sheet_name):
+        sheet = self._book.sheet_by_name(sheet_name)
+        for i in range(sheet.nrows):
+            # xlrd uses '' for empty cells and floats for every number
+            yield tuple(None if value == '' else
+                        int(value) if isinstance(value, float) and value.is_integer() else value
+                        for value in sheet.row_values(i))
+        self._book.unload_sheet(sheet_name)
+
+    def close(self):
+        self._book.release_resources()
+
+
+def open_workbook(path):
+    """Open an uploaded workbook once; .xls is detected by its OLE2 signature"""
+    with open(path, "rb") as f:
+        signature = f.read(8)
+    if signature == b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1":
+        return XlsWorkbook(path)
+    return XlsxWorkbook(path)
+
+
+def non_blank_rows(rows):
+    """Skip fully empty rows (same as pandas.read_excel)"""
+    for row in rows:
+        if any(value is not None for value in row):
+            yield row
+
+
+def header_names(row):
+    """Column names like pandas: 'Unnamed: i' for blanks, 'X.1' for repeats"""
+    names = []
+    seen = {}
+    for i, value in enumerate(row):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def day_name(value):
+    """str(x).strip().upper() -> day name, '' for non-day cells"""
+    if value is None:
+        return ""
+    return DAYS_MAP.get(str(value).strip().upper(), "")
+
+
+def cell_text(value):
+    """Stripped cell text, or None for cells the converters ignore"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text or text == 'nan':
+        return None
+    return text
+
+
+class SheetStream:
+    """
+    One sheet being streamed. After construction, `format`, `section` and
+    `output_columns` are known; iterate rows() to get the table rows.
+
+    section_of(value) returns the section named by a label cell (or None);
+    default_section is used until the sheet names one. Cells are matched
+    against `registry` (the default subject registry if None).
+    """
+
+    def __init__(self, rows, sheet_name, multi_sheet, section_of, default_section, registry=None):
+        rows = non_blank_rows(rows)
+        self._registry = get_registry() if registry is None else registry
+        header = tuple(next(rows, None) or ())
+        self.sheet_name = sheet_name
+        self.columns = header_names(header)
+        self.source_rows = 0
+        # Lab-block periods that ran past the sheet's last period (dropped)
+        self.dropped_slots = 0
+
+        # App-format tables keep the named columns only (trailing blank
+        # header cells are padding from the sheet dimensions)
+        width = len(header)
+        while width and header[width - 1] is None:
+            width -= 1
+        self._app_width = width
+        self._section_of = section_of
+
+        # Peek at the first rows to detect the format, then replay them
+        head = list(islice(rows, DETECT_ROWS))
+        self._rows = chain(head, rows)
+
+        self.section = default_section
+        for name in self.columns:
+            label = section_of(name)
+            if label:
+                self.section = label
+                break
+
+        self.format = self._detect(head, multi_sheet)
+        if self.format == 'app':
+            self.output_columns = self.columns[:self._app_width]
+        else:
+            self.output_columns = ['Faculty', 'Day', 'Period', 'Class', 'Subject']
+
+    def _detect(self, head, multi_sheet):
+        required = ['Faculty', 'Day', 'Period', 'Class', 'Subject']
+        if all(col in self.columns for col in required):
+            return 'app'
+        if not self.columns or not head:
+            return None
+        if multi_sheet and any(day_name(row[0]) for row in head):
+            return 'college'
+
+        # Matrix: first column whose first value mentions a day code
+        first = head[0]
+        self._day_index = None
+        for i, name in enumerate(self.columns):
+            value = first[i] if i < len(first) else None
+            if value is not None and any(day in str(value).upper() for day in DAYS_MAP):
+                self._day_index = i
+                break
+        if self._day_index is None or not self.columns[self._day_index]:
+            return None
+        return 'matrix'
+
+    def rows(self):
+        """Yield table rows: app-format rows as-is, otherwise normalized 5-tuples"""
+        if self.format == 'app':
+            width = self._app_width
+            for row in self._rows:
+                self.source_rows += 1
+                row = tuple(row[:width])
+                yield row + (None,) * (width - len(row))
+            return
+
+        if self.format == 'college':
+            # Periods 1-6 are the cells right of the day code
+            cell_columns = [(i, i) for i in range(1, 7)]
+            day_index = 0
+        elif self.format == 'matrix':
+            day_index = self._day_index
+            cell_columns = [(i, period_from_column(name)) for i, name in enumerate(self.columns)
+                            if name != self.columns[day_index]]
+        else:
+            # Not a timetable sheet - just count it for the upload report
+            for _ in self._rows:
+                self.source_rows += 1
+            return
+
+        section = self.section
+        section_of = self._section_of
+        periods = [period for _, period in cell_columns]
+        block = []  # (day, section, cells) of the day rows not converted yet
+        for row in self._rows:
+            self.source_rows += 1
+            day = day_name(row[day_index]) if day_index < len(row) else ""
+            if not day:
+                # Non-day rows may carry a "Section: X" label for the rows below
+                for value in row:
+                    label = section_of(value)
+                    if label:
+                        section = label
+                        break
+                continue
+
+            block.append((day, section, [cell_text(row[i]) if i < len(row) else None
+                                         for i, _ in cell_columns]))
+            if len(block) == BLOCK_ROWS:
+                yield from self._convert(block, periods)
+                block = []
+        if block:
+            yield from self._convert(block, periods)
+        if self.dropped_slots:
+            print(f"⚠️ {self.sheet_name}: dropped {self.dropped_slots} lab periods past period {max(periods)}")
+
+    def _convert(self, block, periods):
+        """Normalized 5-tuples of some day rows, in cell order"""
+        if not periods:
+            return
+        cells = np.empty((len(block), len(periods)), dtype=object)
+        cells[:] = [row_cells for _, _, row_cells in block]
+        days = np.array([day for day, _, _ in block], dtype=object)
+        sections = np.array([section for _, section, _ in block], dtype=object)
+        columns, dropped = expand_block(cells, days, periods, sections, self._registry)
+        self.dropped_slots += dropped
+        if columns is not None:
+            yield from zip(columns['Faculty'], columns['Day'], columns['Period'].tolist(),
+                           columns['Class'], columns['Subject'])
@@ -0,0 +1,449 @@
+"""
+Printable / downloadable timetables: xlsx, PDF and iCalendar.
+
+Every export is for one entity of one timetable version:
+
+    ('faculty', 'Mr. MD. Saleem')   what result.html shows for a faculty
+    ('class', 'CSE-CYBER-II-B')     a class/section timetable
+    ('department', '')              everything (PDF: one page per class)
+
+Generated files go into a content-addressed cache under
+UPLOAD_FOLDER/exports/ - the file name is a hash of (content key, entity,
+format), where the content key is a digest of the entity's rows (see
+Timetable.content_key) - so a repeat download is a file read, a new
+version never serves a stale file, and faculty/classes an upload didn't
+touch keep their files. The department zip (one file per faculty and class)
+builds its missing files in parallel processes when there are enough, and
+keeps every file's bytes until the zip is written, so a prune() from another
+request can't remove a file from under it.
+
+The PDF writer is a few lines of PDF operators (Helvetica, one grid table
+per page), so exports need nothing beyond pandas/openpyxl - and only the
+xlsx renderer imports those.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+from faculty_grid import DAYS, PERIOD_TIMES, WeeklySchedule
+
+EXPORTS_DIR = "exports"
+
+FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+    'ics': 'text/calendar',
+    'zip': 'application/zip',
+}
+KINDS = ('faculty', 'class', 'department')
+
+# Bump when the output of a renderer changes (old cache entries are ignored)
+EXPORT_LAYOUT = 1
+
+# Cached files kept before the least recently used ones are dropped
+MAX_CACHED_FILES = 2000
+
+# Below this many missing files the zip is built in-process
+PARALLEL_MIN_EXPORTS = 16
+
+TIMEZONE = "Asia/Kolkata"
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def safe_filename(name):
+    """'Mr. MD. Saleem' -> 'Mr._MD._Saleem'"""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(name)).strip("._") or "timetable"
+
+
+def _slot_lines(row, kind):
+    """Text of one entry in a grid cell (the other side of the entity)"""
+    other = row.get('Faculty') if kind == 'class' else row.get('Class')
+    lines = [_text(row.get('Subject')), _text(other)]
+    if kind == 'department':
+        lines.append(_text(row.get('Faculty')))
+    if _text(row.get('Room')):
+        lines.append(_text(row.get('Room')))
+    return [line for line in lines if line]
+
+
+def _grid_axes(schedule):
+    days = list(DAYS) + [day for day in schedule.grid if day not in DAYS and _text(day)]
+    periods = sorted(set(PERIOD_TIMES) | set(schedule.periods))
+    return days, periods
+
+
+# ============= XLSX =============
+def render_xlsx(kind, title, records):
+    import pandas as pd
+
+    schedule = WeeklySchedule((title,), list(range(len(records))), records)
+    columns = [col for col in ['Day', 'Period', 'Time', 'Faculty', 'Class', 'Subject', 'Room']
+               if any(col in row for row in records)]
+    rows = pd.DataFrame([{col: row.get(col) for col in columns} for row in records], columns=columns)
+
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        if kind != 'department':
+            days, periods = _grid_axes(schedule)
+            grid = pd.DataFrame(
+                [["\n\n".join("\n".join(_slot_lines(row, kind))
+                              for row in schedule.grid.get(day, {}).get(period, [])) for period in periods]
+                 for day in days],
+                index=days, columns=[f"P{p} ({PERIOD_TIMES.get(p, '')})" for p in periods])
+            grid.index.name = "Day"
+            grid.to_excel(writer, sheet_name="Weekly")
+        rows.to_excel(writer, sheet_name="Timetable", index=False)
+    return buffer.getvalue()
+
+
+# ============= PDF =============
+_PAGE_WIDTH, _PAGE_HEIGHT = 842, 595  # A4 landscape, points
+_MARGIN = 36
+
+
+def _pdf_escape(text):
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(text, width, size):
+    """Split text into lines that fit `width` points (Helvetica ~0.5em per char)"""
+    per_line = max(1, int(width / (size * 0.52)))
+    lines = []
+    for paragraph in text.split("\n"):
+        while len(paragraph) > per_line:
+            cut = paragraph.rfind(" ", 0, per_line + 1)
+            cut = cut if cut > 0 else per_line
+            lines.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        lines.append(paragraph)
+    return lines
+
+
+def _grid_page(ops, heading, schedule, kind):
+    """Operators drawing one titled day x period table"""
+    def text(x, y, value, size=8, bold=False):
+        ops.append(f"BT /{'F2' if bold else 'F1'} {size} Tf {x:.1f} {y:.1f} Td ({_pdf_escape(value)}) Tj ET")
+
+    text(_MARGIN, _PAGE_HEIGHT - _MARGIN - 14, heading, size=14, bold=True)
+    days, periods = _grid_axes(schedule)
+
+    top = _PAGE_HEIGHT - _MARGIN - 30
+    header_height = 26
+    day_width = 70
+    col_width = (_PAGE_WIDTH - 2 * _MARGIN - day_width) / len(periods)
+    row_height = (top - header_height - _MARGIN) / len(days)
+
+    ops.append("0.5 w")
+    ops.append(f"0.9 g {_MARGIN} {top - header_height:.1f} {_PAGE_WIDTH - 2 * _MARGIN} {header_height} re f 0 g")
+    for i, period in enumerate(periods):
+        x = _MARGIN + day_width + i * col_width
+        text(x + 4, top - 11, f"Period {period}", bold=True)
+        text(x + 4, top - 21, PERIOD_TIMES.get(period, ""), size=7)
+
+    for r, day in enumerate(days):
+        y = top - header_height - r * row_height
+        text(_MARGIN + 4, y - 12, day, bold=True)
+        for i, period in enumerate(periods):
+            x = _MARGIN + day_width + i * col_width
+            lines = []
+            for row in schedule.grid.get(day, {}).get(period, []):
+                for line in _slot_lines(row, kind):
+                    lines.extend(_wrap(line, col_width - 8, 7))
+            fit = max(1, int((row_height - 6) / 8.5))
+            if len(lines) > fit:
+                lines = lines[:fit - 1] + ["..."]
+            for n, line in enumerate(lines):
+                text(x + 4, y - 11 - n * 8.5, line, size=7)
+
+    # Grid lines
+    bottom = top - header_height - len(days) * row_height
+    for r in range(len(days) + 2):
+        y = top if r == 0 else top - header_height - (r - 1) * row_height
+        ops.append(f"{_MARGIN} {y:.1f} m {_PAGE_WIDTH - _MARGIN} {y:.1f} l S")
+    for i in range(len(periods) + 2):
+        x = _MARGIN if i == 0 else _MARGIN + day_width + (i - 1) * col_width
+        ops.append(f"{x:.1f} {top:.1f} m {x:.1f} {bottom:.1f} l S")
+
+
+def _pdf_document(pages):
+    """Minimal PDF from a list of per-page operator lists"""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for ops in pages:
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(len(objects) + 1)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_PAGE_WIDTH} {_PAGE_HEIGHT}] "
+                       f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {len(objects)} 0 R >>")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        body = obj if isinstance(obj, bytes) else obj.encode("latin-1")
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_pdf(kind, title, records):
+    if kind == 'department':
+        by_class = {}
+        for row in records:
+            by_class.setdefault(_text(row.get('Class')) or "No class", []).append(row)
+        sections = [(f"{title} - {name}", rows) for name, rows in sorted(by_class.items())]
+        kind = 'class'
+    else:
+        sections = [(title, records)]
+
+    pages = []
+    for heading, rows in sections or [(title, [])]:
+        ops = []
+        _grid_page(ops, heading, WeeklySchedule((heading,), list(range(len(rows))), rows), kind)
+        pages.append(ops)
+    return _pdf_document(pages)
+
+
+# ============= ICALENDAR =============
+def _clock(text, afternoon=False):
+    """'1:10' -> (13, 10): GNITC times are 12-hour without am/pm"""
+    hour, minute = (int(part) for part in text.split(":"))
+    if hour < 8 or (afternoon and hour < 12):
+        hour += 12
+    return hour, minute
+
+
+def period_clock(period):
+    """((start hour, minute), (end hour, minute)) of a period, or None"""
+    times = PERIOD_TIMES.get(period)
+    if not times:
+        return None
+    start, end = times.split("-")
+    start = _clock(start)
+    return start, _clock(end, afternoon=start[0] >= 12)
+
+
+def week_start(version):
+    """Monday of the week a version was published ('20240115-...' -> 2024-01-15)"""
+    try:
+        published = datetime.strptime(str(version)[:8], "%Y%m%d").date()
+    except ValueError:
+        published = date(2024, 1, 1)
+    return published - timedelta(days=published.weekday())
+
+
+def _ics_escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fold(line):
+    """RFC 5545: lines over 75 octets continue on the next line after a space"""
+    out = []
+    while len(line.encode("utf-8")) > 75:
+        cut = 74
+        while len(line[:cut].encode("utf-8")) > 74:
+            cut -= 1
+        out.append(line[:cut])
+        line = " " + line[cut:]
+    out.append(line)
+    return "\r\n".join(out)
+
+
+def render_ics(kind, title, records, version):
+    monday = week_start(version)
+    stamp = monday.strftime("%Y%m%dT000000Z")
+    lines = [
+        "BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//GNITC//Faculty Timetable//EN",
+        "CALSCALE:GREGORIAN", f"X-WR-CALNAME:{_ics_escape(title)}", f"X-WR-TIMEZONE:{TIMEZONE}",
+        "BEGIN:VTIMEZONE", f"TZID:{TIMEZONE}", "BEGIN:STANDARD", "DTSTART:19700101T000000",
+        "TZOFFSETFROM:+0530", "TZOFFSETTO:+0530", "TZNAME:IST", "END:STANDARD", "END:VTIMEZONE",
+    ]
+    for row in records:
+        day, clock = _text(row.get('Day')), period_clock(row.get('Period'))
+        if day not in DAYS or clock is None:
+            continue
+        when = monday + timedelta(days=DAYS.index(day))
+        (start_h, start_m), (end_h, end_m) = clock
+        subject = _text(row.get('Subject')) or "Class"
+        who = _text(row.get('Faculty')) if kind == 'class' else _text(row.get('Class'))
+        uid = hashlib.sha1(repr((version, kind, title, day, row.get('Period'), subject, who)).encode()).hexdigest()
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{uid}@gnitc-timetable",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;TZID={TIMEZONE}:{when:%Y%m%d}T{start_h:02d}{start_m:02d}00",
+            f"DTEND;TZID={TIMEZONE}:{when:%Y%m%d}T{end_h:02d}{end_m:02d}00",
+            f"RRULE:FREQ=WEEKLY;BYDAY={day[:2].upper()}",
+            f"SUMMARY:{_ics_escape(subject + (f' ({who})' if who else ''))}",
+        ]
+        if _text(row.get('Room')):
+            lines.append(f"LOCATION:{_ics_escape(_text(row.get('Room')))}")
+        if kind == 'department':
+            lines.append(f"DESCRIPTION:{_ics_escape(_text(row.get('Faculty')))}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode("utf-8")
+
+
+def render(fmt, kind, title, records, version):
+    """Bytes of one export"""
+    if fmt == 'xlsx':
+        return render_xlsx(kind, title, records)
+    if fmt == 'pdf':
+        return render_pdf(kind, title, records)
+    if fmt == 'ics':
+        return render_ics(kind, title, records, version)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+# ============= CONTENT-ADDRESSED CACHE =============
+def export_key(content, kind, name, fmt):
+    ident = json.dumps([EXPORT_LAYOUT, content, kind, name, fmt])
+    return hashlib.sha1(ident.encode()).hexdigest()
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _export_task(task):
+    """Process-pool worker: render one export into the cache, return its bytes"""
+    path, fmt, kind, title, records, version = task
+    data = render(fmt, kind, title, records, version)
+    _write_atomic(path, data)
+    return data
+
+
+class ExportCache:
+    """Rendered exports on disk, one file per (content key, entity, format)"""
+
+    def __init__(self, folder):
+        # Absolute: send_file resolves relative paths against the app root, not the cwd
+        self.root = os.path.abspath(os.path.join(folder, EXPORTS_DIR))
+        os.makedirs(self.root, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+    def path(self, content, kind, name, fmt):
+        return os.path.join(self.root, f"{export_key(content, kind, name, fmt)}.{fmt}")
+
+    def _hit(self, path):
+        try:
+            os.utime(path)  # recently used - pruned last
+        except FileNotFoundError:
+            return False
+        self.hits += 1
+        return True
+
+    def _stored(self, count=1):
+        self.misses += count
+        before = self._writes
+        self._writes += count
+        if self._writes // 100 != before // 100:
+            self.prune()
+
+    def get(self, version, kind, name, fmt, records, content=None):
+        """Path of the export, rendering it on a cache miss (content: cache key, default version)"""
+        path = self.path(content or version, kind, name, fmt)
+        if not self._hit(path):
+            _write_atomic(path, render(fmt, kind, name or "Department timetable", records, version))
+            self._stored()
+        return path
+
+    def department_zip(self, timetable, fmt, workers=None):
+        """Zip of every faculty and class export plus the department one"""
+        version = timetable.version
+        path = self.path(version, 'department', 'zip', fmt)
+        if self._hit(path):
+            return path
+
+        entries = [(version, 'department', "", 'department', timetable.department.records)]
+        for name, schedule in zip(timetable.search_index.names if timetable.search_index else [],
+                                  timetable.schedules):
+            entries.append((timetable.content_key('faculty', (name,)), 'faculty', name,
+                            f"faculty/{safe_filename(name)}", schedule.records))
+        for schedule in timetable.class_schedules.values():
+            name = schedule.names[0]
+            entries.append((timetable.content_key('class', (name,)), 'class', name,
+                            f"classes/{safe_filename(name)}", schedule.records))
+
+        # Bytes of every file, read or rendered once and held until the zip
+        # is written (the cached copies may be pruned meanwhile)
+        files = [None] * len(entries)
+        missing, tasks = [], []
+        for i, (content, kind, name, _, records) in enumerate(entries):
+            target = self.path(content, kind, name, fmt)
+            try:
+                with open(target, "rb") as f:
+                    files[i] = f.read()
+            except FileNotFoundError:
+                missing.append(i)
+                tasks.append((target, fmt, kind, name or "Department timetable", records, version))
+
+        workers = min(workers or os.cpu_count() or 1, len(tasks))
+        if workers > 1 and len(tasks) >= PARALLEL_MIN_EXPORTS:
+            # spawn, not fork: this runs in one thread of a multi-threaded
+            # worker, and a forked child would inherit locks held by the others
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                rendered = list(pool.map(_export_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+        else:
+            rendered = [_export_task(task) for task in tasks]
+        for i, data in zip(missing, rendered):
+            files[i] = data
+        self.hits += len(entries) - len(missing)
+        if missing:
+            self._stored(len(missing))
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for (_, _, _, arcname, _), data in zip(entries, files):
+                archive.writestr(f"{arcname}.{fmt}", data)
+        _write_atomic(path, buffer.getvalue())
+        self._stored()
+        return path
+
+    def prune(self, keep=MAX_CACHED_FILES):
+        """Drop the least recently used files beyond `keep`"""
+        try:
+            names = [name for name in os.listdir(self.root) if not name.endswith(".tmp")]
+        except FileNotFoundError:
+            return
+        if len(names) <= keep:
+            return
+        paths = [os.path.join(self.root, name) for name in names]
+        paths.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for stale in paths[:len(paths) - keep]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
@@ -0,0 +1,106 @@
+"""
+Per-faculty (and per-class) weekly schedules of one timetable version.
+
+For a faculty name the rows for result.html (with period times attached),
+the day x period grid and the summary counts are built once from the
+mapped snapshot and kept in a per-version LRU (see timetable_store.py), so
+/search is a cache hit instead of a DataFrame filter + to_dict + per-row
+time lookup. Rendered result pages are cached per version too (see
+PageCache).
+"""
+import threading
+from collections import OrderedDict
+from heapq import merge
+
+# GNITC period timings
+PERIOD_TIMES = {
+    1: "9:10-10:10",
+    2: "10:10-11:10",
+    3: "11:10-12:10",
+    4: "12:10-1:10",
+    5: "2:00-3:00",
+    6: "3:00-4:00"
+}
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+
+class WeeklySchedule:
+    """Everything result.html and the JSON API need for one faculty/class (or one search)"""
+
+    __slots__ = ('names', 'positions', 'records', 'grid', 'periods',
+                 'subject_count', 'day_count')
+
+    def __init__(self, names, positions, records):
+        self.names = names
+        self.positions = positions
+        self.records = records
+
+        # Day x period grid: {day: {period: [records]}}, days in week order
+        grid = {}
+        periods = set()
+        for row in records:
+            grid.setdefault(row.get('Day'), {}).setdefault(row.get('Period'), []).append(row)
+            periods.add(row.get('Period'))
+        order = {day: i for i, day in enumerate(DAYS)}
+        self.grid = dict(sorted(grid.items(), key=lambda item: order.get(item[0], len(DAYS))))
+        self.periods = sorted(p for p in periods if isinstance(p, (int, float)) and p == p)
+
+        self.subject_count = len({row.get('Subject') for row in records})
+        self.day_count = len({row.get('Day') for row in records})
+
+    @property
+    def count(self):
+        return len(self.records)
+
+    def moved(self, positions):
+        """Same rows at other positions (an unchanged name in a new version)"""
+        schedule = WeeklySchedule.__new__(WeeklySchedule)
+        for slot in self.__slots__:
+            setattr(schedule, slot, getattr(self, slot))
+        schedule.positions = positions
+        return schedule
+
+
+def merge_schedules(schedules):
+    """Schedule for a search that matched several names (timetable order)"""
+    pairs = merge(*[zip(s.positions, s.records) for s in schedules], key=lambda pair: pair[0])
+    positions, records = [], []
+    for pos, row in pairs:
+        positions.append(pos)
+        records.append(row)
+    names = tuple(name for s in schedules for name in s.names)
+    return WeeklySchedule(names, positions, records)
+
+
+class PageCache:
+    """Small thread-safe LRU for rendered pages of one timetable version"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def items(self):
+        """Snapshot of the cached (key, value) pairs, oldest first"""
+        with self._lock:
+            return list(self._entries.items())
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,149 @@
+"""
+Free-slot and substitute finder.
+
+Every faculty gets an occupancy bitmap (one bit per day x period slot, as a
+plain Python int), and every slot gets the transposed bitmap of the faculty
+busy in it. Questions like "who is free Tuesday period 3?", "when are A and
+B both free?" and "who should cover Saleem's class?" are then a few bitwise
+operations instead of one /search per faculty.
+
+Built once per timetable version (Timetable.occupancy).
+"""
+from faculty_grid import DAYS, PERIOD_TIMES
+
+
+def parse_day(value):
+    """'Tuesday' / 'tue' / 'TUE' -> 'Tuesday' (None if not a day)"""
+    text = str(value or "").strip().lower()[:3]
+    for day in DAYS:
+        if text and day.lower().startswith(text):
+            return day
+    return None
+
+
+def parse_period(value):
+    """'3' / 3 / 3.0 -> 3 (None if not a whole number)"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if number != number or not number.is_integer():
+        return None
+    return int(number)
+
+
+def _bits(mask):
+    """Positions of the set bits of an int, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class OccupancyIndex:
+    """Per-faculty slot bitmaps plus per-slot faculty bitmaps"""
+
+    def __init__(self, names, schedules):
+        """names/schedules: faculty names and their WeeklySchedules (same order)"""
+        periods = set(PERIOD_TIMES)
+        for schedule in schedules:
+            periods.update(p for p in map(parse_period, schedule.periods) if p is not None and p > 0)
+        self.periods = sorted(periods)
+        self.names = list(names)
+
+        width = len(self.periods)
+        self._width = width
+        self._period_index = {period: i for i, period in enumerate(self.periods)}
+        self.slots = [(day, period) for day in DAYS for period in self.periods]
+        self._full = (1 << len(self.slots)) - 1
+        self._day_masks = [((1 << width) - 1) << (i * width) for i in range(len(DAYS))]
+
+        self.masks = []
+        self.classes = []
+        self.subjects = []
+        self._entries = []  # per faculty: {bit: [records]}
+        self._by_slot = [0] * len(self.slots)
+        for name_id, schedule in enumerate(schedules):
+            mask = 0
+            entries = {}
+            for row in schedule.records:
+                bit = self.slot_bit(row.get('Day'), row.get('Period'))
+                if bit is None:
+                    continue
+                mask |= 1 << bit
+                self._by_slot[bit] |= 1 << name_id
+                entries.setdefault(bit, []).append(row)
+            self.masks.append(mask)
+            self._entries.append(entries)
+            self.classes.append({row.get('Class') for row in schedule.records})
+            self.subjects.append({row.get('Subject') for row in schedule.records})
+        self._everyone = (1 << len(self.names)) - 1
+
+    def slot_bit(self, day, period):
+        """Bit of a (day, period) slot, or None if it's not on the grid"""
+        day = parse_day(day)
+        index = self._period_index.get(parse_period(period))
+        if day is None or index is None:
+            return None
+        return DAYS.index(day) * self._width + index
+
+    def free_faculty(self, day, period):
+        """Names of every faculty with no class in the slot"""
+        bit = self.slot_bit(day, period)
+        if bit is None:
+            return []
+        free = self._everyone & ~self._by_slot[bit]
+        return sorted(self.names[name_id] for name_id in _bits(free))
+
+    def busy_faculty(self, day, period):
+        bit = self.slot_bit(day, period)
+        if bit is None:
+            return []
+        return sorted(self.names[name_id] for name_id in _bits(self._by_slot[bit]))
+
+    def common_free_slots(self, name_ids):
+        """(day, period) slots where all the given faculty are free"""
+        busy = 0
+        for name_id in name_ids:
+            busy |= self.masks[name_id]
+        return [self.slots[bit] for bit in _bits(self._full & ~busy)]
+
+    def load(self, name_id, day=None):
+        """Classes per week (or on one day) of a faculty"""
+        mask = self.masks[name_id]
+        if day is not None:
+            mask &= self._day_masks[DAYS.index(day)]
+        return mask.bit_count()
+
+    def substitutes(self, absent_ids, day, period, limit=10):
+        """
+        Free faculty ranked as cover for the absent faculty's class in a slot:
+        already teaches that class, then teaches the subject, then the
+        lightest load that day, then the lightest week.
+        """
+        bit = self.slot_bit(day, period)
+        if bit is None:
+            return [], []
+        day = parse_day(day)
+
+        covering = [row for name_id in absent_ids for row in self._entries[name_id].get(bit, [])]
+        classes = {row.get('Class') for row in covering}
+        subjects = {row.get('Subject') for row in covering}
+
+        absent = 0
+        for name_id in absent_ids:
+            absent |= 1 << name_id
+        free = self._everyone & ~self._by_slot[bit] & ~absent
+
+        ranked = []
+        for name_id in _bits(free):
+            ranked.append({
+                'name': self.names[name_id],
+                'teaches_class': bool(classes & self.classes[name_id]),
+                'teaches_subject': bool(subjects & self.subjects[name_id]),
+                'day_load': self.load(name_id, day),
+                'week_load': self.load(name_id),
+            })
+        ranked.sort(key=lambda c: (not c['teaches_class'], not c['teaches_subject'],
+                                   c['day_load'], c['week_load'], c['name']))
+        return covering, ranked[:limit]
@@ -0,0 +1,262 @@
+"""
+"Where is everyone now, and what's next?" for corridor displays.
+
+PERIOD_TIMES gives every period a start and end on the wall clock
+(PERIOD_BOUNDS, minutes since midnight); a SlotIndex, built once per
+timetable version (Timetable.slots), maps every (day, period) to the rows
+taught in it. /api/now is then a bisect over today's period starts plus
+one dict lookup.
+
+/api/now/stream pushes the same payload as Server-Sent Events. One
+LiveFeed thread per worker sleeps until the next period boundary (or
+LIVE_POLL_SECONDS, to notice a newly published version) and wakes every
+open stream at once, so displays never poll and the storage backend is
+checked once per worker, not once per display. Each open stream still
+holds one gunicorn thread, so a worker serves at most MAX_LIVE_STREAMS of
+them and answers 503 past that, leaving the other threads to the rest of
+the site.
+
+Clock times are the server's local time unless TIMETABLE_TZ is set
+(e.g. TIMETABLE_TZ=Asia/Kolkata).
+"""
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from faculty_grid import DAYS, PERIOD_TIMES
+from free_slots import parse_day, parse_period
+
+TIMEZONE = os.environ.get("TIMETABLE_TZ")
+
+# How often the feed checks for a newly published version, and how often
+# an idle stream sends a keep-alive comment (proxies drop silent ones)
+LIVE_POLL_SECONDS = 5
+KEEPALIVE_SECONDS = 25
+
+# Open streams per worker; keep it well under gunicorn's --threads
+MAX_LIVE_STREAMS = int(os.environ.get("MAX_LIVE_STREAMS", 16))
+
+
+def parse_clock(text):
+    """'9:10' -> 550, '1:10' -> 790 (minutes; the college day runs 8 to 8, so 1-7 are PM)"""
+    hours, minutes = (int(part) for part in text.strip().split(":"))
+    if hours < 8:
+        hours += 12
+    return hours * 60 + minutes
+
+
+def _bounds():
+    bounds = {}
+    for period, times in PERIOD_TIMES.items():
+        start, end = times.split("-")
+        bounds[period] = (parse_clock(start), parse_clock(end))
+    return bounds
+
+
+# period -> (start, end) minutes since midnight, in start order
+PERIOD_BOUNDS = dict(sorted(_bounds().items(), key=lambda item: item[1]))
+_PERIODS = list(PERIOD_BOUNDS)
+_STARTS = [start for start, _ in PERIOD_BOUNDS.values()]
+_EDGES = sorted({minute for bounds in PERIOD_BOUNDS.values() for minute in bounds})
+
+
+def _zone():
+    if TIMEZONE:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(TIMEZONE)
+    return None
+
+
+def local_now():
+    return datetime.now(_zone()).replace(tzinfo=None)
+
+
+def local_time(when):
+    """Naive timetable-clock datetime: offset-aware values are converted first, naive ones kept as given"""
+    if when.tzinfo is None:
+        return when
+    return when.astimezone(_zone()).replace(tzinfo=None)
+
+
+def _at(date, minutes):
+    return datetime(date.year, date.month, date.day) + timedelta(minutes=minutes)
+
+
+def locate(when):
+    """
+    Where `when` falls in the week: (day, period) now - period None in a
+    break, before/after hours or on Sunday - the (day, period, start) of the
+    next period to begin, and when the answer changes next.
+    """
+    weekday = when.weekday()
+    day = DAYS[weekday] if weekday < len(DAYS) else None
+    minute = when.hour * 60 + when.minute + when.second / 60
+
+    period = None
+    if day is not None:
+        i = bisect_right(_STARTS, minute) - 1
+        if i >= 0 and minute < PERIOD_BOUNDS[_PERIODS[i]][1]:
+            period = _PERIODS[i]
+
+    upcoming = None
+    changes_at = None
+    for offset in range(8):
+        date = when.date() + timedelta(days=offset)
+        if date.weekday() >= len(DAYS):
+            continue
+        if upcoming is None:
+            for candidate in _PERIODS:
+                start = _at(date, PERIOD_BOUNDS[candidate][0])
+                if start > when:
+                    upcoming = (DAYS[date.weekday()], candidate, start)
+                    break
+        if changes_at is None:
+            changes_at = next((_at(date, edge) for edge in _EDGES if _at(date, edge) > when), None)
+        if upcoming is not None and changes_at is not None:
+            break
+    return (day, period), upcoming, changes_at
+
+
+def _text(value):
+    """Cell -> str or None (NaN / blank -> None, 3.0 -> '3')"""
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() or None
+
+
+def _occupied(entries):
+    return {
+        'faculty': sorted({entry['faculty'] for entry in entries if entry['faculty']}),
+        'classes': sorted({entry['class'] for entry in entries if entry['class']}),
+        'rooms': sorted({entry['room'] for entry in entries if entry['room']}),
+        'entries': entries,
+    }
+
+
+class SlotIndex:
+    """Row positions per (day, period) of one timetable version"""
+
+    def __init__(self, timetable):
+        self._timetable = timetable
+        self._positions = {}  # (day, period) -> array of row positions
+        self._payloads = {}
+        snapshot = timetable.snapshot
+        if 'Day' in snapshot.columns and 'Period' in snapshot.columns:
+            for pos in range(snapshot.rows):
+                key = (parse_day(snapshot.value('Day', pos)), parse_period(snapshot.value('Period', pos)))
+                if key[0] is None or key[1] is None:
+                    continue
+                positions = self._positions.get(key)
+                if positions is None:
+                    positions = self._positions[key] = array('I')
+                positions.append(pos)
+
+    def slot(self, day, period):
+        """Who is teaching which class in which room in one slot (built on first use)"""
+        key = (day, period)
+        payload = self._payloads.get(key)
+        if payload is None:
+            entries = []
+            for pos in self._positions.get(key, ()):
+                row = self._timetable.record(pos)
+                entries.append({name.lower(): _text(row.get(name)) for name in ('Faculty', 'Class', 'Subject', 'Room')})
+            entries.sort(key=lambda entry: (entry['faculty'] or "", entry['class'] or ""))
+            payload = self._payloads[key] = _occupied(entries)
+        return payload
+
+    def __len__(self):
+        return len(self._positions)
+
+
+def filter_slot(payload, faculty=None, classes=None, rooms=None):
+    """Slot payload narrowed to some faculty / classes / rooms (lower-cased sets; None = any)"""
+    if faculty is None and classes is None and rooms is None:
+        return payload
+    entries = [entry for entry in payload['entries']
+               if (faculty is None or (entry['faculty'] or "").lower() in faculty)
+               and (classes is None or (entry['class'] or "").lower() in classes)
+               and (rooms is None or (entry['room'] or "").lower() in rooms)]
+    return _occupied(entries)
+
+
+def next_class(schedule, day, period):
+    """First row of a WeeklySchedule from slot (day, period) on in week order, wrapping round"""
+    start = (DAYS.index(day), period)
+    best = None
+    for row in schedule.records:
+        row_day = parse_day(row.get('Day'))
+        row_period = parse_period(row.get('Period'))
+        if row_day is None or row_period is None:
+            continue
+        key = (DAYS.index(row_day), row_period)
+        # The rest of this week first, then from the start of next week
+        rank = (key < start, key)
+        if best is None or rank < best[0]:
+            best = (rank, row)
+    return best[1] if best else None
+
+
+class LiveFeed:
+    """Wakes every open /api/now stream of this worker when the slot or the live version changes"""
+
+    def __init__(self, store, max_streams=MAX_LIVE_STREAMS):
+        self.store = store
+        self.max_streams = max_streams
+        self.streams = 0
+        self._slots = threading.Lock()
+        self._changed = threading.Condition()
+        self._generation = 0
+        self._key = None
+        self._thread = None
+
+    def _state(self):
+        timetable = self.store.get()
+        (day, period), upcoming, changes_at = locate(local_now())
+        return (timetable.version if timetable is not None else None, day, period, upcoming), changes_at
+
+    def _watch(self):
+        while True:
+            try:
+                key, changes_at = self._state()
+            except Exception as e:
+                print(f"⚠️ Live feed check failed: {e}")
+                key, changes_at = self._key, None
+            if key != self._key:
+                with self._changed:
+                    self._key = key
+                    self._generation += 1
+                    self._changed.notify_all()
+            wait = LIVE_POLL_SECONDS
+            if changes_at is not None:
+                wait = min(wait, max((changes_at - local_now()).total_seconds(), 0.05))
+            time.sleep(wait)
+
+    def open(self):
+        """Take a stream slot; False if this worker already serves max_streams"""
+        with self._slots:
+            if self.streams >= self.max_streams:
+                return False
+            self.streams += 1
+            return True
+
+    def close(self):
+        with self._slots:
+            self.streams = max(self.streams - 1, 0)
+
+    def wait(self, generation, timeout=KEEPALIVE_SECONDS):
+        """Block until the feed moves past `generation` (or timeout); returns the current generation"""
+        if self._thread is None:
+            with self._changed:
+                if self._thread is None:
+                    self._key, _ = self._state()
+                    self._generation += 1
+                    self._thread = threading.Thread(target=self._watch, name="live-feed", daemon=True)
+                    self._thread.start()
+        with self._changed:
+            self._changed.wait_for(lambda: self._generation != generation, timeout)
+            return self._generation
@@ -0,0 +1,225 @@
+"""
+Built-in instrumentation, exposed at /metrics in the Prometheus text format.
+
+  - request latency histogram and request counter per route
+  - stage timings: `with timed("search", "render"):` around the parse /
+    convert / filter / render steps of search and upload
+  - gauges read at scrape time (cache hit rates, live version, row count)
+
+Metrics are per process: with several gunicorn workers each scrape sees
+the worker that answered it (process_id tells them apart).
+
+Opt-in profiler: PROFILE_SLOW_MS=500 profiles a sample of requests
+(PROFILE_SAMPLE_RATE, default 0.1) with cProfile and, for the ones slower
+than the threshold, dumps the stats to UPLOAD_FOLDER/profiles/ and prints
+the top functions.
+"""
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "faculty_scheduler"
+
+# Seconds - search is a dict hit, uploads take seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, count in items:
+            yield f"{self.name}{_label_text(self.labels, values)} {_number(count)}"
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((values, ([*counts], total, n)) for values, (counts, total, n) in self._series.items())
+        for values, (counts, total, n) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _label_text(self.labels + ("le",), values + (_number(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labels, values)} {_number(total)}"
+            yield f"{self.name}_count{_label_text(self.labels, values)} {n}"
+
+
+class Gauge:
+    """Value(s) computed at scrape time: func() -> [(label values, value)]"""
+
+    def __init__(self, name, help, func, labels=()):
+        self.name = f"{PREFIX}_{name}"
+        self.help = help
+        self.labels = labels
+        self.func = func
+
+    def lines(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        try:
+            samples = self.func()
+        except Exception as e:
+            print(f"⚠️ Metric {self.name} failed: {e}")
+            return
+        for values, value in samples:
+            if value is not None:
+                yield f"{self.name}{_label_text(self.labels, values)} {_number(value)}"
+
+
+REQUEST_SECONDS = Histogram("request_duration_seconds", "Request latency per route", ("route", "method"))
+REQUESTS = Counter("requests_total", "Requests per route and status", ("route", "method", "status"))
+STAGE_SECONDS = Histogram("stage_duration_seconds", "Time spent in each stage of search/upload/load",
+                          ("operation", "stage"))
+SLOW_PROFILES = Counter("slow_request_profiles_total", "Profiles dumped for slow requests", ("route",))
+
+_metrics = [REQUEST_SECONDS, REQUESTS, STAGE_SECONDS, SLOW_PROFILES]
+
+
+def register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+@contextmanager
+def timed(operation, stage):
+    """Record how long the block took as one stage of an operation"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, operation, stage)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    out = io.StringIO()
+    for metric in _metrics:
+        for line in metric.lines():
+            out.write(line)
+            out.write("\n")
+    return out.getvalue()
+
+
+# ============= FLASK HOOKS =============
+def _route():
+    from flask import request
+    return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+
+def init_app(app, profile_dir=None):
+    """Time every request; profile a sample of them if PROFILE_SLOW_MS is set"""
+    from flask import g, request
+
+    slow_ms = float(os.environ.get("PROFILE_SLOW_MS") or 0)
+    sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.1))
+    register(Gauge("process_id", "Worker process id", lambda: [((), os.getpid())]))
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+        g.profiler = None
+        if slow_ms and random.random() < sample_rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                g.profiler = profiler
+            except ValueError:
+                pass  # another profiler is already running on this thread
+
+    def _finish(status):
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        route = _route()
+        REQUEST_SECONDS.observe(elapsed, route, request.method)
+        REQUESTS.inc(route, request.method, status)
+
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            if elapsed * 1000 >= slow_ms:
+                _dump_profile(profiler, route, elapsed, profile_dir)
+
+    @app.after_request
+    def _record(response):
+        _finish(response.status_code)
+        return response
+
+    @app.teardown_request
+    def _record_error(exc):
+        # after_request doesn't run when a view raises
+        if exc is not None:
+            _finish(500)
+
+
+def _dump_profile(profiler, route, elapsed, profile_dir):
+    SLOW_PROFILES.inc(route)
+    stats = pstats.Stats(profiler)
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        name = "".join(ch if ch.isalnum() else "_" for ch in route).strip("_") or "root"
+        path = os.path.join(profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{int(elapsed * 1000)}ms.prof")
+        stats.dump_stats(path)
+    summary = io.StringIO()
+    stats.stream = summary
+    stats.sort_stats("cumulative").print_stats(15)
+    print(f"🐢 Slow request {route} took {elapsed * 1000:.0f} ms - top functions:\n{summary.getvalue()}")
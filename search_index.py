@@ -0,0 +1,136 @@
+"""
+Faculty-name search index.
+
+Built once per published version and stored in its snapshot (see
+snapshot.py). Every faculty name is normalized ("Mr. MD. Saleem" ->
+"mr md saleem") and registered under its full form, its compact form
+("mrmdsaleem") and every trailing token sequence ("md saleem", "saleem",
+"mdsaleem"). The keys are sorted, so a lookup is a binary search for the
+range of keys starting with the query and never touches the timetable rows.
+
+Suggestions for misspelled names are ranked by trigram overlap, so they also
+stay fast no matter how many rows the timetable has.
+"""
+import difflib
+import re
+from collections import defaultdict
+
+_SEPARATORS = re.compile(r"[\s.]+")
+
+
+def normalize_name(name):
+    """'Mrs. Y.Sindhura' -> 'mrs y sindhura'"""
+    return _SEPARATORS.sub(" ", str(name).lower()).strip()
+
+
+def compact_name(name):
+    """'Mrs. Y.Sindhura' -> 'mrsysindhura'"""
+    return normalize_name(name).replace(" ", "")
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def search_tables(names):
+    """
+    Lookup tables for a sorted list of faculty names:
+    ({search key: name ids}, {trigram: name ids})
+    """
+    keys = defaultdict(set)
+    trigrams = defaultdict(set)
+    for name_id, name in enumerate(names):
+        tokens = normalize_name(name).split(" ")
+        # "mr md saleem", "md saleem", "saleem" and their compact forms
+        for start in range(len(tokens)):
+            keys[" ".join(tokens[start:])].add(name_id)
+            keys["".join(tokens[start:])].add(name_id)
+        for gram in _trigrams("".join(tokens)):
+            trigrams[gram].add(name_id)
+    return ({key: sorted(ids) for key, ids in keys.items()},
+            {gram: sorted(ids) for gram, ids in trigrams.items()})
+
+
+class FacultySearchIndex:
+    """Normalized/token/prefix lookup from a search string to faculty rows"""
+
+    def __init__(self, names, rows, keys, trigrams):
+        """
+        names: faculty names (sorted); rows: row positions per name id;
+        keys/trigrams: the search_tables() postings of a mapped snapshot
+        """
+        self.names = list(names)
+        self.rows = rows
+        self._keys = keys
+        self._trigrams = trigrams
+        self._normalized = [normalize_name(name) for name in self.names]
+
+    def _prefixed(self, prefix):
+        """Name ids with a search key starting with prefix"""
+        ids = set()
+        for i in self._keys.prefix_range(prefix):
+            ids.update(self._keys[i])
+        return ids
+
+    def __len__(self):
+        return len(self.names)
+
+    def match(self, query):
+        """Return ids of faculty names matching the search string"""
+        normalized = normalize_name(query)
+        compact = normalized.replace(" ", "")
+
+        ids = self._prefixed(normalized) | self._prefixed(compact) if normalized else set()
+        if ids:
+            return sorted(ids)
+
+        # Mid-word queries ("aleem") - plain substring over distinct names,
+        # same as the old str.contains behaviour but per name, not per row
+        needle = str(query).lower()
+        return [name_id for name_id, name in enumerate(self.names)
+                if needle in name.lower() or normalized in self._normalized[name_id]]
+
+    def best_match(self, query):
+        """Like match(), but an exact name wins over names it is a prefix of"""
+        ids = self.match(query)
+        normalized = normalize_name(query)
+        exact = [name_id for name_id in ids if self._normalized[name_id] == normalized]
+        return exact or ids
+
+    def prefix_match(self, prefix):
+        """Ids of names with a word starting with prefix (no substring fallback)"""
+        normalized = normalize_name(prefix)
+        if not normalized:
+            return list(range(len(self.names)))
+        return sorted(self._prefixed(normalized) | self._prefixed(normalized.replace(" ", "")))
+
+    def suggest(self, query, limit=5):
+        """Closest faculty names for a query that matched nothing"""
+        compact = compact_name(query)
+        if not compact:
+            return []
+
+        query_grams = _trigrams(compact)
+        overlap = defaultdict(int)
+        for gram in query_grams:
+            for name_id in self._trigrams.get(gram):
+                overlap[name_id] += 1
+        if not overlap:
+            return []
+
+        # Dice coefficient on trigrams picks candidates, difflib breaks ties
+        scored = []
+        for name_id, shared in overlap.items():
+            name_compact = self._normalized[name_id].replace(" ", "")
+            dice = 2.0 * shared / (len(query_grams) + len(_trigrams(name_compact)))
+            scored.append((dice, name_id))
+        scored.sort(reverse=True)
+
+        ranked = []
+        for dice, name_id in scored[:limit * 3]:
+            ratio = difflib.SequenceMatcher(None, compact, self._normalized[name_id].replace(" ", "")).ratio()
+            ranked.append((dice + ratio, self.names[name_id]))
+        ranked.sort(key=lambda item: -item[0])
+
+        return [name for score, name in ranked[:limit] if score >= 0.6]
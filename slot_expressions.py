@@ -0,0 +1,97 @@
+"""
+Slot-expression parser for timetable cells.
+
+A cell is not always one subject:
+
+    "RTRP/CN"                              -> two subjects in the period
+    "FSD Lab(Batch-1) & RTRP (Batch-2)"    -> batch 1 in the FSD lab, batch 2 on RTRP
+    "OS Lab (3 periods)" / "OS Lab x3"     -> a lab block from this period on
+
+expand_cell() turns a cell into one (faculty, subject, period offset) entry
+per subject, batch and period. Parts are split on "/", "&", "+" and ",";
+if fewer than two parts name a subject the whole cell is matched instead,
+so full names like "Business Economics & Financial Analysis" still work.
+Offsets aren't bounded here (the cache is per text, not per period): the
+converters drop lab periods that run past the sheet's last period.
+
+Batches are kept in the subject ("Full Stack Development Lab (Batch-1)"),
+so the section stays the Class and clash detection can tell parallel
+batches from a real collision (see batch_of).
+
+Results are cached per distinct (text, section) on the registry, so the
+upload converters parse every distinct cell text once.
+"""
+import re
+
+_SPLIT = re.compile(r"\s*[/&+,]\s*")
+_BATCH = re.compile(r"\(?\s*\b(?:batch|grp|group)\s*[-:#]?\s*(\d+)\s*\)?|\(?\bB(\d+)\b\)?", re.IGNORECASE)
+_SPAN = re.compile(r"\(?\s*(?:\bx\s*(\d)\b|\b(\d)\s*(?:periods?|hrs?|hours?)\b)\s*\)?", re.IGNORECASE)
+_LAB = re.compile(r"\blab\b", re.IGNORECASE)
+_BATCH_SUFFIX = re.compile(r"\(Batch-(\d+)\)\s*$")
+
+# Longest lab block we believe (anything bigger is a typo)
+MAX_SPAN = 6
+
+# Distinct cell texts remembered per registry
+_CACHE_SIZE = 65536
+
+
+def batch_of(subject):
+    """'Full Stack Development Lab (Batch-1)' -> '1' (None without a batch)"""
+    match = _BATCH_SUFFIX.search(str(subject or ""))
+    return match.group(1) if match else None
+
+
+def _parse_part(part):
+    """-> (subject text, batch, span, is_lab)"""
+    batch = None
+    match = _BATCH.search(part)
+    if match:
+        batch = match.group(1) or match.group(2)
+        part = part[:match.start()] + " " + part[match.end():]
+
+    span = 1
+    match = _SPAN.search(part)
+    if match:
+        span = max(1, min(MAX_SPAN, int(match.group(1) or match.group(2))))
+        part = part[:match.start()] + " " + part[match.end():]
+
+    return part.strip(), batch, span, bool(_LAB.search(part))
+
+
+def _label(name, batch, is_lab):
+    if is_lab and "lab" not in name.lower():
+        name = f"{name} Lab"
+    if batch:
+        name = f"{name} (Batch-{batch})"
+    return name
+
+
+def expand_cell(text, registry, section=None):
+    """Tuple of (faculty, subject, period offset) for one stripped cell text"""
+    key = (text, section) if registry.has_overrides else text
+    cached = registry.expansions.get(key)
+    if cached is not None:
+        return cached
+
+    entries = []
+    parts = [part for part in _SPLIT.split(text) if part]
+    if len(parts) > 1:
+        for part in parts:
+            subject_text, batch, span, is_lab = _parse_part(part)
+            match = registry.match(subject_text, section)
+            if match:
+                entries.append((match[0], _label(match[1], batch, is_lab), span))
+    if len(entries) < 2:
+        # One subject (or a name containing '&') - match the whole cell
+        subject_text, batch, span, is_lab = _parse_part(text)
+        match = registry.match(subject_text, section)
+        entries = [(match[0], _label(match[1], batch, is_lab), span)] if match else []
+
+    expanded = tuple((faculty, subject, offset)
+                     for faculty, subject, span in entries
+                     for offset in range(span))
+    if len(registry.expansions) >= _CACHE_SIZE:
+        registry.expansions.clear()
+    registry.expansions[key] = expanded
+    return expanded
@@ -0,0 +1,395 @@
+"""
+Compact binary snapshot of the normalized timetable and its indexes.
+
+Every published version gets one snapshot file, written once by the
+process that publishes it. Workers never parse or copy it: they mmap the
+file read-only (MappedSnapshot) and read columns, strings and indexes
+straight out of the mapped pages, so all gunicorn workers share the same
+page-cache memory and a worker's footprint doesn't grow with the
+timetable. Switching versions is the storage backend's pointer flip plus
+mapping another file.
+
+File layout (little-endian, every block 8-byte aligned):
+
+    b"GNTTSNP2" | u64 header length | JSON header | blocks...
+
+  - string table: u32 end offsets + one UTF-8 blob; every string in the
+    timetable (and every index key) is stored once
+  - columns: str -> u32 codes into the string table (0xFFFFFFFF = empty
+    cell), int -> int64, float -> float64, json -> u32 codes of the JSON
+    text of each cell (columns with mixed types)
+  - indexes ("postings"): sorted keys (u32 string codes), u32 bounds and
+    u32 values, i.e. key i -> values[bounds[i]:bounds[i + 1]]
+      Faculty / Class     name -> row positions (timetable order), plus a
+                          u64 digest of each name's rows so a worker can
+                          keep caches of names a new version didn't change
+      search_keys         search_index key -> faculty name ids
+      search_trigrams     trigram -> faculty name ids
+
+Faculty names are stripped on write, so names, rows and indexes agree.
+Reading needs only the standard library; numpy/pandas are imported by the
+writer and to_frame() alone, so serving workers never load them.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import uuid
+
+from search_index import search_tables
+
+SNAPSHOT_FILE = "timetable.snap"
+MAGIC = b"GNTTSNP2"
+NULL_CODE = 0xFFFFFFFF
+
+# numpy dtypes of the column kinds
+_DTYPES = {
+    "str": "<u4",
+    "int": "<i8",
+    "float": "<f8",
+    "json": "<u4",
+}
+# memoryview.cast formats of the same dtypes (native order = little-endian)
+_FORMATS = {"str": "I", "int": "q", "float": "d", "json": "I"}
+_U32 = "<u4"
+_U64 = "<u8"
+
+_NAN = float("nan")
+
+
+class SnapshotError(Exception):
+    """Snapshot file is unreadable or uses an unsupported layout"""
+
+
+def source_stamp(filepath):
+    """(mtime_ns, size) of the Excel file a snapshot was built from"""
+    st = os.stat(filepath)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _pad(length):
+    return (-length) % 8
+
+
+def _column_kind(series):
+    import pandas as pd
+
+    if pd.api.types.is_bool_dtype(series):
+        return "json"
+    if pd.api.types.is_integer_dtype(series):
+        return "int"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    if all(isinstance(value, str) for value in series.dropna()):
+        return "str"
+    return "json"
+
+
+def _strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+class _Writer:
+    """Interned string table plus the aligned blocks of one snapshot"""
+
+    def __init__(self):
+        self.strings = []
+        self.codes = {}
+        self.blocks = []
+        self.offset = 0
+
+    def intern(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def add(self, data):
+        """Append a block, returning its offset (relative to the end of the header)"""
+        offset = self.offset
+        self.blocks.append(data)
+        self.offset += len(data) + _pad(len(data))
+        return offset
+
+    def column(self, series, kind):
+        import numpy as np
+        import pandas as pd
+
+        if kind in ("int", "float"):
+            return np.ascontiguousarray(series.to_numpy(), dtype=_DTYPES[kind]).tobytes()
+        if kind == "json":
+            values = [None if pd.isna(value) else json.dumps(value.item() if isinstance(value, np.generic) else value,
+                                                             ensure_ascii=False, default=str)
+                      for value in series.astype(object)]
+            series = pd.Series(values, dtype=object)
+
+        codes, uniques = pd.factorize(series)
+        remap = np.array([self.intern(value) for value in uniques], dtype=np.int64)
+        values = np.where(codes < 0, NULL_CODE, remap[codes] if len(uniques) else 0)
+        return np.ascontiguousarray(values, dtype=_U32).tobytes()
+
+    def postings(self, mapping, row_hashes=None, seed=b""):
+        """
+        Header entry for {key: sorted ints}, keys sorted so readers can
+        bisect. With row_hashes the values are row positions and each key
+        also gets a digest of its rows (and of seed, the column names).
+        """
+        import numpy as np
+
+        keys = sorted(mapping)
+        bounds = np.zeros(len(keys) + 1, dtype=np.int64)
+        bounds[1:] = np.cumsum([len(mapping[key]) for key in keys])
+        values = np.concatenate([np.asarray(mapping[key], dtype=np.int64) for key in keys]) if keys else []
+        entry = {
+            "count": len(keys),
+            "keys": self.add(np.array([self.intern(key) for key in keys], dtype=_U32).tobytes()),
+            "bounds": self.add(bounds.astype(_U32).tobytes()),
+            "values": self.add(np.asarray(values, dtype=_U32).tobytes()),
+            "nvalues": int(bounds[-1]),
+        }
+        if row_hashes is not None:
+            digests = [hashlib.blake2b(seed + row_hashes[mapping[key]].tobytes(), digest_size=8).digest()
+                       for key in keys]
+            entry["digests"] = self.add(b"".join(digests))
+        return entry
+
+    def string_table(self):
+        import numpy as np
+
+        encoded = [s.encode("utf-8") for s in self.strings]
+        ends = np.cumsum([len(b) for b in encoded], dtype=np.int64) if encoded else np.zeros(0, dtype=np.int64)
+        blob = b"".join(encoded)
+        return {
+            "count": len(encoded),
+            "ends": self.add(ends.astype(_U32).tobytes()),
+            "blob": self.add(blob),
+            "blob_nbytes": len(blob),
+        }
+
+
+def _groups(series):
+    """{stripped name: sorted row positions} of the non-empty cells"""
+    names = series.dropna().astype(str).str.strip()
+    rows = names.index.to_numpy()
+    return {name: rows[positions] for name, positions in names.groupby(names, sort=False).indices.items()}
+
+
+def write_snapshot(df, path, source, version):
+    """Persist df and its indexes as a snapshot (atomically replaces path)"""
+    import pandas as pd
+
+    df = df.reset_index(drop=True)
+    if 'Faculty' in df.columns:
+        df = df.copy()
+        df['Faculty'] = df['Faculty'].map(_strip)
+
+    writer = _Writer()
+    columns = []
+    for name in df.columns:
+        kind = _column_kind(df[name])
+        data = writer.column(df[name], kind)
+        columns.append({"name": str(name), "kind": kind, "offset": writer.add(data), "nbytes": len(data)})
+
+    # Per-row content hashes for the name digests
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=_U64)
+    seed = json.dumps([column["name"] for column in columns]).encode("utf-8")
+
+    indexes = {}
+    if 'Faculty' in df.columns:
+        faculty = _groups(df['Faculty'])
+        names = sorted(faculty)
+        indexes['Faculty'] = writer.postings(faculty, row_hashes, seed)
+        keys, trigrams = search_tables(names)
+        indexes['search_keys'] = writer.postings(keys)
+        indexes['search_trigrams'] = writer.postings(trigrams)
+    if 'Class' in df.columns:
+        indexes['Class'] = writer.postings(_groups(df['Class']), row_hashes, seed)
+
+    header = {
+        "version": version,
+        "source": list(source) if source is not None else None,
+        "rows": len(df),
+        "columns": columns,
+        "indexes": indexes,
+        "strings": writer.string_table(),
+    }
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    header_bytes += b" " * _pad(len(header_bytes))
+
+    # Unique temp name so concurrent workers never clobber each other
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for data in writer.blocks:
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+        # On disk before anyone can be pointed at it
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return True
+
+
+def read_header(path):
+    """Read only the JSON header (cheap staleness check)"""
+    with open(path, "rb") as f:
+        if f.read(8) != MAGIC:
+            raise SnapshotError(f"{path} is not a timetable snapshot (or an older layout)")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        return json.loads(f.read(header_len))
+
+
+class Postings:
+    """Sorted key -> u32 values index of a mapped snapshot"""
+
+    def __init__(self, snapshot, keys, bounds, values, count, digests=None):
+        self._snapshot = snapshot
+        self._keys = keys
+        self._bounds = bounds
+        self._values = values
+        self._digests = digests
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def key(self, i):
+        return self._snapshot.string(self._keys[i])
+
+    def keys(self):
+        return [self.key(i) for i in range(self.count)]
+
+    def __getitem__(self, i):
+        """Values of key i (a read-only view into the mapped file)"""
+        return self._values[self._bounds[i]:self._bounds[i + 1]]
+
+    def digest(self, i):
+        """Digest of key i's rows (None if this index has no digests)"""
+        return self._digests[i] if self._digests is not None else None
+
+    def _bisect(self, text):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < text:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key):
+        """Index of key, or None"""
+        i = self._bisect(key)
+        return i if i < self.count and self.key(i) == key else None
+
+    def get(self, key):
+        i = self.find(key)
+        return self[i] if i is not None else ()
+
+    def prefix_range(self, prefix):
+        """Indexes of every key starting with prefix"""
+        return range(self._bisect(prefix), self._bisect(prefix + "\U0010ffff"))
+
+
+class MappedSnapshot:
+    """Read-only, zero-copy view of a snapshot file (stdlib only)"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:8] != MAGIC:
+            mm.close()
+            raise SnapshotError(f"{path} is not a timetable snapshot (or an older layout)")
+        (header_len,) = struct.unpack("<Q", mm[8:16])
+        header = json.loads(mm[16:16 + header_len])
+        self._mm = mm
+        self._base = 16 + header_len
+        view = memoryview(mm)
+        self._view = view
+
+        self.header = header
+        self.version = header["version"]
+        self.rows = header["rows"]
+        self.columns = [column["name"] for column in header["columns"]]
+        self._kinds = {column["name"]: column["kind"] for column in header["columns"]}
+
+        strings = header["strings"]
+        self._ends = self._block(strings["ends"], strings["count"] * 4, "I")
+        self._blob = self._block(strings["blob"], strings["blob_nbytes"])
+        self._decoded = [None] * strings["count"]
+
+        self._data = {column["name"]: self._block(column["offset"], column["nbytes"], _FORMATS[column["kind"]])
+                      for column in header["columns"]}
+
+    def _block(self, offset, nbytes, fmt=None):
+        start = self._base + offset
+        block = self._view[start:start + nbytes]
+        return block.cast(fmt) if fmt else block
+
+    def string(self, code):
+        """String-table entry (decoded once per process)"""
+        value = self._decoded[code]
+        if value is None:
+            start = self._ends[code - 1] if code else 0
+            value = self._decoded[code] = str(self._blob[start:self._ends[code]], "utf-8")
+        return value
+
+    def value(self, column, pos):
+        kind = self._kinds[column]
+        value = self._data[column][pos]
+        if kind in ("int", "float"):
+            return value
+        if value == NULL_CODE:
+            return _NAN
+        return self.string(value) if kind == "str" else json.loads(self.string(value))
+
+    def record(self, pos):
+        """Row as a dict (same values as DataFrame.to_dict: NaN for empty cells)"""
+        return {column: self.value(column, pos) for column in self.columns}
+
+    def index(self, name):
+        """Postings of a named index, or None if the snapshot has none"""
+        entry = self.header["indexes"].get(name)
+        if entry is None:
+            return None
+        digests = entry.get("digests")
+        return Postings(self,
+                        self._block(entry["keys"], entry["count"] * 4, "I"),
+                        self._block(entry["bounds"], (entry["count"] + 1) * 4, "I"),
+                        self._block(entry["values"], entry["nvalues"] * 4, "I"),
+                        entry["count"],
+                        self._block(digests, entry["count"] * 8, "Q") if digests is not None else None)
+
+    def to_frame(self):
+        """Copy the rows into a DataFrame (exports, clash detection)"""
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        strings = None
+        for column in self.header["columns"]:
+            name, kind = column["name"], column["kind"]
+            values = np.frombuffer(self._mm, dtype=_DTYPES[kind], count=self.rows,
+                                   offset=self._base + column["offset"]).copy()
+            if kind == "str":
+                if strings is None:
+                    strings = np.array([self.string(code) for code in range(len(self._decoded))] + [np.nan],
+                                       dtype=object)
+                # NULL_CODE -> trailing NaN entry of the string table
+                values = strings[np.minimum(values, len(strings) - 1)]
+            elif kind == "json":
+                values = np.array([self.value(name, pos) for pos in range(self.rows)], dtype=object)
+            data[name] = values
+        return pd.DataFrame(data, columns=self.columns)
+
+
+def read_snapshot(path):
+    """Load a snapshot back into a DataFrame. Returns (header, df)."""
+    snapshot = MappedSnapshot(path)
+    return snapshot.header, snapshot.to_frame()
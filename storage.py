@@ -0,0 +1,374 @@
+"""
+Timetable storage backends.
+
+Everything that reads or writes published timetables goes through one
+small interface, so the app doesn't care where the rows live:
+
+    fingerprint()                 cheap "has the live version changed?" key
+    snapshot_path()               the live version's mmap-able snapshot file
+    load()                        (version, df, source) of the live version
+    publish(df, staged_path, meta) store a new version and make it live
+    list_versions()               meta of every version, newest first
+    rollback(version)             make an older version live again
+
+Two backends:
+
+  - SQLiteStorage (default): rows in an SQLite database in WAL mode, with
+    indexes on faculty, day/period and class. A publish is one bulk
+    executemany inside a transaction; readers are never blocked by it.
+    Excel is only an import/export format here. Snapshots live in
+    snapshots/<version>.snap next to the database.
+  - FileStorage: the versioned directories of timetable_versions.py
+    (timetable.xlsx + binary snapshot per version).
+
+Both write the snapshot when they publish; snapshot_path() only builds one
+for versions that don't have it yet (imported, or from an older release).
+
+Pick one with TIMETABLE_STORAGE=sqlite|files. TIMETABLE_DB moves the
+database (on Railway, point it at a volume - the temp folder is wiped on
+every restart).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import timed
+from snapshot import SNAPSHOT_FILE, SnapshotError, read_header, read_snapshot, source_stamp, write_snapshot
+from timetable_versions import (KEEP_VERSIONS, TIMETABLE_FILE, VERSION_FILE, _fsync_dir, current_version,
+                                list_versions, new_version_id, publish, rollback, version_dir)
+
+DATABASE_FILE = "timetable.db"
+SNAPSHOT_DIR = "snapshots"
+
+# Timetable columns with their own (indexed) database column; anything
+# else a sheet has is kept per row as a JSON list in `extra`
+_COLUMNS = {'Faculty': 'faculty', 'Day': 'day', 'Period': 'period',
+            'Class': 'class_name', 'Subject': 'subject', 'Room': 'room'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    version TEXT PRIMARY KEY,
+    published REAL NOT NULL,
+    columns TEXT NOT NULL,
+    meta TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    version TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    faculty, day, period, class_name, subject, room, extra,
+    PRIMARY KEY (version, pos)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_faculty ON entries (version, faculty);
+CREATE INDEX IF NOT EXISTS idx_entries_slot ON entries (version, day, period);
+CREATE INDEX IF NOT EXISTS idx_entries_class ON entries (version, class_name);
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _cell(value):
+    """Python value SQLite can store (NaN/NaT -> NULL)"""
+    if hasattr(value, 'dtype') and hasattr(value, 'item'):
+        value = value.item()  # numpy scalar
+    if value is None or value != value:
+        return None
+    if isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+class SQLiteStorage:
+    """Published versions in one SQLite database (one connection per thread)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshot_dir = os.path.join(os.path.dirname(os.path.abspath(path)), SNAPSHOT_DIR)
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        """This thread's connection (reopened after a gunicorn fork)"""
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is None or local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn, local.pid = conn, os.getpid()
+        return conn
+
+    def current_version(self):
+        row = self._connect().execute("SELECT value FROM state WHERE key = 'current'").fetchone()
+        return row[0] if row else None
+
+    def fingerprint(self):
+        # Versions are immutable, so the live version id is the whole key
+        return self.current_version()
+
+    def _snapshot_file(self, version):
+        return os.path.join(self.snapshot_dir, f"{version}.snap")
+
+    def _write_snapshot(self, version, df):
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        with timed("publish", "snapshot"):
+            write_snapshot(df, self._snapshot_file(version), None, version)
+            _fsync_dir(self.snapshot_dir)
+
+    def snapshot_path(self):
+        version = self.current_version()
+        if version is None:
+            return None
+        path = self._snapshot_file(version)
+        try:
+            if read_header(path)["version"] == version:
+                return path
+        except FileNotFoundError:
+            pass
+        except (SnapshotError, ValueError, KeyError) as e:
+            print(f"⚠️ Rebuilding unreadable snapshot: {e}")
+        self._write_snapshot(version, self._load(version))
+        return path
+
+    def load(self):
+        version = self.current_version()
+        if version is None:
+            return None, None, None
+        return version, self._load(version), "sqlite"
+
+    def _load(self, version):
+        import numpy as np
+        import pandas as pd
+
+        conn = self._connect()
+        (columns,) = conn.execute("SELECT columns FROM versions WHERE version = ?", (version,)).fetchone()
+        columns = json.loads(columns)
+
+        rows = conn.execute(
+            "SELECT faculty, day, period, class_name, subject, room, extra "
+            "FROM entries WHERE version = ? ORDER BY pos", (version,)).fetchall()
+        fields = list(zip(*rows)) if rows else [()] * 7
+        dedicated = dict(zip(_COLUMNS, fields[:6]))
+        extras = [json.loads(extra) if extra else None for extra in fields[6]]
+
+        data = {}
+        extra_index = 0
+        for name in columns:
+            if name in dedicated:
+                data[name] = list(dedicated[name])
+            else:
+                data[name] = [extra[extra_index] if extra else None for extra in extras]
+                extra_index += 1
+        df = pd.DataFrame(data, columns=columns)
+        # Same empty cells as read_excel: NaN, not None
+        return df.fillna(np.nan)
+
+    def publish(self, df, staged_path, meta=None):
+        """Store df (or the raw staged workbook if df is None) as the live version"""
+        if df is None:
+            import pandas as pd
+            with timed("publish", "excel_parse"):
+                df = pd.read_excel(staged_path)
+        version = new_version_id()
+        meta = dict(meta or {})
+        meta.update(version=version, published=time.time(), rows=len(df))
+
+        # The snapshot is written (and fsynced) before `current` flips, so a
+        # worker that sees the new version never has to build it itself
+        self._write_snapshot(version, df)
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            with timed("publish", "insert"):
+                self._insert(conn, version, df, meta)
+            conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('current', ?)", (version,))
+            pruned = self._prune(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            try:
+                os.remove(self._snapshot_file(version))
+            except FileNotFoundError:
+                pass
+            raise
+
+        for old in pruned:
+            # Workers still mapping it keep their pages until they move on
+            try:
+                os.remove(self._snapshot_file(old))
+            except FileNotFoundError:
+                pass
+        return version
+
+    def _insert(self, conn, version, df, meta):
+        columns = [str(name) for name in df.columns]
+        extra_columns = [name for name in columns if name not in _COLUMNS]
+        conn.execute("INSERT INTO versions (version, published, columns, meta) VALUES (?, ?, ?, ?)",
+                     (version, meta['published'], json.dumps(columns), json.dumps(meta, default=str)))
+
+        frame = df.copy()
+        frame.columns = columns
+        frame = frame.astype(object).where(frame.notna(), None)
+        values = {name: frame[name].tolist() if name in frame.columns else [None] * len(frame)
+                  for name in list(_COLUMNS) + extra_columns}
+
+        def rows():
+            for pos in range(len(frame)):
+                extra = None
+                if extra_columns:
+                    extra = json.dumps([_cell(values[name][pos]) for name in extra_columns], default=str)
+                yield (version, pos) + tuple(_cell(values[name][pos]) for name in _COLUMNS) + (extra,)
+
+        conn.executemany(
+            "INSERT INTO entries (version, pos, faculty, day, period, class_name, subject, room, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows())
+
+    def _prune(self, conn, keep=KEEP_VERSIONS):
+        """Delete the oldest versions beyond `keep` (never the live one); returns their ids"""
+        stale = conn.execute(
+            "SELECT version FROM versions WHERE version != (SELECT value FROM state WHERE key = 'current') "
+            "ORDER BY published DESC, version DESC LIMIT -1 OFFSET ?", (keep - 1,)).fetchall()
+        for (version,) in stale:
+            conn.execute("DELETE FROM entries WHERE version = ?", (version,))
+            conn.execute("DELETE FROM versions WHERE version = ?", (version,))
+        return [version for (version,) in stale]
+
+    def list_versions(self):
+        live = self.current_version()
+        versions = []
+        for (meta,) in self._connect().execute("SELECT meta FROM versions ORDER BY published DESC, version DESC"):
+            meta = json.loads(meta)
+            meta['current'] = meta['version'] == live
+            versions.append(meta)
+        return versions
+
+    def rollback(self, version):
+        conn = self._connect()
+        row = conn.execute("SELECT meta FROM versions WHERE version = ?", (version,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown timetable version: {version}")
+        conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('current', ?)", (version,))
+        return json.loads(row[0])
+
+    def import_from(self, other):
+        """One-off copy of another backend's live version into an empty database"""
+        version, df, source = other.load()
+        if df is None:
+            return None
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have imported it while we were loading
+            if conn.execute("SELECT 1 FROM state WHERE key = 'current'").fetchone():
+                conn.execute("ROLLBACK")
+                return None
+            meta = {'version': version, 'published': time.time(), 'rows': len(df),
+                    'filename': "Imported from the upload folder"}
+            self._insert(conn, version, df, meta)
+            conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES ('current', ?)", (version,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        print(f"🗄️ Imported timetable version {version} ({len(df)} rows) into {self.path}")
+        return version
+
+
+class FileStorage:
+    """Versioned directories with timetable.xlsx + snapshot (see timetable_versions.py)"""
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def fingerprint(self):
+        """Cheap stat-based key; None when nothing has been uploaded"""
+        try:
+            st = os.stat(os.path.join(self.folder, VERSION_FILE))
+            return ("version", st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            pass
+
+        # Legacy folder: a bare timetable.xlsx without versions
+        try:
+            st = os.stat(os.path.join(self.folder, TIMETABLE_FILE))
+        except FileNotFoundError:
+            return None
+        return ("legacy", st.st_mtime_ns, st.st_size)
+
+    def _live(self):
+        """(directory, version) of the live timetable.xlsx"""
+        key = self.fingerprint()
+        if key is None:
+            return None, None
+        version = current_version(self.folder) if key[0] == "version" else None
+        if version:
+            return version_dir(self.folder, version), version
+        return self.folder, "initial"
+
+    def snapshot_path(self):
+        directory, version = self._live()
+        if directory is None:
+            return None
+        return self._fresh_snapshot(directory, version)[0]
+
+    def load(self):
+        directory, version = self._live()
+        if directory is None:
+            return None, None, None
+        snap_path, df = self._fresh_snapshot(directory, version)
+        if df is not None:
+            return version, df, "excel"
+        return version, read_snapshot(snap_path)[1], "snapshot"
+
+    def _fresh_snapshot(self, directory, version):
+        """
+        Snapshot path, rebuilt from timetable.xlsx if it's missing or was
+        written for another copy of the workbook. Returns (path, the parsed
+        df if the workbook had to be read, else None).
+        """
+        filepath = os.path.join(directory, TIMETABLE_FILE)
+        snap_path = os.path.join(directory, SNAPSHOT_FILE)
+        stamp = source_stamp(filepath)
+
+        try:
+            if read_header(snap_path)["source"] == stamp:
+                return snap_path, None
+        except FileNotFoundError:
+            pass
+        except (SnapshotError, ValueError, KeyError) as e:
+            print(f"⚠️ Rebuilding unreadable snapshot: {e}")
+
+        import pandas as pd
+        with timed("load", "excel_parse"):
+            df = pd.read_excel(filepath)
+        # Written once; the next worker/restart maps it instead of running openpyxl
+        write_snapshot(df, snap_path, stamp, version)
+        return snap_path, df
+
+    def publish(self, df, staged_path, meta=None):
+        return publish(self.folder, df, staged_path, meta)
+
+    def list_versions(self):
+        return list_versions(self.folder)
+
+    def rollback(self, version):
+        return rollback(self.folder, version)
+
+
+def open_storage(folder):
+    """Backend picked by TIMETABLE_STORAGE (sqlite by default)"""
+    kind = os.environ.get("TIMETABLE_STORAGE", "sqlite").lower()
+    if kind == "files":
+        return FileStorage(folder)
+    if kind != "sqlite":
+        raise ValueError(f"Unknown TIMETABLE_STORAGE: {kind} (use 'sqlite' or 'files')")
+
+    storage = SQLiteStorage(os.environ.get("TIMETABLE_DB") or os.path.join(folder, DATABASE_FILE))
+    if storage.current_version() is None:
+        # Folder from before the database: bring its live timetable along
+        storage.import_from(FileStorage(folder))
+    return storage
@@ -0,0 +1,246 @@
+"""
+Subject/faculty mapping registry.
+
+The subject code -> faculty and code -> full name tables used to be dicts
+copy-pasted into every converter, matched with `if code in text` scans
+where dict order decided the winner ("SE" also hits inside other words).
+They now live in a mapping sheet:
+
+    Code | Subject | Faculty | Section | Aliases
+
+  - one row per code; Aliases are extra spellings separated by "|"
+    (the full subject name is always an alias),
+  - rows with a Section give that section's faculty for the code
+    (section overrides).
+
+The shipped subjects.csv is the default; an HOD can upload their own
+(saved as UPLOAD_FOLDER/subjects.csv). A registry is compiled once per file
+version into a token trie: cell text is split into letter/digit tokens and
+codes/names match whole tokens only, so lookups are a few dict hits and
+"COS" no longer matches "OS". When one cell names several subjects, the
+one listed first in the sheet wins (same as the old dict order).
+"""
+import hashlib
+import os
+import re
+import threading
+
+import pandas as pd
+
+REGISTRY_FILE = "subjects.csv"
+DEFAULT_REGISTRY = os.path.join(os.path.dirname(os.path.abspath(__file__)), REGISTRY_FILE)
+
+REGISTRY_COLUMNS = ['Code', 'Subject', 'Faculty', 'Section', 'Aliases']
+
+_TOKENS = re.compile(r"[A-Z]+|[0-9]+")
+
+# Distinct cell texts remembered per registry
+_TEXT_CACHE_SIZE = 65536
+
+
+def tokenize(text):
+    """'FSD Lab(Batch-1)' -> ['FSD', 'LAB', 'BATCH', '1']"""
+    return _TOKENS.findall(str(text).upper())
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value).strip()
+
+
+class SubjectEntry:
+    __slots__ = ('code', 'name', 'faculty', 'priority')
+
+    def __init__(self, code, name, faculty, priority):
+        self.code = code
+        self.name = name
+        self.faculty = faculty
+        self.priority = priority
+
+
+class SubjectRegistry:
+    """Compiled mapping: exact-token trie over codes, names and aliases"""
+
+    def __init__(self, rows):
+        """rows: dicts with Code, Subject, Faculty, Section, Aliases (any may be blank)"""
+        self.entries = []
+        self._by_code = {}
+        self._overrides = {}  # (code, section lower) -> faculty
+        self._trie = {}
+        self._cache = {}
+        self.expansions = {}  # cell text -> expanded slot entries (slot_expressions.py)
+        canonical = []
+
+        pending = []
+        for row in rows:
+            code = _text(row.get('Code')).upper()
+            if not code:
+                continue
+            name = _text(row.get('Subject'))
+            faculty = _text(row.get('Faculty'))
+            section = _text(row.get('Section'))
+            aliases = [alias.strip() for alias in _text(row.get('Aliases')).split('|') if alias.strip()]
+            canonical.append((code, name, faculty, section, "|".join(aliases)))
+
+            if section:
+                pending.append((code, section, faculty))
+                continue
+            if code in self._by_code:
+                raise ValueError(f"Subject code {code} is listed twice")
+
+            entry = SubjectEntry(code, name or code, faculty or None, len(self.entries))
+            self.entries.append(entry)
+            self._by_code[code] = entry
+            for key in [code, name] + aliases:
+                self._add_key(tokenize(key), entry.priority)
+
+        for code, section, faculty in pending:
+            if code not in self._by_code:
+                # Override for a code with no main row - still a known subject
+                entry = SubjectEntry(code, code, None, len(self.entries))
+                self.entries.append(entry)
+                self._by_code[code] = entry
+                self._add_key(tokenize(code), entry.priority)
+            self._overrides[(code, section.lower())] = faculty or None
+
+        self.rows = canonical
+        self.version = hashlib.sha1(repr(canonical).encode()).hexdigest()[:12]
+
+    def _add_key(self, tokens, priority):
+        if not tokens:
+            return
+        node = self._trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        # A key shared by two subjects belongs to the one listed first
+        node.setdefault(None, priority)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def has_overrides(self):
+        return bool(self._overrides)
+
+    def get(self, code):
+        """Entry for an exact code, or None"""
+        return self._by_code.get(_text(code).upper())
+
+    def find(self, text):
+        """Entries named in a cell, in registry order (leftmost-longest token matches)"""
+        found = self._cache.get(text)
+        if found is not None:
+            return found
+
+        tokens = tokenize(text)
+        matches = set()
+        i = 0
+        while i < len(tokens):
+            node = self._trie
+            best, end = None, i
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if None in node:
+                    best, end = node[None], j + 1
+            if best is None:
+                i += 1
+            else:
+                matches.add(best)
+                i = end
+
+        found = tuple(self.entries[priority] for priority in sorted(matches))
+        if len(self._cache) >= _TEXT_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[text] = found
+        return found
+
+    def faculty_for(self, entry, section=None):
+        if section is not None and self._overrides:
+            key = (entry.code, str(section).strip().lower())
+            if key in self._overrides:
+                return self._overrides[key]
+        return entry.faculty
+
+    def match(self, text, section=None):
+        """(faculty, subject name) for one cell text, or None"""
+        for entry in self.find(text):
+            faculty = self.faculty_for(entry, section)
+            if faculty:
+                return faculty, entry.name
+        return None
+
+    def subject_name(self, text):
+        """Full name of the first subject named in text (text itself if none)"""
+        found = self.find(text)
+        return found[0].name if found else text
+
+
+def read_registry(path):
+    """Compile a mapping sheet (.csv, .xlsx or .xls)"""
+    if str(path).lower().endswith('.csv'):
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(path, dtype=str)
+
+    columns = {str(col).strip().lower(): col for col in df.columns}
+    if 'subject' not in columns and 'name' in columns:
+        columns['subject'] = columns['name']
+    if 'code' not in columns:
+        raise ValueError("Mapping sheet needs a 'Code' column")
+
+    rows = []
+    for record in df.to_dict(orient="records"):
+        rows.append({col: record.get(columns[col.lower()]) if col.lower() in columns else None
+                     for col in REGISTRY_COLUMNS})
+    return SubjectRegistry(rows)
+
+
+# ============= PER-VERSION CACHE =============
+_lock = threading.Lock()
+_compiled = {}  # path -> (stat key, SubjectRegistry)
+
+
+def load_registry(path=DEFAULT_REGISTRY):
+    """Compiled registry for a file, rebuilt only when the file changes"""
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size, st.st_ino)
+    cached = _compiled.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+    with _lock:
+        cached = _compiled.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        registry = read_registry(path)
+        _compiled[path] = (key, registry)
+        print(f"📚 Loaded subject registry {registry.version} ({len(registry)} subjects) from {path}")
+        return registry
+
+
+def registry_path(folder=None):
+    """The uploaded mapping in folder if there is one, otherwise the default"""
+    if folder:
+        uploaded = os.path.join(folder, REGISTRY_FILE)
+        if os.path.exists(uploaded):
+            return uploaded
+    return DEFAULT_REGISTRY
+
+
+def get_registry(folder=None):
+    return load_registry(registry_path(folder))
+
+
+def save_registry(folder, source_path):
+    """Validate an uploaded mapping sheet and make it the folder's registry"""
+    registry = read_registry(source_path)
+    if not len(registry):
+        raise ValueError("No subject codes found in the mapping sheet")
+
+    target = os.path.join(folder, REGISTRY_FILE)
+    tmp_path = target + ".tmp"
+    pd.DataFrame(registry.rows, columns=REGISTRY_COLUMNS).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, target)
+    return load_registry(target)
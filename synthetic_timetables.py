@@ -0,0 +1,193 @@
+"""
+Synthetic timetables for benchmarks, from one section to a whole university.
+
+    python synthetic_timetables.py college --format matrix -o college.xlsx
+
+writes the workbook plus a matching subjects.csv (subject registry) next
+to it. The three upload formats the app understands:
+
+  - app:     one Faculty/Day/Period/Class/Subject/Room sheet
+  - college: one sheet per section (DAY, P1..P6 with subject codes) plus
+             a faculty details sheet
+  - matrix:  one sheet, sections stacked under "Section: X" label rows
+
+Every department has 12 sections and 8 subjects; each faculty takes one
+subject in 3 sections (section rows in the registry say who), and a few
+cells are combined ("A/B") or two-period labs ("A Lab x2") so slot
+expansion is exercised too. Output depends only on (scale, seed).
+"""
+import argparse
+import os
+import random
+
+import pandas as pd
+
+from faculty_grid import DAYS
+
+SCALES = {
+    'section': 1,
+    'department': 12,
+    'college': 120,
+    'university': 1200,
+}
+FORMATS = ('app', 'college', 'matrix')
+
+SECTIONS_PER_DEPARTMENT = 12
+SUBJECTS_PER_DEPARTMENT = 8
+SECTIONS_PER_FACULTY = 3
+PERIODS = 6
+
+_DEPARTMENTS = ['CSE', 'ECE', 'EEE', 'MECH', 'CIVIL', 'IT', 'AIML', 'CSD', 'CYBER', 'MBA']
+_YEARS = ['I', 'II', 'III', 'IV']
+_GIVEN = ['Anil', 'Bhavana', 'Chandra', 'Deepa', 'Eshwar', 'Farah', 'Gopal', 'Harini', 'Imran',
+          'Jyothi', 'Kiran', 'Lakshmi', 'Mahesh', 'Nandini', 'Omkar', 'Pavani', 'Rajesh', 'Sandhya',
+          'Tarun', 'Uma', 'Venkat', 'Yamini']
+_SURNAMES = ['Reddy', 'Rao', 'Sharma', 'Kumar', 'Naidu', 'Varma', 'Iyer', 'Gupta', 'Prasad',
+             'Saleem', 'Khan', 'Das', 'Patel', 'Menon', 'Joshi', 'Pillai']
+_TOPICS = ['Mathematics', 'Networks', 'Databases', 'Systems', 'Circuits', 'Design', 'Analysis',
+           'Machines', 'Programming', 'Security']
+
+
+def section_name(index):
+    department = index // SECTIONS_PER_DEPARTMENT
+    within = index % SECTIONS_PER_DEPARTMENT
+    suffix = str(department // len(_DEPARTMENTS) + 1) if department >= len(_DEPARTMENTS) else ""
+    return f"{_DEPARTMENTS[department % len(_DEPARTMENTS)]}{suffix}-{_YEARS[within // 3]}-{'ABC'[within % 3]}"
+
+
+def faculty_name(index):
+    """Distinct, realistic-looking names: 'Dr. K. Harini Reddy'"""
+    given = _GIVEN[index % len(_GIVEN)]
+    surname = _SURNAMES[(index // len(_GIVEN)) % len(_SURNAMES)]
+    initial = chr(ord('A') + (index // (len(_GIVEN) * len(_SURNAMES))) % 26)
+    title = 'Dr.' if index % 3 == 0 else ('Mrs.' if index % 3 == 1 else 'Mr.')
+    return f"{title} {initial}. {given} {surname}"
+
+
+class SyntheticTimetable:
+    """Registry rows and the weekly grid of every section"""
+
+    def __init__(self, sections, seed=0):
+        rng = random.Random(seed)
+        self.sections = [section_name(i) for i in range(sections)]
+        self.registry_rows = []
+        self.faculty = {}  # (code, section) -> faculty
+        self.subjects = {}  # code -> name
+        self.grid = {}  # section -> {day: [cell text or None] * PERIODS}
+
+        departments = -(-sections // SECTIONS_PER_DEPARTMENT)
+        next_faculty = 0
+        for department in range(departments):
+            dept_sections = self.sections[department * SECTIONS_PER_DEPARTMENT:(department + 1) * SECTIONS_PER_DEPARTMENT]
+            for k in range(SUBJECTS_PER_DEPARTMENT):
+                code = f"SUB{department:03d}{k}"
+                name = f"{_TOPICS[(department + k) % len(_TOPICS)]} {k + 1} ({_DEPARTMENTS[department % len(_DEPARTMENTS)]})"
+                self.subjects[code] = name
+                for i, section in enumerate(dept_sections):
+                    if i % SECTIONS_PER_FACULTY == 0:
+                        teacher = faculty_name(next_faculty)
+                        next_faculty += 1
+                    self.faculty[(code, section)] = teacher
+                    if i == 0:
+                        self.registry_rows.append({'Code': code, 'Subject': name, 'Faculty': teacher,
+                                                   'Section': '', 'Aliases': ''})
+                    else:
+                        self.registry_rows.append({'Code': code, 'Subject': '', 'Faculty': teacher,
+                                                   'Section': section, 'Aliases': ''})
+
+            codes = [f"SUB{department:03d}{k}" for k in range(SUBJECTS_PER_DEPARTMENT)]
+            for section in dept_sections:
+                week = {}
+                for day in DAYS:
+                    cells = []
+                    period = 0
+                    while period < PERIODS:
+                        roll = rng.random()
+                        if roll < 0.08:
+                            cells.append(None)  # free period
+                        elif roll < 0.12:
+                            a, b = rng.sample(codes, 2)
+                            cells.append(f"{a}/{b}")
+                        elif roll < 0.16 and period < PERIODS - 1:
+                            cells.extend([f"{rng.choice(codes)} Lab x2", None])
+                            period += 1
+                        else:
+                            cells.append(rng.choice(codes))
+                        period += 1
+                    week[day] = cells
+                self.grid[section] = week
+
+    def registry_frame(self):
+        return pd.DataFrame(self.registry_rows, columns=['Code', 'Subject', 'Faculty', 'Section', 'Aliases'])
+
+    def app_frame(self):
+        """The normalized table the converters should produce (plus Room)"""
+        rows = []
+        for s, section in enumerate(self.sections):
+            for day, cells in self.grid[section].items():
+                for period, text in enumerate(cells, start=1):
+                    if text is None:
+                        continue
+                    span = 2 if text.endswith(" Lab x2") else 1
+                    for code in text.replace(" Lab x2", "").split("/"):
+                        for offset in range(span):
+                            rows.append({'Faculty': self.faculty[(code, section)], 'Day': day,
+                                         'Period': period + offset, 'Class': section,
+                                         'Subject': self.subjects[code] + (" Lab" if span == 2 else ""),
+                                         'Room': f"R{s // SECTIONS_PER_DEPARTMENT:03d}-{s % SECTIONS_PER_DEPARTMENT:02d}"})
+        return pd.DataFrame(rows, columns=['Faculty', 'Day', 'Period', 'Class', 'Subject', 'Room'])
+
+    def _day_rows(self, section):
+        for day, cells in self.grid[section].items():
+            yield [day[:3].upper()] + cells
+
+    def write(self, path, fmt):
+        """Write the workbook in one of FORMATS and subjects.csv next to it"""
+        from openpyxl import Workbook
+
+        self.registry_frame().to_csv(os.path.join(os.path.dirname(os.path.abspath(path)), "subjects.csv"),
+                                     index=False)
+        if fmt == 'app':
+            self.app_frame().to_excel(path, index=False)
+            return path
+
+        # write_only keeps memory flat for a 1200-sheet university workbook
+        workbook = Workbook(write_only=True)
+        header = [f"Period {p}" for p in range(1, PERIODS + 1)]
+        if fmt == 'college':
+            for section in self.sections:
+                sheet = workbook.create_sheet(section[:31])
+                sheet.append(['DAY'] + [f"P{p}" for p in range(1, PERIODS + 1)])
+                for row in self._day_rows(section):
+                    sheet.append(row)
+            details = workbook.create_sheet("Faculty Details")
+            details.append(['Code', 'Subject'])
+            for code, name in self.subjects.items():
+                details.append([code, name])
+        elif fmt == 'matrix':
+            sheet = workbook.create_sheet("Timetable")
+            sheet.append(['Day'] + header + [f"Section: {self.sections[0]}"])
+            for i, section in enumerate(self.sections):
+                if i:
+                    sheet.append([f"Section: {section}"])
+                for row in self._day_rows(section):
+                    sheet.append(row)
+        else:
+            raise ValueError(f"Unknown format: {fmt} (use one of {', '.join(FORMATS)})")
+        workbook.save(path)
+        return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic timetable workbook")
+    parser.add_argument("scale", choices=list(SCALES), help="how many sections")
+    parser.add_argument("--format", choices=FORMATS, default='college')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    output = args.output or f"synthetic_{args.scale}_{args.format}.xlsx"
+    timetable = SyntheticTimetable(SCALES[args.scale], args.seed)
+    timetable.write(output, args.format)
+    print(f"✅ {output}: {len(timetable.sections)} sections, {len(timetable.app_frame())} timetable rows, "
+          f"{len(set(timetable.faculty.values()))} faculty (+ subjects.csv)")
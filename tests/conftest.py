@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def timetable_frame(extra=None):
+    """A small timetable in the app format: two faculty, two sections, a NaN room"""
+    rows = [
+        ('Mr. MD. Saleem', 'Monday', 1, 'CSE-A', 'Operating Systems', 'R101'),
+        ('Mr. MD. Saleem', 'Monday', 2, 'CSE-B', 'Operating Systems', 'R102'),
+        ('Mr. MD. Saleem', 'Tuesday', 5, 'CSE-A', 'Operating Systems Lab', 'LAB1'),
+        ('Mr. K. Mathivanan', 'Monday', 1, 'CSE-B', 'Computer Networks', np.nan),
+        ('Mr. K. Mathivanan', 'Wednesday', 3, 'CSE-A', 'Computer Networks', 'R101'),
+    ]
+    rows += extra or []
+    return pd.DataFrame(rows, columns=['Faculty', 'Day', 'Period', 'Class', 'Subject', 'Room'])
+
+
+@pytest.fixture(scope="session")
+def webapp(tmp_path_factory):
+    """app.py imported from an empty folder (it creates uploads/ and the database in its cwd)"""
+    folder = tmp_path_factory.mktemp("import")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(folder)
+        mp.delenv("RAILWAY_ENVIRONMENT", raising=False)
+        mp.delenv("TIMETABLE_DB", raising=False)
+        import app
+    return app
+
+
+@pytest.fixture(params=["sqlite", "files"])
+def storage(request, tmp_path):
+    from storage import FileStorage, SQLiteStorage
+
+    if request.param == "sqlite":
+        return SQLiteStorage(str(tmp_path / "timetable.db"))
+    return FileStorage(str(tmp_path))
+
+
+@pytest.fixture
+def client(webapp, storage, tmp_path, monkeypatch):
+    """Test client of the app on a fresh storage backend (both backends)"""
+    from exports import ExportCache
+    from live_slots import LiveFeed
+    from timetable_store import TimetableStore
+
+    store = TimetableStore(storage)
+    monkeypatch.setitem(webapp.app.config, "UPLOAD_FOLDER", str(tmp_path))
+    monkeypatch.setattr(webapp, "storage", storage)
+    monkeypatch.setattr(webapp, "timetable_store", store)
+    monkeypatch.setattr(webapp, "export_cache", ExportCache(str(tmp_path)))
+    monkeypatch.setattr(webapp, "live_feed", LiveFeed(store))
+    return webapp.app.test_client()
@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+from conftest import timetable_frame
+
+# A Monday, in period 1 (9:10-10:10)
+MONDAY_P1 = "2026-10-19T09:30"
+
+
+@pytest.fixture
+def published(webapp, client):
+    return webapp.storage.publish(timetable_frame(), None, {'filename': "cse.xlsx"})
+
+
+def revalidate(client, url, **kwargs):
+    """GET, then GET again with the ETag: (first response, second response)"""
+    first = client.get(url, **kwargs)
+    assert first.status_code == 200
+    assert first.headers["ETag"]
+    again = client.get(url, headers={"If-None-Match": first.headers["ETag"]}, **kwargs)
+    return first, again
+
+
+@pytest.mark.parametrize("url", [
+    "/api/faculty_list",
+    "/api/faculty?prefix=mr",
+    "/api/faculty/Saleem/timetable",
+    "/api/class/CSE-A/timetable",
+    "/api/timetables?faculty=*",
+    "/api/timetables?class=CSE-A,CSE-B&format=ndjson",
+    "/api/free_faculty?day=MON&period=1",
+    f"/api/now?at={MONDAY_P1}",
+])
+def test_etag_revalidation(client, published, url):
+    first, again = revalidate(client, url)
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_etag_changes_with_the_version(webapp, client, published):
+    url = "/api/faculty/Saleem/timetable"
+    first = client.get(url)
+    webapp.storage.publish(timetable_frame().head(2), None)
+
+    stale = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert stale.status_code == 200
+    assert stale.headers["ETag"] != first.headers["ETag"]
+    assert stale.get_json()['count'] == 2
+
+
+def test_etag_depends_on_the_query(client, published):
+    a = client.get("/api/class/CSE-A/timetable")
+    b = client.get("/api/class/CSE-B/timetable", headers={"If-None-Match": a.headers["ETag"]})
+    assert b.status_code == 200
+    assert b.get_json()['class'] == 'CSE-B'
+
+
+def test_no_timetable(client):
+    assert client.get("/api/faculty_list").get_json() == []
+    assert client.get("/api/faculty/Saleem/timetable").status_code == 404
+    assert client.get("/api/now").status_code == 404
+
+
+def test_faculty_timetable(client, published):
+    payload = client.get("/api/faculty/Saleem/timetable").get_json()
+    assert payload['version'] == published
+    assert payload['faculty'] == ['Mr. MD. Saleem']
+    assert payload['count'] == 3
+    assert payload['grid']['Tuesday']['5'][0]['Subject'] == 'Operating Systems Lab'
+
+    missing = client.get("/api/faculty/Nobody/timetable")
+    assert missing.status_code == 404
+    assert 'suggestions' in missing.get_json()
+
+
+def test_faculty_pages(client, published):
+    payload = client.get("/api/faculty?prefix=mr&per_page=1&page=2").get_json()
+    assert (payload['total'], payload['pages']) == (2, 2)
+    assert payload['faculty'] == ['Mr. MD. Saleem']
+
+
+def test_batch_timetables(client, published):
+    payload = client.get("/api/timetables?faculty=Saleem,Nobody&class=CSE-B").get_json()
+    assert payload['version'] == published
+    assert payload['count'] == 3
+    found = [item for item in payload['timetables'] if 'error' not in item]
+    assert [item['count'] for item in found] == [3, 2]
+
+    lines = client.get("/api/timetables?class=*", headers={"Accept": "application/x-ndjson"}).data
+    assert len([json.loads(line) for line in lines.splitlines()]) == 2
+
+
+def test_free_faculty(client, published):
+    payload = client.get("/api/free_faculty?day=Wednesday&period=3").get_json()
+    assert payload['free'] == ['Mr. MD. Saleem']
+    assert client.get("/api/free_faculty?day=someday").status_code == 400
+
+
+def test_analytics_needs_admin(client, published):
+    assert client.get("/api/analytics").status_code == 403
+    with client.session_transaction() as session:
+        session['admin'] = True
+    first, again = revalidate(client, "/api/analytics")
+    assert again.status_code == 304
+    assert first.get_json()['totals']['faculty'] == 2
+
+
+def test_now(client, published):
+    payload = client.get(f"/api/now?at={MONDAY_P1}").get_json()
+    assert (payload['day'], payload['period']) == ('Monday', 1)
+    assert payload['now']['faculty'] == ['Mr. K. Mathivanan', 'Mr. MD. Saleem']
+
+    narrowed = client.get(f"/api/now?at={MONDAY_P1}&class=CSE-A").get_json()
+    assert narrowed['now']['faculty'] == ['Mr. MD. Saleem']
+
+
+@pytest.mark.parametrize("at", ["2026-10-19T09:30+00:00", "2026-10-19T15:00+05:30", "2026-10-19T09:30Z"])
+def test_now_with_an_offset(client, published, monkeypatch, at):
+    monkeypatch.setattr("live_slots.TIMEZONE", "UTC")
+    payload = client.get("/api/now", query_string={"at": at}).get_json()
+    assert (payload['day'], payload['period']) == ('Monday', 1)
+
+
+def test_now_bad_time(client, published):
+    assert client.get("/api/now?at=tomorrow").status_code == 400
+
+
+def test_stream_cap(webapp, client, published):
+    webapp.live_feed.max_streams = 1
+    first = client.get("/api/now/stream")
+    assert first.status_code == 200
+    assert next(first.response) == b"retry: 5000\n\n"
+
+    full = client.get("/api/now/stream")
+    assert full.status_code == 503
+    assert full.headers["Retry-After"]
+
+    first.close()
+    assert webapp.live_feed.streams == 0
+    client.get("/api/now/stream").close()
+    assert webapp.live_feed.streams == 0
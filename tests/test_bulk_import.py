@@ -0,0 +1,56 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+import bulk_import
+from bulk_import import import_timetables
+
+def college_sheet(*cells):
+    """One MON row of a GNITC college sheet"""
+    return pd.DataFrame([['MON', *cells]], columns=['DAY', 'P1', 'P2', 'P3', 'P4', 'P5', 'P6'])
+
+
+@pytest.fixture
+def department(tmp_path):
+    """Workbook with one college sheet per section"""
+    path = tmp_path / "department.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        for section in ('CSE-A', 'CSE-B', 'CSE-C', 'CSE-D'):
+            college_sheet('OS', 'CN', None, None, None, None).to_excel(writer, sheet_name=section, index=False)
+    return path
+
+
+def test_sheets_in_worker_processes(department):
+    result = import_timetables(str(department), max_workers=2)
+    assert len(result.sheets) == 4
+    assert sorted(set(result.df['Class'])) == ['CSE-A', 'CSE-B', 'CSE-C', 'CSE-D']
+    assert len(result.df) == 8
+
+
+def zip_of(tmp_path, members):
+    path = tmp_path / "timetables.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return path
+
+
+def test_zip_of_workbooks(tmp_path, department):
+    path = zip_of(tmp_path, {"cse/department.xlsx": department.read_bytes(), "README.txt": "hi"})
+    assert len(import_timetables(str(path), max_workers=1).df) == 8
+
+
+def test_zip_with_too_many_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_import, "MAX_ZIP_MEMBERS", 3)
+    path = zip_of(tmp_path, {f"{i}.xlsx": b"" for i in range(4)})
+    with pytest.raises(ValueError, match="4 files"):
+        import_timetables(str(path))
+
+
+def test_zip_bomb_is_not_extracted(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_import, "MAX_ZIP_BYTES", 1024 * 1024)
+    path = zip_of(tmp_path, {"bomb.xlsx": b"\0" * (2 * 1024 * 1024)})
+    assert path.stat().st_size < 64 * 1024
+    with pytest.raises(ValueError, match="unpacks to 2MB"):
+        import_timetables(str(path))
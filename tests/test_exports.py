@@ -0,0 +1,50 @@
+import functools
+import os
+import zipfile
+
+import pytest
+
+import exports
+from conftest import timetable_frame
+from exports import ExportCache
+from timetable_store import TimetableStore
+
+
+@pytest.fixture
+def timetable(storage):
+    storage.publish(timetable_frame(), None)
+    return TimetableStore(storage).get()
+
+
+def zip_names(path):
+    with zipfile.ZipFile(path) as archive:
+        return sorted(archive.namelist())
+
+
+DEPARTMENT_ZIP = [
+    'classes/CSE-A.pdf', 'classes/CSE-B.pdf', 'department.pdf',
+    'faculty/Mr._K._Mathivanan.pdf', 'faculty/Mr._MD._Saleem.pdf',
+]
+
+
+def test_department_zip_survives_a_prune(timetable, tmp_path):
+    cache = ExportCache(str(tmp_path))
+    # Drop every cached file as soon as the entity files are stored
+    cache.prune = functools.partial(ExportCache.prune, cache, 0)
+    cache._writes = 99
+
+    path = cache.department_zip(timetable, 'pdf')
+    assert zip_names(path) == DEPARTMENT_ZIP
+    assert cache.misses == 6
+
+
+def test_department_zip_in_worker_processes(timetable, tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "PARALLEL_MIN_EXPORTS", 2)
+    cache = ExportCache(str(tmp_path))
+    path = cache.department_zip(timetable, 'pdf', workers=2)
+    assert zip_names(path) == DEPARTMENT_ZIP
+
+    # The entity files stay cached: rebuilding the zip renders nothing
+    os.remove(path)
+    cache.department_zip(timetable, 'pdf')
+    assert (cache.hits, cache.misses) == (5, 7)
@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from convert_gnitc_timetable import convert_matrix
+from excel_stream import SheetStream
+from slot_expressions import MAX_SPAN, batch_of, expand_cell
+from subject_registry import SubjectRegistry, load_registry
+from timetable_converter import OUTPUT_COLUMNS, expand_block
+
+OS = ('Mr. MD. Saleem', 'Operating Systems')
+OS_LAB = ('Mr. MD. Saleem', 'Operating Systems Lab')
+
+
+@pytest.fixture
+def registry():
+    return load_registry()
+
+
+def subjects(entries):
+    return [subject for _, subject, _ in entries]
+
+
+def test_single_code(registry):
+    assert expand_cell('OS', registry) == (OS + (0,),)
+    assert expand_cell('os', registry) == (OS + (0,),)
+    assert expand_cell('Operating Systems', registry) == (OS + (0,),)
+
+
+def test_not_a_subject(registry):
+    assert expand_cell('LIBRARY', registry) == ()
+    assert expand_cell('OS / LIBRARY', registry) == (OS + (0,),)
+
+
+def test_combined_slot(registry):
+    assert expand_cell('RTRP/CN', registry) == (
+        ('Mr. G. Vijay Kumar', 'Real-Time Research Project', 0),
+        ('Mr. K. Mathivanan', 'Computer Networks', 0),
+    )
+    assert subjects(expand_cell('SE Lab, OS Lab', registry)) == ['Software Engineering Lab', 'Operating Systems Lab']
+
+
+def test_name_with_a_separator_is_one_subject(registry):
+    assert expand_cell('Business Economics & Financial Analysis', registry) == (
+        ('Mr. N. Srikanth', 'Business Economics & Financial Analysis', 0),
+    )
+
+
+def test_lab_batches(registry):
+    entries = expand_cell('FSD Lab(Batch-1) & RTRP (Batch-2)', registry)
+    assert subjects(entries) == ['Full Stack Development Lab (Batch-1)', 'Real-Time Research Project (Batch-2)']
+    assert [batch_of(subject) for subject in subjects(entries)] == ['1', '2']
+    assert subjects(expand_cell('CN B2', registry)) == ['Computer Networks (Batch-2)']
+    assert batch_of('Computer Networks') is None
+
+
+@pytest.mark.parametrize("text", ['OS Lab x3', 'OS Lab (3 periods)', 'OS Lab 3 hrs'])
+def test_lab_block(registry, text):
+    assert expand_cell(text, registry) == (OS_LAB + (0,), OS_LAB + (1,), OS_LAB + (2,))
+
+
+def test_lab_block_is_capped(registry):
+    assert len(expand_cell('OS Lab x9', registry)) == MAX_SPAN
+
+
+def test_section_overrides():
+    registry = SubjectRegistry([
+        {'Code': 'OS', 'Subject': 'Operating Systems', 'Faculty': 'Mr. MD. Saleem'},
+        {'Code': 'OS', 'Section': 'CSE-B', 'Faculty': 'Ms. K. Latha'},
+    ])
+    assert expand_cell('OS', registry, 'CSE-A') == (OS + (0,),)
+    assert expand_cell('OS', registry, 'cse-b') == (('Ms. K. Latha', 'Operating Systems', 0),)
+    # cached per (text, section)
+    assert expand_cell('OS', registry, 'CSE-A') == (OS + (0,),)
+
+
+def section_of(value):
+    text = str(value or "")
+    return text.split(":")[1].strip() if text.startswith("Section:") else None
+
+
+def stream(rows, registry, multi_sheet=True):
+    return SheetStream(iter(rows), "CSE", multi_sheet, section_of, "CSE-A", registry)
+
+
+def test_expand_block_drops_lab_periods_past_the_last(registry):
+    cells = np.array([['OS', None, None, None, 'OS Lab x3', None],
+                      ['RTRP/CN', None, None, None, None, 'OS Lab x2']], dtype=object)
+    days = np.array(['Monday', 'Tuesday'], dtype=object)
+    classes = np.array(['CSE-A', 'CSE-A'], dtype=object)
+    columns, dropped = expand_block(cells, days, range(1, 7), classes, registry)
+    assert list(zip(columns['Day'], columns['Period'], columns['Subject'])) == [
+        ('Monday', 1, 'Operating Systems'),
+        ('Monday', 5, 'Operating Systems Lab'),
+        ('Monday', 6, 'Operating Systems Lab'),
+        ('Tuesday', 1, 'Real-Time Research Project'),
+        ('Tuesday', 1, 'Computer Networks'),
+        ('Tuesday', 6, 'Operating Systems Lab'),
+    ]
+    assert set(columns['Class']) == {'CSE-A'}
+    assert dropped == 2
+
+
+def test_matrix_sheet_last_period_comes_from_the_headers(registry):
+    sheet = stream([('Day', 'Period 3', 'Period 4'), ('MON', 'OS Lab x3', 'CN')], registry,
+                   multi_sheet=False)
+    assert sheet.format == 'matrix'
+    assert [(period, subject) for _, _, period, _, subject in sheet.rows()] == [
+        (3, 'Operating Systems Lab'), (4, 'Operating Systems Lab'), (4, 'Computer Networks'),
+    ]
+    assert sheet.dropped_slots == 1
+
+
+def test_stream_matches_the_converter_engine(registry):
+    rows = [('DAY', 'P1', 'P2', 'P3', 'P4', 'P5', 'P6'),
+            ('Section: CSE-B', None, None, None, None, None, None),
+            ('MON', 'OS', None, 'FSD Lab(Batch-1) & RTRP (Batch-2)', None, 'OS Lab x3', None),
+            ('TUE', None, 'RTRP/CN', None, None, None, 'OS Lab x2')]
+
+    sheet = stream(rows, registry)
+    assert sheet.format == 'college'
+    streamed = list(sheet.rows())
+    assert sheet.dropped_slots == 2
+
+    cells = np.array([row[1:] for row in rows[2:]], dtype=object)
+    days = np.array(['Monday', 'Tuesday'], dtype=object)
+    classes = np.array(['CSE-B', 'CSE-B'], dtype=object)
+    columns, _ = expand_block(cells, days, range(1, 7), classes, registry)
+    assert streamed == list(zip(*(columns[name].tolist() for name in OUTPUT_COLUMNS)))
+
+
+def test_gnitc_sample_keeps_both_batches(registry):
+    df = convert_matrix({'Wednesday': ['OS', 'CN', 'FSD Lab(Batch-1) & RTRP (Batch-2)']}, registry)
+    assert list(zip(df['Faculty'], df['Period'], df['Subject'])) == [
+        ('Mr. MD. Saleem', 1, 'Operating Systems'),
+        ('Mr. K. Mathivanan', 2, 'Computer Networks'),
+        ('Mr. V. Saravanakumar', 3, 'Full Stack Development Lab (Batch-1)'),
+        ('Mr. G. Vijay Kumar', 3, 'Real-Time Research Project (Batch-2)'),
+    ]
+    assert set(df['Class']) == {'CSE-CYBER-II-B'}
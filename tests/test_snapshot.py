@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import timetable_frame
+from snapshot import MappedSnapshot, SnapshotError, read_header, read_snapshot, write_snapshot
+
+
+def test_round_trip(tmp_path):
+    df = timetable_frame()
+    path = tmp_path / "timetable.snap"
+    write_snapshot(df, path, ("stamp", 1), "v1")
+
+    header, back = read_snapshot(path)
+    assert header["version"] == "v1"
+    assert header["source"] == ["stamp", 1]
+    pd.testing.assert_frame_equal(back, df, check_dtype=False)
+
+
+def test_mixed_and_numeric_columns(tmp_path):
+    df = pd.DataFrame({
+        'Faculty': ['A', 'B', 'C'],
+        'Period': [1, 2, 3],
+        'Hours': [1.5, np.nan, 2.0],
+        'Note': [7, 'text', np.nan],
+    })
+    path = tmp_path / "timetable.snap"
+    write_snapshot(df, path, None, "v1")
+
+    snapshot = MappedSnapshot(path)
+    assert snapshot.rows == 3
+    assert snapshot.value('Period', 2) == 3
+    assert snapshot.value('Hours', 0) == 1.5
+    assert math.isnan(snapshot.value('Hours', 1))
+    assert snapshot.value('Note', 0) == 7
+    assert snapshot.value('Note', 1) == 'text'
+    assert math.isnan(snapshot.value('Note', 2))
+
+
+def test_faculty_names_are_stripped(tmp_path):
+    df = timetable_frame([(' Mr. MD. Saleem ', 'Friday', 6, 'CSE-B', 'Operating Systems', 'R102')])
+    path = tmp_path / "timetable.snap"
+    write_snapshot(df, path, None, "v1")
+
+    snapshot = MappedSnapshot(path)
+    assert snapshot.record(len(df) - 1)['Faculty'] == 'Mr. MD. Saleem'
+    assert list(snapshot.index('Faculty').get('Mr. MD. Saleem')) == [0, 1, 2, 5]
+
+
+def test_indexes(tmp_path):
+    path = tmp_path / "timetable.snap"
+    write_snapshot(timetable_frame(), path, None, "v1")
+    snapshot = MappedSnapshot(path)
+
+    faculty = snapshot.index('Faculty')
+    assert faculty.keys() == ['Mr. K. Mathivanan', 'Mr. MD. Saleem']
+    assert list(faculty.get('Mr. K. Mathivanan')) == [3, 4]
+    assert faculty.get('Nobody') == ()
+
+    classes = snapshot.index('Class')
+    assert list(classes.get('CSE-A')) == [0, 2, 4]
+    assert list(classes.prefix_range('CSE')) == [0, 1]
+    assert snapshot.index('Rooms') is None
+
+
+def test_digests_follow_the_rows(tmp_path):
+    """A name whose rows didn't change keeps its digest in the next version"""
+    first, second = tmp_path / "a.snap", tmp_path / "b.snap"
+    write_snapshot(timetable_frame(), first, None, "v1")
+    changed = timetable_frame()
+    changed.loc[4, 'Period'] = 4
+    write_snapshot(changed, second, None, "v2")
+
+    a, b = MappedSnapshot(first).index('Faculty'), MappedSnapshot(second).index('Faculty')
+    saleem, mathivanan = a.find('Mr. MD. Saleem'), a.find('Mr. K. Mathivanan')
+    assert a.digest(saleem) == b.digest(b.find('Mr. MD. Saleem'))
+    assert a.digest(mathivanan) != b.digest(b.find('Mr. K. Mathivanan'))
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / "timetable.snap"
+    path.write_bytes(b"PK\x03\x04 not a snapshot")
+    with pytest.raises(SnapshotError):
+        read_header(path)
+    with pytest.raises(SnapshotError):
+        MappedSnapshot(path)
+
+
+def test_rewrite_replaces_atomically(tmp_path):
+    path = tmp_path / "timetable.snap"
+    write_snapshot(timetable_frame(), path, None, "v1")
+    write_snapshot(timetable_frame().head(2), path, None, "v2")
+
+    assert read_header(path)["version"] == "v2"
+    assert MappedSnapshot(path).rows == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["timetable.snap"]
@@ -0,0 +1,124 @@
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import timetable_frame
+from snapshot import read_header
+from storage import SQLiteStorage
+from timetable_store import TimetableStore
+from timetable_versions import KEEP_VERSIONS
+
+
+def test_empty(storage):
+    assert storage.fingerprint() is None
+    assert storage.snapshot_path() is None
+    assert storage.load() == (None, None, None)
+    assert storage.list_versions() == []
+
+
+def test_publish(storage):
+    df = timetable_frame()
+    version = storage.publish(df, None, {'filename': "cse.xlsx"})
+
+    assert storage.fingerprint() is not None
+    loaded_version, loaded, _ = storage.load()
+    assert loaded_version == version
+    pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+    assert read_header(storage.snapshot_path())["version"] == version
+
+    (meta,) = storage.list_versions()
+    assert meta['version'] == version
+    assert meta['filename'] == "cse.xlsx"
+    assert meta['current']
+
+
+def test_publish_moves_the_store(storage):
+    store = TimetableStore(storage)
+    storage.publish(timetable_frame(), None)
+    first = store.get()
+    assert store.get() is first
+
+    second_version = storage.publish(timetable_frame().head(2), None)
+    second = store.get()
+    assert second is not first
+    assert second.version == second_version
+    assert len(second) == 2
+
+
+def test_rollback(storage):
+    first = storage.publish(timetable_frame(), None)
+    second = storage.publish(timetable_frame().head(2), None)
+    assert [meta['version'] for meta in storage.list_versions()] == [second, first]
+
+    meta = storage.rollback(first)
+    assert meta['version'] == first
+    assert storage.load()[0] == first
+    assert len(storage.load()[1]) == len(timetable_frame())
+    assert read_header(storage.snapshot_path())["version"] == first
+    assert [meta['current'] for meta in storage.list_versions()] == [False, True]
+
+    # and forward again
+    storage.rollback(second)
+    assert storage.load()[0] == second
+
+
+def test_rollback_unknown_version(storage):
+    live = storage.publish(timetable_frame(), None)
+    with pytest.raises(ValueError):
+        storage.rollback("20000101-000000-000000")
+    assert storage.load()[0] == live
+
+
+def test_old_versions_are_pruned(storage):
+    versions = [storage.publish(timetable_frame().head(1 + i % 5), None) for i in range(KEEP_VERSIONS + 2)]
+    kept = [meta['version'] for meta in storage.list_versions()]
+    assert kept == versions[::-1][:KEEP_VERSIONS]
+    with pytest.raises(ValueError):
+        storage.rollback(versions[0])
+
+
+def test_sqlite_keeps_extra_columns(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "timetable.db"))
+    df = timetable_frame()
+    df['Batch'] = [1, None, 2, None, 'all']
+    storage.publish(df, None)
+    loaded = storage.load()[1]
+    assert list(loaded.columns) == list(df.columns)
+    assert loaded['Batch'].tolist()[::2] == [1, 2, 'all']
+
+
+def test_sqlite_snapshot_is_written_before_the_flip(tmp_path, monkeypatch):
+    storage = SQLiteStorage(str(tmp_path / "timetable.db"))
+    live = storage.publish(timetable_frame(), None)
+    write = storage._write_snapshot
+
+    def spy(version, df):
+        assert storage.current_version() == live
+        write(version, df)
+
+    monkeypatch.setattr(storage, "_write_snapshot", spy)
+    version = storage.publish(timetable_frame().head(2), None)
+    assert storage.current_version() == version
+    assert os.path.exists(storage._snapshot_file(version))
+
+
+def test_sqlite_failed_publish_leaves_nothing(tmp_path, monkeypatch):
+    storage = SQLiteStorage(str(tmp_path / "timetable.db"))
+    live = storage.publish(timetable_frame(), None)
+
+    def fail(*args):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(storage, "_insert", fail)
+    with pytest.raises(RuntimeError):
+        storage.publish(timetable_frame().head(2), None)
+    assert storage.current_version() == live
+    assert os.listdir(storage.snapshot_dir) == [f"{live}.snap"]
+
+
+def test_sqlite_rebuilds_a_missing_snapshot(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "timetable.db"))
+    version = storage.publish(timetable_frame(), None)
+    os.remove(storage._snapshot_file(version))
+    assert read_header(storage.snapshot_path())["version"] == version
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from timetable_generator import LONGEST_SESSION, Requirement, check_feasible, generate, load_requirements
+
+
+def requirements():
+    return [
+        Requirement('CSE-A', 'Operating Systems', ['Mr. MD. Saleem'], 4),
+        Requirement('CSE-A', 'Operating Systems Lab', ['Mr. MD. Saleem'], 4, lab=True),
+        Requirement('CSE-B', 'Operating Systems', ['Mr. MD. Saleem'], 4),
+        Requirement('CSE-B', 'Computer Networks', ['Mr. K. Mathivanan'], 5),
+    ]
+
+
+def test_generates_a_clash_free_timetable():
+    result = generate(requirements(), seconds=5, seed=1)
+    assert result.complete
+    assert len(result.df) == 17
+    for column in ('Faculty', 'Class'):
+        assert not result.df.duplicated([column, 'Day', 'Period']).any()
+
+
+def test_labs_stay_inside_a_session():
+    df = generate(requirements(), seconds=5, seed=1).df
+    lab = df[df['Subject'] == 'Operating Systems Lab']
+    for _, periods in lab.groupby('Day')['Period']:
+        assert periods.max() - periods.min() == len(periods) - 1
+        assert periods.max() <= 4 or periods.min() > 4
+
+
+def test_block_longer_than_a_session():
+    too_long = Requirement('CSE-A', 'Operating Systems Lab', ['Mr. MD. Saleem'], 5, lab=True,
+                           block=LONGEST_SESSION + 1)
+    assert check_feasible([too_long])
+    with pytest.raises(ValueError, match="Block"):
+        generate([too_long], seconds=1)
+
+
+def test_load_rejects_a_block_longer_than_a_session(tmp_path):
+    path = tmp_path / "requirements.xlsx"
+    pd.DataFrame({'Class': ['CSE-A'], 'Subject': ['OS Lab'], 'Faculty': ['Mr. MD. Saleem'],
+                  'Hours': [5], 'Lab': ['Y'], 'Block': [5]}).to_excel(path, index=False)
+    with pytest.raises(ValueError, match="Block 5"):
+        load_requirements(path)
+
+
+def test_too_many_hours():
+    overloaded = [Requirement('CSE-A', f'Subject {i}', ['Mr. MD. Saleem'], 6) for i in range(7)]
+    assert check_feasible(overloaded) == [
+        "Section CSE-A needs 42 periods but the week has 36",
+        "Faculty Mr. MD. Saleem needs 42 periods but the week has 36",
+    ]
@@ -0,0 +1,55 @@
+import shutil
+
+import pytest
+
+from conftest import timetable_frame
+from upload_jobs import UploadJob
+
+
+@pytest.fixture
+def upload(webapp, client, tmp_path):
+    """Run the upload job on a copy of a workbook (publishing may move the file)"""
+    folder = webapp.app.config["UPLOAD_FOLDER"]
+
+    def run(path):
+        staged = tmp_path / f"staged-{path.name}"
+        shutil.copy(path, staged)
+        return webapp.process_upload(UploadJob(folder), str(staged), False, path.name)
+    return run
+
+
+def workbook(tmp_path, name, df, sheet_name="Timetable"):
+    path = tmp_path / name
+    df.to_excel(path, sheet_name=sheet_name, index=False)
+    return path
+
+
+def test_same_file_is_not_published_twice(webapp, upload, tmp_path):
+    path = workbook(tmp_path, "cse.xlsx", timetable_frame())
+    first = upload(path)
+    assert 'duplicate' not in first
+
+    again = upload(path)
+    assert again['duplicate'] == {'version': first['version'], 'filename': "cse.xlsx", 'restored': False}
+    assert len(webapp.storage.list_versions()) == 1
+
+
+def test_old_upload_makes_its_version_live_again(webapp, upload, tmp_path):
+    old = workbook(tmp_path, "old.xlsx", timetable_frame())
+    new = workbook(tmp_path, "new.xlsx", timetable_frame().head(3))
+    first = upload(old)
+    second = upload(new)
+    assert second['version'] != first['version']
+    assert webapp.timetable_store.get().version == second['version']
+
+    result = upload(old)
+    assert result['duplicate']['restored']
+    assert webapp.timetable_store.get().version == first['version']
+    assert len(webapp.storage.list_versions()) == 2
+
+
+def test_resaved_workbook_with_the_same_rows(webapp, upload, tmp_path):
+    first = upload(workbook(tmp_path, "cse.xlsx", timetable_frame()))
+    other = upload(workbook(tmp_path, "copy.xlsx", timetable_frame(), sheet_name="Saved again"))
+    assert other['duplicate']['version'] == first['version']
+    assert len(webapp.storage.list_versions()) == 1
@@ -0,0 +1,116 @@
+"""
+Vectorized converter engine for college timetable sheets.
+
+The old converters walked the sheet with iterrows() and, for every cell,
+scanned the subject->faculty dict and then the subject-name dict with
+substring checks. Here many day rows are processed at once:
+
+1. the day rows / period columns come in as one block of cells
+   (excel_stream.py hands over a sheet's day rows a block at a time),
+2. the cells are stringified in one pass and factorized, so every distinct
+   cell text is matched exactly once (a department has thousands of cells
+   but only a few dozen distinct texts),
+3. each distinct text is expanded once (combined slots, lab batches and lab
+   blocks, see slot_expressions.py) and matched against the subject
+   registry, and the results are broadcast back to the cells with NumPy.
+
+Rows come out in the same order as the old loop. Subject codes and faculty
+come from the registry, not from dicts in this file.
+"""
+import numpy as np
+import pandas as pd
+
+from slot_expressions import expand_cell
+from subject_registry import get_registry
+
+DEFAULT_CLASS = 'CSE-CYBER-II-B'
+
+DAYS_MAP = {
+    'MON': 'Monday', 'TUE': 'Tuesday', 'WED': 'Wednesday',
+    'THU': 'Thursday', 'FRI': 'Friday', 'SAT': 'Saturday'
+}
+
+OUTPUT_COLUMNS = ['Faculty', 'Day', 'Period', 'Class', 'Subject']
+
+
+def expand_block(cells, days, periods, classes, registry=None):
+    """
+    cells:   2-D object array (day rows x period columns)
+    days:    day name per row
+    periods: period number per column
+    classes: class name per row
+    Cells are matched against `registry` (the default subject registry if None).
+    Returns ({column: array} in OUTPUT_COLUMNS order, row-major cell order,
+    or None if nothing matched) and the number of lab periods dropped.
+    """
+    if cells.size == 0:
+        return None, 0
+    if registry is None:
+        registry = get_registry()
+
+    flat = cells.ravel()  # row-major, same order as the old nested loops
+    present = np.flatnonzero(pd.notna(flat))
+    if len(present) == 0:
+        return None, 0
+
+    texts = pd.Series(flat[present], dtype=object).astype(str).str.strip()
+    valid = (texts != "") & (texts != "nan")
+    present = present[valid.to_numpy()]
+    texts = texts[valid]
+
+    # Expand every distinct cell text once - "RTRP/CN", lab batches and
+    # lab blocks become several entries (see slot_expressions.py)
+    n_cols = cells.shape[1]
+    if registry.has_overrides:
+        # Faculty can depend on the section - expand per distinct (text, class)
+        sections = classes[present // n_cols]
+        text_codes, unique_keys = pd.factorize(pd.Series(list(zip(texts, sections)), dtype=object))
+        expansions = [expand_cell(text, registry, section) for text, section in unique_keys]
+    else:
+        text_codes, unique_texts = pd.factorize(texts)
+        expansions = [expand_cell(text, registry) for text in unique_texts]
+
+    counts = np.array([len(entries) for entries in expansions], dtype=np.int64)
+    per_cell = counts[text_codes]
+    total = int(per_cell.sum())
+    if total == 0:
+        return None, 0
+
+    # Flat table of all expansions, then one gather per output row
+    flat = [entry for entries in expansions for entry in entries]
+    flat_faculty = np.array([entry[0] for entry in flat], dtype=object)
+    flat_subject = np.array([entry[1] for entry in flat], dtype=object)
+    flat_offset = np.array([entry[2] for entry in flat], dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+
+    cell_index = np.repeat(np.arange(len(text_codes)), per_cell)
+    within = np.arange(total) - np.repeat(np.cumsum(per_cell) - per_cell, per_cell)
+    flat_index = starts[text_codes][cell_index] + within
+
+    present = present[cell_index]
+    periods = np.asarray(periods, dtype=np.int64)
+    period = periods[present % n_cols] + flat_offset[flat_index]
+
+    # A lab block can't run past the sheet's last period ("OS Lab x3" in P5)
+    inside = period <= periods.max()
+    dropped = int((~inside).sum())
+    if dropped:
+        present, flat_index, period = present[inside], flat_index[inside], period[inside]
+    rows = present // n_cols
+
+    return {
+        'Faculty': flat_faculty[flat_index],
+        'Day': days[rows],
+        'Period': period,
+        'Class': classes[rows],
+        'Subject': flat_subject[flat_index],
+    }, dropped
+
+
+def period_from_column(col):
+    """Old rule: first of '1'..'6' found in the header text, default 1"""
+    col_str = str(col)
+    for period in range(1, 7):
+        if str(period) in col_str:
+            return period
+    return 1
@@ -0,0 +1,123 @@
+"""
+Row-level difference between two timetable versions.
+
+Every row is one slot: (Faculty, Day, Period, Class, Subject, Room). Rows
+only in the old version were removed, rows only in the new one were added,
+and a removed + added pair with the same faculty, class and subject is one
+moved slot - another room in the same period first, otherwise another
+day/period. Duplicate rows are matched one-for-one.
+
+The result is plain JSON (it goes into the upload job status and the
+version meta) and is shown on upload_success.html.
+"""
+import pandas as pd
+
+from faculty_grid import DAYS
+
+SLOT_COLUMNS = ['Faculty', 'Day', 'Period', 'Class', 'Subject', 'Room']
+_ENTITY = ['Faculty', 'Class', 'Subject']
+
+# upload_success.html lists this many faculty, with this many changes each
+MAX_LISTED_FACULTY = 100
+MAX_LISTED_CHANGES = 20
+
+
+def _text(value):
+    """Comparable cell text: NaN -> '', 3.0 -> '3', '  x ' -> 'x'"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def slot_frame(df):
+    """The slot columns as text, plus 'n' numbering duplicate rows"""
+    slots = pd.DataFrame({column: df[column].map(_text) if column in df.columns else ""
+                          for column in SLOT_COLUMNS}, index=range(len(df)))
+    slots['n'] = slots.groupby(SLOT_COLUMNS, sort=False).cumcount()
+    return slots
+
+
+def _pair(removed, added, on):
+    """Match removed and added rows on `on` (one-for-one); returns (pairs, removed, added) left over"""
+    left = removed.assign(_k=removed.groupby(on, sort=False).cumcount())
+    right = added.assign(_k=added.groupby(on, sort=False).cumcount())
+    pairs = left.merge(right, on=on + ['_k'], suffixes=('', '_to'))
+    return (pairs,
+            removed[~removed['_id'].isin(pairs['_id'])],
+            added[~added['_id'].isin(pairs['_id_to'])])
+
+
+def _slot_order(frame, day, period):
+    order = {name: i for i, name in enumerate(DAYS)}
+    days = frame[day].map(lambda value: order.get(value.title(), len(DAYS)))
+    periods = pd.to_numeric(frame[period], errors='coerce')
+    return frame.assign(_day=days, _period=periods).sort_values(['Faculty', '_day', '_period', 'Class'])
+
+
+def _changes(frame, change):
+    moved = change == 'moved'
+    rows = []
+    for row in _slot_order(frame, 'Day', 'Period').itertuples(index=False):
+        item = {'change': change, 'faculty': row.Faculty, 'class': row.Class, 'subject': row.Subject,
+                'day': row.Day, 'period': row.Period, 'room': row.Room}
+        if moved:
+            item.update(to_day=row.Day_to, to_period=row.Period_to, to_room=row.Room_to)
+        rows.append(item)
+    return rows
+
+
+def _summary(changes, field):
+    """Per faculty/class: counts of each change kind, most changed first"""
+    groups = {}
+    for item in changes:
+        group = groups.setdefault(item[field], {'name': item[field], 'added': 0, 'removed': 0, 'moved': 0,
+                                                'changes': []})
+        group[item['change']] += 1
+        group['changes'].append(item)
+    return sorted(groups.values(),
+                  key=lambda group: (-(group['added'] + group['removed'] + group['moved']), group['name']))
+
+
+def same_rows(old_df, new_df):
+    """True if both tables have the same columns and cells, in the same order"""
+    if list(old_df.columns) != list(new_df.columns) or len(old_df) != len(new_df):
+        return False
+    return all(old_df[column].map(_text).tolist() == new_df[column].map(_text).tolist()
+               for column in old_df.columns)
+
+
+def diff_timetables(old_df, new_df, base_version=None):
+    """Added / removed / moved slots of new_df against old_df, per faculty and class"""
+    old, new = slot_frame(old_df), slot_frame(new_df)
+    merged = old.merge(new, on=SLOT_COLUMNS + ['n'], how='outer', indicator=True)
+    removed = merged[merged['_merge'] == 'left_only'][SLOT_COLUMNS].reset_index(drop=True)
+    added = merged[merged['_merge'] == 'right_only'][SLOT_COLUMNS].reset_index(drop=True)
+    removed['_id'] = range(len(removed))
+    added['_id'] = range(len(added))
+
+    # Same period, other room - then other day/period
+    room_moves, removed, added = _pair(removed, added, _ENTITY + ['Day', 'Period'])
+    slot_moves, removed, added = _pair(removed, added, _ENTITY)
+    room_moves = room_moves.assign(Day_to=room_moves['Day'], Period_to=room_moves['Period'])
+    moved = pd.concat([room_moves, slot_moves], ignore_index=True)
+
+    changes = _changes(added, 'added') + _changes(removed, 'removed') + _changes(moved, 'moved')
+    faculty = _summary(changes, 'faculty')
+    classes = _summary(changes, 'class')
+    for group in faculty:
+        group['changes'] = group['changes'][:MAX_LISTED_CHANGES]
+    for group in classes:
+        del group['changes']
+
+    return {
+        'base_version': base_version,
+        'identical': not changes and same_rows(old_df, new_df),
+        'counts': {'added': len(added), 'removed': len(removed), 'moved': len(moved),
+                   'unchanged': int((merged['_merge'] == 'both').sum())},
+        'changed_faculty': len(faculty),
+        'changed_classes': len(classes),
+        'faculty': faculty[:MAX_LISTED_FACULTY],
+        'classes': classes,
+    }
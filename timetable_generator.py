@@ -0,0 +1,482 @@
+"""
+Automatic timetable generator.
+
+Takes what every section has to be taught - subject, faculty, hours per
+week, labs (with batches) and rooms - and builds a clash-free timetable in
+the app's Faculty/Day/Period/Class/Subject(/Room) format.
+
+Requirements workbook (first sheet, or a sheet called "Requirements"):
+
+    Class | Subject | Faculty | Hours | Lab | Block | Students | Room
+
+  - Faculty may be blank when Subject is a known code (OS, CN, ...): the
+    subject registry fills it in (and the full subject name).
+  - Lab = Y marks a lab; Block is the number of consecutive periods per
+    session (default 2 for labs, 1 otherwise). "A / B" in Faculty means
+    one batch per faculty, all in the lab at the same time.
+  - Students and Room are optional (Room pins a section to its classroom).
+
+An optional "Rooms" sheet (Room | Capacity | Lab) enables room allocation:
+theory classes get a classroom that seats the section, every lab batch a
+lab that seats the batch.
+
+Search: every resource (section, faculty, room) has an int bitmap of busy
+slots, so checking a placement is a few ANDs. Blocks are placed greedily
+(longest and most constrained first, spread over the week); a block that
+doesn't fit ejects the cheapest set of blockers, which go back in the queue
+(ejection-chain local search with a short tabu). Runs until everything is
+placed or the time budget is spent; several seeds can run in parallel
+processes and the first complete timetable wins.
+"""
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from faculty_grid import DAYS, PERIOD_TIMES
+from subject_registry import get_registry
+
+PERIODS = sorted(PERIOD_TIMES)
+
+# Lunch is after this period - lab blocks never run across it
+BREAK_AFTER = 4
+SESSIONS = [[p for p in PERIODS if p <= BREAK_AFTER], [p for p in PERIODS if p > BREAK_AFTER]]
+LONGEST_SESSION = max(len(session) for session in SESSIONS)
+
+# Iterations a just-placed block can't be ejected again
+TABU_TENURE = 8
+
+DEFAULT_SECONDS = 10
+
+
+class Requirement:
+    """One subject of one section"""
+
+    def __init__(self, section, subject, faculty, hours, lab=False, block=None,
+                 students=None, room=None):
+        self.section = section
+        self.subject = subject
+        self.faculty = tuple(faculty)
+        self.hours = int(hours)
+        self.lab = lab
+        self.block = int(block or (2 if lab else 1))
+        self.students = int(students) if students else None
+        self.room = room
+
+    def __repr__(self):
+        return f"Requirement({self.section!r}, {self.subject!r}, {self.faculty!r}, {self.hours})"
+
+
+class Room:
+    def __init__(self, name, capacity=None, lab=False):
+        self.name = name
+        self.capacity = int(capacity) if capacity else None
+        self.lab = lab
+
+    def seats(self, students):
+        return not students or self.capacity is None or self.capacity >= students
+
+
+class GenerationResult:
+    """Generated table plus what couldn't be placed"""
+
+    def __init__(self, df, unplaced, seconds, seed, iterations):
+        self.df = df
+        self.unplaced = unplaced
+        self.seconds = seconds
+        self.seed = seed
+        self.iterations = iterations
+
+    @property
+    def complete(self):
+        return not self.unplaced
+
+
+# ============= READING REQUIREMENTS =============
+def _columns(df):
+    """Case/space-insensitive column lookup"""
+    return {str(col).strip().lower(): col for col in df.columns}
+
+
+def _cell(row, columns, name, default=None):
+    col = columns.get(name)
+    if col is None:
+        return default
+    value = row[col]
+    if value is None or (isinstance(value, float) and value != value):
+        return default
+    if isinstance(value, str):
+        value = value.strip()
+        return value or default
+    return value
+
+
+def _yes(value):
+    return str(value).strip().lower() in ('y', 'yes', 'true', '1', 'lab')
+
+
+def load_requirements(path, registry=None):
+    """Requirements workbook -> ([Requirement], [Room])"""
+    if registry is None:
+        registry = get_registry()
+    sheets = pd.read_excel(path, sheet_name=None)
+    names = {name.strip().lower(): name for name in sheets}
+    req_df = sheets[names.get('requirements', next(iter(sheets)))]
+    rooms_df = sheets.get(names.get('rooms'))
+
+    requirements = []
+    columns = _columns(req_df)
+    for missing in ('class', 'subject', 'hours'):
+        if missing not in columns:
+            raise ValueError(f"Requirements sheet needs a '{missing.title()}' column")
+
+    for _, row in req_df.iterrows():
+        section = _cell(row, columns, 'class')
+        subject = _cell(row, columns, 'subject')
+        hours = _cell(row, columns, 'hours')
+        if section is None or subject is None or not hours:
+            continue
+
+        entry = registry.get(subject)
+        faculty = _cell(row, columns, 'faculty') or (entry and registry.faculty_for(entry, section))
+        if not faculty:
+            raise ValueError(f"No faculty for {subject} in {section}")
+        lab = _yes(_cell(row, columns, 'lab', '')) or 'LAB' in str(subject).upper()
+        block = _cell(row, columns, 'block')
+        if block is not None and not 1 <= int(block) <= LONGEST_SESSION:
+            raise ValueError(f"Block {block} for {subject} in {section}: sessions are at most "
+                             f"{LONGEST_SESSION} periods long (lunch comes after period {BREAK_AFTER})")
+
+        requirements.append(Requirement(
+            section=str(section),
+            subject=entry.name if entry else str(subject),
+            faculty=[name.strip() for name in str(faculty).split('/') if name.strip()],
+            hours=hours,
+            lab=lab,
+            block=block,
+            students=_cell(row, columns, 'students'),
+            room=_cell(row, columns, 'room'),
+        ))
+
+    rooms = []
+    if rooms_df is not None:
+        columns = _columns(rooms_df)
+        for _, row in rooms_df.iterrows():
+            name = _cell(row, columns, 'room')
+            if name is not None:
+                rooms.append(Room(str(name), _cell(row, columns, 'capacity'),
+                                  _yes(_cell(row, columns, 'lab', ''))))
+    return requirements, rooms
+
+
+# ============= SOLVER =============
+class _Block:
+    """One session to place: `length` consecutive periods of a requirement"""
+
+    __slots__ = ('id', 'req', 'length', 'resources', 'room_options', 'day_key', 'day_cap')
+
+    def __init__(self, block_id, req, length, room_options, day_cap):
+        self.id = block_id
+        self.req = req
+        self.length = length
+        self.resources = [('S', req.section)] + [('F', name) for name in req.faculty]
+        self.room_options = room_options  # one list of candidate rooms per room needed
+        self.day_key = (req.section, req.subject)
+        self.day_cap = day_cap
+
+
+class _Solver:
+    def __init__(self, requirements, rooms, seed):
+        self.rng = random.Random(seed)
+        self.width = len(PERIODS)
+        self.n_slots = len(DAYS) * self.width
+
+        # Valid start bits per block length (inside one day and one session)
+        self.starts = {}
+        self.blocks = []
+        for req in requirements:
+            room_options = self._room_options(req, rooms)
+            sessions_needed = math.ceil(req.hours / req.block)
+            day_cap = max(1, math.ceil(sessions_needed / len(DAYS)))
+            for i in range(sessions_needed):
+                length = min(req.block, req.hours - i * req.block)
+                if length not in self.starts:
+                    self.starts[length] = [day * self.width + PERIODS.index(session[i])
+                                           for day in range(len(DAYS)) for session in SESSIONS
+                                           for i in range(len(session) - length + 1)]
+                self.blocks.append(_Block(len(self.blocks), req, length, room_options, day_cap))
+
+        self.busy = {}        # resource -> int bitmap
+        self.owner = {}       # resource -> {bit: block id}
+        self.day_count = {}   # (section, subject) -> [sessions per day]
+        self.placed = {}      # block id -> (start, rooms)
+        self.tabu = {}
+
+    def _room_options(self, req, rooms):
+        if not rooms:
+            return []
+        if req.room:
+            return [[req.room]]
+        if req.lab:
+            batches = max(1, len(req.faculty))
+            size = math.ceil(req.students / batches) if req.students else None
+            labs = [room.name for room in rooms if room.lab and room.seats(size)]
+            return [labs] * batches
+        classrooms = [room.name for room in rooms if not room.lab and room.seats(req.students)]
+        return [classrooms]
+
+    def _mask(self, start, length):
+        return ((1 << length) - 1) << start
+
+    def _pick_rooms(self, block, mask):
+        chosen = []
+        for options in block.room_options:
+            for room in options:
+                if room not in chosen and not self.busy.get(('R', room), 0) & mask:
+                    chosen.append(room)
+                    break
+            else:
+                return None
+        return tuple(chosen)
+
+    def _fits(self, block, start):
+        mask = self._mask(start, block.length)
+        for res in block.resources:
+            if self.busy.get(res, 0) & mask:
+                return None
+        if self.day_count.get(block.day_key, [0] * len(DAYS))[start // self.width] >= block.day_cap:
+            return None
+        return self._pick_rooms(block, mask)
+
+    def _place(self, block, start, rooms):
+        mask = self._mask(start, block.length)
+        for res in block.resources + [('R', room) for room in rooms]:
+            self.busy[res] = self.busy.get(res, 0) | mask
+            owner = self.owner.setdefault(res, {})
+            for bit in range(start, start + block.length):
+                owner[bit] = block.id
+        self.day_count.setdefault(block.day_key, [0] * len(DAYS))[start // self.width] += 1
+        self.placed[block.id] = (start, rooms)
+
+    def _remove(self, block):
+        start, rooms = self.placed.pop(block.id)
+        mask = self._mask(start, block.length)
+        for res in block.resources + [('R', room) for room in rooms]:
+            self.busy[res] &= ~mask
+            owner = self.owner[res]
+            for bit in range(start, start + block.length):
+                owner.pop(bit, None)
+        self.day_count[block.day_key][start // self.width] -= 1
+
+    def _blockers(self, block, start):
+        """Placed blocks that stop `block` from starting at `start`"""
+        mask = self._mask(start, block.length)
+        bits = range(start, start + block.length)
+        blockers = set()
+        for res in block.resources:
+            if self.busy.get(res, 0) & mask:
+                owner = self.owner[res]
+                blockers.update(owner[bit] for bit in bits if bit in owner)
+
+        day = start // self.width
+        if self.day_count.get(block.day_key, [0] * len(DAYS))[day] >= block.day_cap:
+            blockers.update(other for other, (s, _) in self.placed.items()
+                            if self.blocks[other].day_key == block.day_key and s // self.width == day)
+
+        # Rooms: free the first candidate of every room the block can't get
+        taken = []
+        for options in block.room_options:
+            free = [room for room in options if room not in taken and not self.busy.get(('R', room), 0) & mask]
+            if free:
+                taken.append(free[0])
+            elif options:
+                room = self.rng.choice(options)
+                owner = self.owner.get(('R', room), {})
+                blockers.update(owner[bit] for bit in bits if bit in owner)
+                taken.append(room)
+        return blockers
+
+    def _order(self):
+        """Longest blocks and busiest faculty first, random tie-break"""
+        load = {}
+        for block in self.blocks:
+            for res in block.resources:
+                load[res] = load.get(res, 0) + block.length
+        return sorted(self.blocks, key=lambda b: (-b.length, -len(b.resources),
+                                                  -max(load[res] for res in b.resources),
+                                                  self.rng.random()))
+
+    def _greedy_place(self, block):
+        """Place in the least loaded day of the section; False if nothing fits"""
+        section_busy = self.busy.get(block.resources[0], 0)
+        starts = list(self.starts[block.length])
+        self.rng.shuffle(starts)
+        starts.sort(key=lambda s: (section_busy >> (s // self.width * self.width)
+                                   & ((1 << self.width) - 1)).bit_count())
+        for start in starts:
+            rooms = self._fits(block, start)
+            if rooms is not None:
+                self._place(block, start, rooms)
+                return True
+        return False
+
+    def solve(self, deadline, progress=None, stop=None):
+        queue = self._order()
+        queue.reverse()  # pop() from the end
+        iterations = 0
+        best = len(self.blocks)
+
+        while queue and time.perf_counter() < deadline:
+            iterations += 1
+            block = queue.pop()
+            if self._greedy_place(block):
+                self.tabu[block.id] = iterations + TABU_TENURE
+            else:
+                # Eject the smallest non-tabu set of blockers
+                candidates = []
+                for start in self.starts[block.length]:
+                    blockers = self._blockers(block, start)
+                    tabu = any(self.tabu.get(other, 0) > iterations for other in blockers)
+                    candidates.append((tabu, len(blockers), self.rng.random(), start, blockers))
+                candidates.sort(key=lambda c: c[:3])
+                _, _, _, start, blockers = candidates[0]
+                for other in blockers:
+                    self._remove(self.blocks[other])
+                    queue.insert(self.rng.randrange(len(queue) + 1), self.blocks[other])
+                rooms = self._fits(block, start)
+                if rooms is None:
+                    queue.insert(0, block)
+                else:
+                    self._place(block, start, rooms)
+                    self.tabu[block.id] = iterations + TABU_TENURE
+
+            if len(queue) < best:
+                best = len(queue)
+            if progress and iterations % 50 == 0:
+                progress(len(self.blocks) - len(queue), len(self.blocks))
+            if stop is not None and iterations % 50 == 0 and stop.is_set():
+                break  # another restart already found a complete timetable
+
+        return [block.req for block in queue], iterations
+
+    def rows(self):
+        """Timetable rows of everything placed, in day/period/section order"""
+        with_rooms = any(block.room_options for block in self.blocks)
+        rows = []
+        for block_id, (start, rooms) in self.placed.items():
+            req = self.blocks[block_id].req
+            day = DAYS[start // self.width]
+            for offset in range(self.blocks[block_id].length):
+                period = PERIODS[start % self.width + offset]
+                for i, faculty in enumerate(req.faculty):
+                    row = {'Faculty': faculty, 'Day': day, 'Period': period,
+                           'Class': req.section, 'Subject': req.subject}
+                    if with_rooms:
+                        # Lab batches each get their own room
+                        row['Room'] = rooms[min(i, len(rooms) - 1)] if rooms else None
+                    rows.append(row)
+        rows.sort(key=lambda r: (DAYS.index(r['Day']), r['Period'], r['Class'], r['Faculty']))
+        return rows
+
+
+def _run(requirements, rooms, seconds, seed, progress=None, stop=None):
+    start = time.perf_counter()
+    solver = _Solver(requirements, rooms, seed)
+    unplaced, iterations = solver.solve(start + seconds, progress, stop)
+    columns = ['Faculty', 'Day', 'Period', 'Class', 'Subject'] + (['Room'] if rooms else [])
+    df = pd.DataFrame(solver.rows(), columns=columns)
+    return GenerationResult(df, unplaced, round(time.perf_counter() - start, 3), seed, iterations)
+
+
+# Set in each pool process: tells the restarts still running to give up
+_stop = None
+
+
+def _init_worker(stop):
+    global _stop
+    _stop = stop
+
+
+def _run_task(args):
+    return _run(*args, stop=_stop)
+
+
+def check_feasible(requirements):
+    """Obvious impossibilities (more hours than slots, blocks longer than a session) as error strings"""
+    slots = len(DAYS) * len(PERIODS)
+    errors = [f"{req.subject} for {req.section} has Block {req.block} but sessions are at most "
+              f"{LONGEST_SESSION} periods long"
+              for req in requirements if not 1 <= req.block <= LONGEST_SESSION]
+    hours = {}
+    for req in requirements:
+        for res in [('Section', req.section)] + [('Faculty', name) for name in req.faculty]:
+            hours[res] = hours.get(res, 0) + req.hours
+    return errors + [f"{kind} {name} needs {total} periods but the week has {slots}"
+                     for (kind, name), total in hours.items() if total > slots]
+
+
+def generate(requirements, rooms=(), seconds=DEFAULT_SECONDS, workers=1, seed=None, progress=None):
+    """
+    Build a timetable for the requirements within `seconds`.
+    workers > 1 runs independent restarts in parallel processes and returns
+    the first complete timetable (or the one that placed the most).
+    progress(done, total) reports sessions placed (one process) or restarts
+    finished (parallel).
+    """
+    errors = check_feasible(requirements)
+    if errors:
+        raise ValueError("; ".join(errors))
+
+    seed = random.randrange(1 << 30) if seed is None else seed
+    rooms = list(rooms)
+    if workers <= 1:
+        result = _run(requirements, rooms, seconds, seed, progress)
+    else:
+        best = None
+        context = multiprocessing.get_context()
+        stop = context.Event()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(stop,)) as pool:
+            futures = [pool.submit(_run_task, (requirements, rooms, seconds, seed + i))
+                       for i in range(workers)]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                if progress:
+                    progress(done, workers)
+                if best is None or len(result.unplaced) < len(best.unplaced):
+                    best = result
+                if best.complete:
+                    # cancel() can't stop a running restart: the flag does,
+                    # so leaving the pool doesn't wait out their budgets
+                    stop.set()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    break
+        result = best
+
+    print(f"🧩 Generated {len(result.df)} rows in {result.seconds}s "
+          f"(seed {result.seed}, {result.iterations} steps, {len(result.unplaced)} unplaced)")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a clash-free timetable from a requirements workbook")
+    parser.add_argument("requirements")
+    parser.add_argument("output", nargs="?", default="generated_timetable.xlsx")
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    requirements, rooms = load_requirements(args.requirements)
+    result = generate(requirements, rooms, args.seconds, args.workers or os.cpu_count(), args.seed)
+    result.df.to_excel(args.output, index=False)
+    if result.complete:
+        print(f"✅ Saved {args.output}")
+    else:
+        print(f"⚠️ Saved {args.output} with {len(result.unplaced)} sessions unplaced")
@@ -0,0 +1,317 @@
+"""
+Process-level timetable store.
+
+The live version is published once as a snapshot file (see snapshot.py)
+and every gunicorn worker mmaps that same file read-only: columns, the
+interned strings and the faculty/class/search indexes are read straight
+from the shared pages, so a worker's memory doesn't grow with the
+timetable or with the number of workers. Each request only asks the
+storage backend for its cheap fingerprint (see storage.py); when the live
+version pointer flips, the worker maps the new snapshot and swaps it in,
+keeping the cached schedules and pages of every name whose rows the new
+version didn't change. Readers never take a lock - they pick up whichever
+Timetable object is current.
+"""
+import threading
+
+from clash_detection import detect_clashes
+from faculty_grid import PERIOD_TIMES, PageCache, WeeklySchedule, merge_schedules
+from free_slots import OccupancyIndex
+from live_slots import SlotIndex
+from metrics import timed
+from search_index import FacultySearchIndex
+from snapshot import MappedSnapshot
+
+# Weekly schedules kept per worker (built from the snapshot on first use)
+SCHEDULE_CACHE_SIZE = 512
+
+
+class ScheduleList:
+    """WeeklySchedule per name of a snapshot index, built on demand (LRU)"""
+
+    def __init__(self, timetable, postings, names):
+        self._timetable = timetable
+        self._postings = postings
+        self.names = names
+        self._cache = PageCache(SCHEDULE_CACHE_SIZE)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        schedule = self._cache.get(i)
+        if schedule is None:
+            schedule = self.build(i)
+        return schedule
+
+    def cached(self, i):
+        return self._cache.get(i)
+
+    def positions(self, i):
+        return self._postings[i]
+
+    def build(self, i, records=None):
+        """Build (and cache) schedule i; records: {pos: row} already read, if any"""
+        positions = list(self._postings[i])
+        if records is None:
+            rows = [self._timetable.record(pos) for pos in positions]
+        else:
+            rows = [records[pos] for pos in positions]
+        schedule = WeeklySchedule((self.names[i],), positions, rows)
+        self._cache.put(i, schedule)
+        return schedule
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def adopt(self, previous):
+        """Keep previous' cached schedules of names whose rows didn't change"""
+        kept = 0
+        for old_id, schedule in previous._cache.items():
+            i = self._postings.find(previous.names[old_id])
+            digest = self._postings.digest(i) if i is not None else None
+            if digest is not None and digest == previous._postings.digest(old_id):
+                self._cache.put(i, schedule.moved(list(self._postings[i])))
+                kept += 1
+        return kept
+
+
+class ClassSchedules(ScheduleList):
+    """Per-class schedules, looked up by lower-cased class name"""
+
+    def __init__(self, timetable, postings, names):
+        super().__init__(timetable, postings, names)
+        # Later spellings win, as when this was a plain dict
+        self._ids = {name.lower(): i for i, name in enumerate(names)}
+
+    def get(self, key):
+        i = self._ids.get(key)
+        return self[i] if i is not None else None
+
+    def id(self, key):
+        return self._ids.get(key)
+
+    def values(self):
+        return iter(self)
+
+
+class Timetable:
+    """One published version of the timetable, backed by its mapped snapshot (read-only)"""
+
+    def __init__(self, snapshot, previous=None):
+        """previous: the Timetable this one replaces (its caches are reused where valid)"""
+        self.snapshot = snapshot
+        self.version = snapshot.version
+
+        faculty = self._faculty = snapshot.index('Faculty')
+        if faculty is not None:
+            names = faculty.keys()
+            self.faculty_names = names
+            self.search_index = FacultySearchIndex(names, faculty, snapshot.index('search_keys'),
+                                                   snapshot.index('search_trigrams'))
+            # Weekly grid, counts and result rows per faculty (see faculty_grid.py)
+            self.schedules = ScheduleList(self, faculty, names)
+        else:
+            self.faculty_names = []
+            self.search_index = None
+            self.schedules = []
+
+        classes = self._classes = snapshot.index('Class')
+        if classes is not None and len(classes):
+            self.class_schedules = ClassSchedules(self, classes, classes.keys())
+        else:
+            self.class_schedules = {}
+
+        self._df = None
+        self._department = None
+        # Rendered result pages of this version, keyed by (name ids, query)
+        self.pages = PageCache()
+        self._merged = {}
+        self._clashes = None
+        self._analytics = None
+        self._occupancy = None
+        self._slots = None
+        if previous is not None:
+            self._reuse(previous)
+
+    def _reuse(self, previous):
+        """Carry over schedules and result pages of names this version didn't change"""
+        kept = 0
+        for mine, theirs in ((self.schedules, previous.schedules), (self.class_schedules, previous.class_schedules)):
+            if isinstance(mine, ScheduleList) and isinstance(theirs, ScheduleList):
+                kept += mine.adopt(theirs)
+
+        pages = 0
+        for key, html in previous.pages.items():
+            names, query = key
+            if names and all(self.content_key('faculty', (name,)) == previous.content_key('faculty', (name,))
+                             for name in names):
+                self.pages.put(key, html)
+                pages += 1
+        if kept or pages:
+            print(f"♻️ Kept {kept} schedules and {pages} pages from version {previous.version}")
+
+    def content_key(self, kind, names):
+        """
+        Identity of the rows of some faculty ('faculty') or class ('class')
+        names: equal in every version that didn't change them, so caches
+        keyed by it survive unrelated uploads. Falls back to the version.
+        """
+        postings = self._faculty if kind == 'faculty' else self._classes
+        digests = []
+        for name in names:
+            i = postings.find(name) if postings is not None else None
+            digest = postings.digest(i) if i is not None else None
+            if digest is None:
+                return self.version
+            digests.append(f"{digest:016x}")
+        return f"{kind}:{'+'.join(digests)}"
+
+    def record(self, pos):
+        """Row at pos as a dict, with the period time attached"""
+        row = self.snapshot.record(pos)
+        row['Time'] = PERIOD_TIMES.get(row.get('Period'), 'N/A')
+        return row
+
+    @property
+    def df(self):
+        """The rows as a DataFrame (copied out of the snapshot on first use)"""
+        if self._df is None:
+            self._df = self.snapshot.to_frame()
+        return self._df
+
+    @property
+    def clashes(self):
+        """ClashReport of this version (computed on first use)"""
+        if self._clashes is None:
+            self._clashes = detect_clashes(self.df)
+        return self._clashes
+
+    @property
+    def analytics(self):
+        """Workload aggregates of this version (see workload_analytics.py; computed on first use)"""
+        if self._analytics is None:
+            from workload_analytics import workload_report
+            self._analytics = workload_report(self.df, self.version)
+        return self._analytics
+
+    @property
+    def department(self):
+        """WeeklySchedule of every row (department-wide exports)"""
+        if self._department is None:
+            positions = list(range(len(self)))
+            self._department = WeeklySchedule(("Department",), positions, [self.record(pos) for pos in positions])
+        return self._department
+
+    def prepare(self, name_ids=(), class_ids=()):
+        """
+        Build the faculty and class schedules a batch request needs that
+        aren't cached yet, in one pass: the rows of all of them are read
+        from the snapshot once (a row is in a faculty and a class schedule)
+        and shared. The lookups that follow are cache hits.
+        """
+        missing = []
+        if isinstance(self.schedules, ScheduleList):
+            missing += [(self.schedules, i) for i in set(name_ids) if self.schedules.cached(i) is None]
+        if isinstance(self.class_schedules, ClassSchedules):
+            missing += [(self.class_schedules, i) for i in set(class_ids)
+                        if self.class_schedules.cached(i) is None]
+        if not missing:
+            return
+
+        positions = sorted({pos for schedules, i in missing for pos in schedules.positions(i)})
+        records = {pos: self.record(pos) for pos in positions}
+        for schedules, i in missing:
+            schedules.build(i, records)
+
+    def schedule(self, name_ids):
+        """WeeklySchedule for the name ids a search matched"""
+        if len(name_ids) == 1:
+            return self.schedules[name_ids[0]]
+
+        key = tuple(name_ids)
+        merged = self._merged.get(key)
+        if merged is None:
+            merged = merge_schedules([self.schedules[name_id] for name_id in key])
+            if len(self._merged) < 256:
+                self._merged[key] = merged
+        return merged
+
+    @property
+    def occupancy(self):
+        """OccupancyIndex (free slots / substitutes) of this version"""
+        if self._occupancy is None:
+            names = self.search_index.names if self.search_index else []
+            self._occupancy = OccupancyIndex(names, self.schedules)
+        return self._occupancy
+
+    @property
+    def slots(self):
+        """SlotIndex (who is where, per day x period) of this version"""
+        if self._slots is None:
+            self._slots = SlotIndex(self)
+        return self._slots
+
+    def class_schedule(self, class_name):
+        """WeeklySchedule of one class/section (case-insensitive), or None"""
+        return self.class_schedules.get(str(class_name).strip().lower())
+
+    def class_id(self, class_name):
+        """Index of a class/section in class_schedules (case-insensitive), or None"""
+        if not isinstance(self.class_schedules, ClassSchedules):
+            return None
+        return self.class_schedules.id(str(class_name).strip().lower())
+
+    @property
+    def has_faculty(self):
+        return 'Faculty' in self.snapshot.columns
+
+    def __len__(self):
+        return self.snapshot.rows
+
+
+class TimetableStore:
+    """Loads the live timetable version once and hands out the cached Timetable"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        # (fingerprint, Timetable) - swapped as one tuple so readers never
+        # see a fingerprint paired with the wrong timetable
+        self._loaded = (None, None)
+
+    def get(self):
+        """Return the current Timetable, or None if no file is uploaded"""
+        key = self.storage.fingerprint()
+        if key is None:
+            return None
+
+        loaded_key, timetable = self._loaded
+        if loaded_key == key:
+            return timetable
+
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            loaded_key, timetable = self._loaded
+            if loaded_key == key:
+                return timetable
+
+            with timed("load", "read"):
+                path = self.storage.snapshot_path()
+            if path is None:
+                return None
+            with timed("load", "index"):
+                timetable = Timetable(MappedSnapshot(path), previous=self._loaded[1])
+            self._loaded = (key, timetable)
+            print(f"📥 Mapped timetable version {timetable.version} ({len(timetable)} rows)")
+            return timetable
+
+    @property
+    def loaded(self):
+        """Last loaded Timetable, without checking storage (for metrics)"""
+        return self._loaded[1]
+
+    def invalidate(self):
+        """Drop the cached copy (next get() reloads from storage)"""
+        with self._lock:
+            self._loaded = (None, None)
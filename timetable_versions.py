@@ -0,0 +1,173 @@
+"""
+Atomic, versioned timetable publishing.
+
+Every published timetable gets its own immutable directory:
+
+    UPLOAD_FOLDER/versions/<version>/timetable.xlsx
+                                    /timetable.snap
+                                    /meta.json
+
+and UPLOAD_FOLDER/timetable.version is a pointer holding the id of the
+live version. Publishing builds the directory under a temp name, fsyncs
+it, renames it into place and only then flips the pointer with an atomic
+os.replace - so a reader on any worker sees either the old timetable or
+the new one, never a half-written file. Rolling back is just flipping the
+pointer to an older directory.
+"""
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+from snapshot import SNAPSHOT_FILE, source_stamp, write_snapshot
+
+TIMETABLE_FILE = "timetable.xlsx"
+VERSION_FILE = "timetable.version"
+VERSIONS_DIR = "versions"
+META_FILE = "meta.json"
+
+# Older versions are pruned past this count (the live one is always kept)
+KEEP_VERSIONS = 10
+
+_VERSION_ID = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{6}$")
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # not supported on every filesystem
+    finally:
+        os.close(fd)
+
+
+def _fsync_file(path):
+    with open(path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def versions_root(folder):
+    return os.path.join(folder, VERSIONS_DIR)
+
+
+def version_dir(folder, version):
+    return os.path.join(versions_root(folder), version)
+
+
+def current_version(folder):
+    """Id of the live version, or None (nothing published yet)"""
+    try:
+        with open(os.path.join(folder, VERSION_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current(folder, version):
+    """Atomically point every worker at a published version"""
+    if not _VERSION_ID.match(version or "") or not os.path.isdir(version_dir(folder, version)):
+        raise ValueError(f"Unknown timetable version: {version}")
+
+    tmp_path = os.path.join(folder, f"{VERSION_FILE}.{uuid.uuid4().hex[:8]}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(folder, VERSION_FILE))
+    _fsync_dir(folder)
+
+
+def new_version_id():
+    """'20240101-093000-1a2b3c' - sorts by publish time"""
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+
+
+def publish(folder, df, staged_path, meta=None):
+    """
+    Publish staged_path (a complete workbook on the same filesystem) as a new
+    version and make it live. df is the normalized table for the binary
+    snapshot; with df=None (format not recognized) the first worker to load
+    the version writes the snapshot. With staged_path=None the workbook is
+    written from df. Returns the new version id.
+    """
+    version = new_version_id()
+    root = versions_root(folder)
+    os.makedirs(root, exist_ok=True)
+
+    tmp_dir = os.path.join(root, f".{version}.tmp")
+    os.makedirs(tmp_dir)
+    try:
+        filepath = os.path.join(tmp_dir, TIMETABLE_FILE)
+        if staged_path is None:
+            df.to_excel(filepath, index=False)
+        else:
+            os.replace(staged_path, filepath)
+        _fsync_file(filepath)
+
+        if df is not None:
+            snap_path = os.path.join(tmp_dir, SNAPSHOT_FILE)
+            write_snapshot(df, snap_path, source_stamp(filepath), version)
+            _fsync_file(snap_path)
+
+        meta = dict(meta or {})
+        meta.update(version=version, published=time.time())
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump(meta, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        _fsync_dir(tmp_dir)
+
+        os.rename(tmp_dir, version_dir(folder, version))
+        _fsync_dir(root)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    set_current(folder, version)
+    prune_versions(folder)
+    return version
+
+
+def read_meta(folder, version):
+    try:
+        with open(os.path.join(version_dir(folder, version), META_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {'version': version}
+
+
+def list_versions(folder):
+    """Meta of every published version, newest first, with a 'current' flag"""
+    root = versions_root(folder)
+    if not os.path.isdir(root):
+        return []
+
+    live = current_version(folder)
+    versions = []
+    for name in os.listdir(root):
+        if name.startswith(".") or not os.path.isdir(os.path.join(root, name)):
+            continue
+        meta = read_meta(folder, name)
+        meta['current'] = name == live
+        versions.append(meta)
+    versions.sort(key=lambda meta: (meta.get('published', 0), meta['version']), reverse=True)
+    return versions
+
+
+def prune_versions(folder, keep=KEEP_VERSIONS):
+    """Delete the oldest versions beyond `keep` (never the live one)"""
+    for meta in list_versions(folder)[keep:]:
+        if not meta['current']:
+            shutil.rmtree(version_dir(folder, meta['version']), ignore_errors=True)
+
+
+def rollback(folder, version):
+    """Make an older published version live again"""
+    set_current(folder, version)
+    return read_meta(folder, version)
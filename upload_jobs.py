@@ -0,0 +1,143 @@
+"""
+Background processing of timetable uploads.
+
+/upload only saves the file and queues a job; conversion, stats and
+publishing run on a background thread so the request returns immediately.
+Job status lives in small JSON files under UPLOAD_FOLDER/jobs/, so
+/api/upload_status/<id> works no matter which gunicorn worker answers it.
+
+Searches keep using the previous timetable until the job publishes the new
+one (see storage.publish).
+"""
+import hashlib
+import json
+import os
+import re
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOBS_DIR = "jobs"
+INCOMING_DIR = "incoming"
+
+# Finished job files are pruned after a day
+JOB_TTL_SECONDS = 24 * 60 * 60
+
+_JOB_ID = re.compile(r"^[0-9a-f]{12}$")
+
+# One upload at a time per worker; a conversion already uses all cores
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upload-job")
+
+
+def _jobs_dir(folder):
+    path = os.path.join(folder, JOBS_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def incoming_path(folder, job_id, extension):
+    """Where the raw upload for a job is staged (same filesystem as the live file)"""
+    path = os.path.join(folder, INCOMING_DIR)
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, job_id + extension)
+
+
+def content_hash(path, *extra):
+    """sha256 of a staged upload plus anything else its conversion depends on"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    for part in extra:
+        digest.update(b"\0" + str(part).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class UploadJob:
+    """Status record of one upload, persisted as jobs/<id>.json"""
+
+    def __init__(self, folder, job_id=None):
+        self.folder = folder
+        self.id = job_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        self.status = {
+            'id': self.id,
+            'state': 'queued',
+            'stage': 'Waiting to start',
+            'progress': 0,
+            'stats': None,
+            'faculty_list': [],
+            'sheets': [],
+            'seconds': None,
+            'error': None,
+            'created': now,
+            'updated': now,
+        }
+
+    @property
+    def path(self):
+        return os.path.join(_jobs_dir(self.folder), self.id + ".json")
+
+    def update(self, **fields):
+        """Merge fields into the status and write it atomically"""
+        self.status.update(fields)
+        self.status['updated'] = time.time()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.status, f, default=str)
+        os.replace(tmp_path, self.path)
+
+    def progress(self, stage, percent):
+        self.update(state='running', stage=stage, progress=int(percent))
+
+
+def load_job(folder, job_id):
+    """Status dict for a job id, or None if unknown/expired"""
+    if not _JOB_ID.match(job_id or ""):
+        return None
+    try:
+        with open(os.path.join(_jobs_dir(folder), job_id + ".json")) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _prune(folder):
+    cutoff = time.time() - JOB_TTL_SECONDS
+    for directory in (_jobs_dir(folder), os.path.join(folder, INCOMING_DIR)):
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def _run(job, func, args):
+    start = time.perf_counter()
+    try:
+        job.progress('Starting', 1)
+        result = func(job, *args) or {}
+        job.update(state='done', stage='Published', progress=100,
+                   seconds=round(time.perf_counter() - start, 3), **result)
+    except Exception as e:
+        print(f"Error in upload job {job.id}: {traceback.format_exc()}")
+        job.update(state='error', stage='Failed', error=str(e),
+                   seconds=round(time.perf_counter() - start, 3))
+
+
+def submit(folder, func, *args, job=None):
+    """
+    Queue func(job, *args) on the background thread and return the job.
+    func reports progress through job.progress() and returns the fields
+    (stats, faculty_list, sheets...) to store on success.
+    """
+    _prune(folder)
+    job = job or UploadJob(folder)
+    job.update()
+    _executor.submit(_run, job, func, args)
+    return job
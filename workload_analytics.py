@@ -0,0 +1,189 @@
+"""
+Department-wide workload analytics, computed once per timetable version.
+
+Everything is a pandas group-by over the normalized rows, so a college-wide
+timetable takes milliseconds; Timetable.analytics caches the result and
+the dashboard (and /api/analytics) render straight from it.
+
+A teaching hour is one (faculty, day, period) slot: combined classes
+("A/B") and repeated rows in one period count once. Per faculty:
+
+  - hours, lab hours, classes, subjects and hours per day
+  - longest streak: most periods taught back to back on one day (a break
+    between periods, like lunch, ends a streak - see live_slots.PERIOD_BOUNDS)
+  - idle gaps: free periods between a day's first and last class, summed
+    over the week, and the longest one
+  - status: overloaded (over OVERLOAD_HOURS a week, MAX_DAILY_HOURS a day
+    or MAX_STREAK in a row) or underloaded (under UNDERLOAD_HOURS a week)
+
+Per section: hours per subject, split into theory and lab.
+"""
+import re
+
+import pandas as pd
+
+from faculty_grid import DAYS
+from free_slots import parse_day
+from live_slots import PERIOD_BOUNDS
+
+OVERLOAD_HOURS = 18
+UNDERLOAD_HOURS = 8
+MAX_DAILY_HOURS = 5
+MAX_STREAK = 3
+
+_LAB = re.compile(r"\blab\b", re.IGNORECASE)
+
+# Counts per faculty, in the order the dashboard shows them
+FACULTY_COUNTS = ('hours', 'lab_hours', 'classes', 'subjects', 'days', 'busiest_day',
+                  'longest_streak', 'idle_periods', 'longest_gap')
+
+# Periods that start after a break (lunch): a streak doesn't run across it
+_BOUNDS = list(PERIOD_BOUNDS.items())
+_AFTER_BREAK = {later for (_, (_, end)), (later, (start, _)) in zip(_BOUNDS, _BOUNDS[1:]) if start > end}
+
+
+def _text(series):
+    """Stripped text, NaN for blank cells"""
+    text = series.astype(str).str.strip()
+    return text.where(series.notna() & (text != ""))
+
+
+def _frame(df):
+    """Faculty / Day / Period / Class / Subject / lab of the rows, with Day and Period normalized"""
+    def column(name):
+        return _text(df[name]) if name in df.columns else pd.Series(float("nan"), index=df.index, dtype=object)
+
+    day = column('Day')
+    days = {value: parse_day(value) for value in day.dropna().unique()}
+    subject = column('Subject')
+    frame = pd.DataFrame({
+        'Faculty': column('Faculty'),
+        'Day': day.map(days),
+        'Period': pd.to_numeric(df['Period'], errors='coerce') if 'Period' in df.columns else float("nan"),
+        'Class': column('Class'),
+        'Subject': subject,
+        'lab': subject.fillna("").str.contains(_LAB),
+    })
+    frame['day_order'] = frame['Day'].map({name: i for i, name in enumerate(DAYS)})
+    return frame.dropna(subset=['Day', 'Period'])
+
+
+def _streaks(slots):
+    """Longest back-to-back run per faculty; slots: one row per (Faculty, Day, Period)"""
+    slots = slots.sort_values(['Faculty', 'day_order', 'Period'])
+    previous = slots.shift()
+    continues = ((slots['Faculty'] == previous['Faculty']) & (slots['Day'] == previous['Day'])
+                 & (slots['Period'] == previous['Period'] + 1) & ~slots['Period'].isin(_AFTER_BREAK))
+    run = (~continues).cumsum()
+    lengths = slots.groupby(run)['Period'].transform('size')
+    return lengths.groupby(slots['Faculty']).max()
+
+
+def _faculty_table(frame):
+    rows = frame.dropna(subset=['Faculty'])
+    if rows.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    slots = rows.groupby(['Faculty', 'Day', 'day_order', 'Period'], sort=False)['lab'].any().reset_index()
+
+    per_day = slots.groupby(['Faculty', 'Day']).size().unstack(fill_value=0)
+    per_day = per_day.reindex(columns=[day for day in DAYS if day in per_day.columns])
+    span = slots.groupby(['Faculty', 'Day'])['Period'].agg(['min', 'max', 'size'])
+    gaps = (span['max'] - span['min'] + 1 - span['size']).groupby(level='Faculty')
+
+    table = pd.DataFrame({
+        'hours': slots.groupby('Faculty').size(),
+        'lab_hours': slots.groupby('Faculty')['lab'].sum(),
+        'classes': rows.groupby('Faculty')['Class'].nunique(),
+        'subjects': rows.groupby('Faculty')['Subject'].nunique(),
+        'days': (per_day > 0).sum(axis=1),
+        'busiest_day': per_day.max(axis=1),
+        'longest_streak': _streaks(slots),
+        'idle_periods': gaps.sum(),
+        'longest_gap': gaps.max(),
+    }).fillna(0).astype(int)
+
+    reasons = pd.DataFrame({
+        f"over {OVERLOAD_HOURS} h/week": table['hours'] > OVERLOAD_HOURS,
+        f"over {MAX_DAILY_HOURS} h in a day": table['busiest_day'] > MAX_DAILY_HOURS,
+        f"over {MAX_STREAK} periods in a row": table['longest_streak'] > MAX_STREAK,
+    })
+    table['overloaded'] = reasons.any(axis=1)
+    table['underloaded'] = table['hours'] < UNDERLOAD_HOURS
+    table['reasons'] = reasons.apply(lambda row: [label for label, hit in row.items() if hit], axis=1)
+    return table.sort_values(['hours', 'longest_streak'], ascending=False), per_day
+
+
+def _day_table(frame):
+    slots = frame.dropna(subset=['Faculty']).drop_duplicates(['Faculty', 'Day', 'Period'])
+    per_faculty = slots.groupby(['Day', 'Faculty']).size()
+    table = pd.DataFrame({
+        'hours': slots.groupby('Day').size(),
+        'faculty': per_faculty.groupby(level='Day').size(),
+        'average': per_faculty.groupby(level='Day').mean().round(1),
+        'most': per_faculty.groupby(level='Day').max(),
+        'classes': frame.groupby('Day')['Class'].nunique(),
+    })
+    return table.reindex([day for day in DAYS if day in table.index]).fillna(0)
+
+
+def _section_table(frame):
+    rows = frame.dropna(subset=['Class'])
+    if rows.empty:
+        return []
+    # Parallel batches are separate subject hours but one section hour
+    subject_slots = rows.drop_duplicates(['Class', 'Day', 'Period', 'Subject'])
+    subjects = subject_slots.groupby(['Class', 'Subject']).agg(hours=('Period', 'size'), lab=('lab', 'any'))
+    section_slots = rows.groupby(['Class', 'Day', 'Period'])['lab'].any()
+    totals = pd.DataFrame({'hours': section_slots.groupby(level='Class').size(),
+                           'lab_hours': section_slots.groupby(level='Class').sum()})
+
+    sections = {name: {'name': name, 'hours': total['hours'], 'lab_hours': total['lab_hours'],
+                       'theory_hours': total['hours'] - total['lab_hours'], 'subjects': []}
+                for name, total in totals.astype(int).to_dict('index').items()}
+    subjects = subjects.reset_index().sort_values(['Class', 'hours'], ascending=[True, False])
+    for row in subjects.to_dict('records'):
+        sections[row['Class']]['subjects'].append({'subject': row['Subject'], 'hours': row['hours'],
+                                                   'lab': row['lab']})
+    return list(sections.values())
+
+
+def workload_report(df, version=None):
+    """All the aggregates of one timetable, as plain JSON-ready data"""
+    frame = _frame(df)
+    faculty, per_day = _faculty_table(frame)
+    days = _day_table(frame)
+
+    faculty_rows = []
+    per_day = per_day.to_dict('index')
+    for name, row in faculty.to_dict('index').items():
+        faculty_rows.append({
+            'name': name,
+            **{column: row[column] for column in FACULTY_COUNTS},
+            'per_day': per_day[name],
+            'status': 'overloaded' if row['overloaded'] else ('underloaded' if row['underloaded'] else 'ok'),
+            'reasons': row['reasons'] or ([f"under {UNDERLOAD_HOURS} h/week"] if row['underloaded'] else []),
+        })
+
+    hours = faculty['hours'] if len(faculty) else pd.Series(dtype=int)
+    return {
+        'version': version,
+        'totals': {
+            'rows': len(df),
+            'faculty': len(faculty),
+            'classes': int(frame['Class'].nunique()),
+            'subjects': int(frame['Subject'].nunique()),
+            'teaching_hours': int(hours.sum()),
+            'lab_hours': int(faculty['lab_hours'].sum()) if len(faculty) else 0,
+            'average_hours': round(float(hours.mean()), 1) if len(hours) else 0,
+            'median_hours': float(hours.median()) if len(hours) else 0,
+        },
+        'thresholds': {'overload_hours': OVERLOAD_HOURS, 'underload_hours': UNDERLOAD_HOURS,
+                       'max_daily_hours': MAX_DAILY_HOURS, 'max_streak': MAX_STREAK},
+        'days': [{'day': day, **{column: (float(value) if column == 'average' else int(value))
+                                 for column, value in row.items()}}
+                 for day, row in days.iterrows()],
+        'faculty': faculty_rows,
+        'overloaded': [row['name'] for row in faculty_rows if row['status'] == 'overloaded'],
+        'underloaded': [row['name'] for row in faculty_rows if row['status'] == 'underloaded'],
+        'sections': _section_table(frame),
+    }